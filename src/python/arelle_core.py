@@ -2,18 +2,20 @@
 import subprocess
 import os
 import logging
+import functools
 from config import ARELLE_PATH
 
 logger = logging.getLogger(__name__)
 
-def test_arelle_path():
-    """Test if Arelle executable is accessible"""
+@functools.lru_cache(maxsize=1)
+def _arelle_probe(arelle_path):
+    """Run the Arelle --help probe once per executable path"""
     try:
-        if not os.path.exists(ARELLE_PATH):
-            return False, f"Arelle executable not found at: {ARELLE_PATH}"
+        if not os.path.exists(arelle_path):
+            return False, f"Arelle executable not found at: {arelle_path}"
         
         # Test Arelle with --help command
-        result = subprocess.run([ARELLE_PATH, "--help"], 
+        result = subprocess.run([arelle_path, "--help"], 
                               stdout=subprocess.PIPE, 
                               stderr=subprocess.PIPE, 
                               text=True, 
@@ -26,11 +28,44 @@ def test_arelle_path():
     except Exception as e:
         return False, f"Arelle test error: {str(e)}"
 
+def test_arelle_path():
+    """Test if Arelle executable is accessible (result is cached, see refresh_arelle_probe)"""
+    return _arelle_probe(ARELLE_PATH)
+
+def refresh_arelle_probe():
+    """Forget the cached Arelle probe, e.g. after installing Arelle or changing ARELLE_PATH"""
+    _arelle_probe.cache_clear()
+
+def _run_in_process(instance_path, imports=(), packages=(), calc_decimals=False):
+    """
+    Validate with the shared in-process Arelle controller, returning a CompletedProcess
+    whose stdout holds the log lines; None when Arelle cannot be imported
+    """
+    from arelle_runner import get_arelle_controller
+    
+    controller = get_arelle_controller()
+    if controller is None:
+        return None
+    
+    output = controller.validate(instance_path, imports=imports, packages=packages, calc_decimals=calc_decimals)
+    return subprocess.CompletedProcess(
+        args=["arelle", "--file", instance_path],
+        returncode=output['return_code'],
+        stdout="\n".join(output['lines']),
+        stderr=""
+    )
+
 def run_basic_arelle_validation(instance_path, extracted_schemas=None):
-    """Run basic Arelle validation with optional extracted schemas"""
+    """Run basic Arelle validation with optional extracted schemas, in-process when Arelle can be imported"""
     try:
         logger.info(f"🔧 Running basic XBRL validation for: {instance_path}")
         
+        xsd_schemas = [schema for schema in extracted_schemas or () if schema.endswith('.xsd')]
+        result = _run_in_process(instance_path, imports=xsd_schemas)
+        if result is not None:
+            logger.info(f"✅ Basic validation completed in-process with return code: {result.returncode}")
+            return result
+        
         # FIXED: Basic Arelle command with MINIMAL options to prevent errors
         arelle_cmd = [
             ARELLE_PATH,
@@ -40,14 +75,13 @@ def run_basic_arelle_validation(instance_path, extracted_schemas=None):
             "--logFormat", "[%(levelname)s] %(asctime)s - %(message)s"
         ]
         
-        # Add extracted schemas if available
-        if extracted_schemas:
-            logger.info(f"Adding {len(extracted_schemas)} extracted schemas")
-            for schema in extracted_schemas[:50]:  # Limit to prevent command line overflow
-                if schema.endswith('.xsd'):
-                    arelle_cmd.extend(["--import", schema])
+        # Add extracted schemas if available, as one '|'-separated --import
+        if xsd_schemas:
+            logger.info(f"Adding {len(xsd_schemas)} extracted schemas")
+            arelle_cmd.extend(["--import", "|".join(xsd_schemas)])
         
-        logger.info(f"🔧 Basic Arelle command: {' '.join(arelle_cmd[:8])}... (with {len(extracted_schemas) if extracted_schemas else 0} schemas)")
+        logger.info("🔧 Basic Arelle command: %s... (with %d schemas)",
+                    arelle_cmd[:8], len(extracted_schemas) if extracted_schemas else 0)
         
         # Execute with timeout
         result = subprocess.run(
@@ -68,43 +102,62 @@ def run_basic_arelle_validation(instance_path, extracted_schemas=None):
         logger.error(f"❌ Basic validation failed: {str(e)}")
         raise Exception(f'Validation failed: {str(e)}')
 
+# Invariant parts of the enhanced Arelle command
+_BASE_FLAGS = (
+    "--validate",
+    "--calcDecimals",
+    "--calcPrecision",
+    "--logLevel", "info",
+    "--logFormat", "%(message)s",
+)
+_EBA_FLAGS = ("--plugins", "validate/EBA", "--disclosureSystem", "EBA")
+_OFFLINE_FLAGS = ("--internetConnectivity", "offline")
+
+def _partition_packages(packages):
+    """Split packages into XSD imports and ZIP/directory packages in one pass"""
+    xsd_packages = []
+    archive_packages = []
+    for package in packages:
+        if package.endswith('.xsd'):
+            xsd_packages.append(package)
+        elif package.endswith('.zip'):
+            archive_packages.append(package)
+        elif os.path.isdir(package):  # only stat what the suffix can't classify
+            archive_packages.append(package)
+    return xsd_packages, archive_packages
+
 def build_enhanced_arelle_command(instance_path, extracted_schemas, prioritized_packages):
     """Build enhanced Arelle command with all available schemas and packages"""
-    arelle_cmd = [ARELLE_PATH]
-    
-    # Basic validation flags
-    arelle_cmd.extend([
-        "--file", instance_path,
-        "--validate",
-        "--calcDecimals", 
-        "--calcPrecision",
-        "--logLevel", "info",
-        "--logFormat", "%(message)s"
-    ])
-    
-    # EBA plugin configuration
-    arelle_cmd.extend([
-        "--plugins", "validate/EBA",
-        "--disclosureSystem", "EBA"
-    ])
+    arelle_cmd = [ARELLE_PATH, "--file", instance_path, *_BASE_FLAGS, *_EBA_FLAGS]
     
-    # Import extracted schemas
-    if extracted_schemas:
-        for schema in extracted_schemas[:100]:  # Limit for performance
-            if schema.endswith('.xsd'):
-                arelle_cmd.extend(["--import", schema])
+    # Arelle accepts '|'-separated lists for --import and --packages, so each
+    # is passed once instead of repeating the flag per file
+    imports = [schema for schema in extracted_schemas or () if schema.endswith('.xsd')]
+    xsd_packages, archive_packages = _partition_packages(prioritized_packages or ())
+    imports += xsd_packages
     
-    # Import prioritized packages
-    if prioritized_packages:
-        for package in prioritized_packages[:50]:
-            if package.endswith('.xsd'):
-                arelle_cmd.extend(["--import", package])
-            elif package.endswith('.zip') or os.path.isdir(package):
-                arelle_cmd.extend(["--packages", package])
+    if imports:
+        arelle_cmd.extend(["--import", "|".join(imports)])
+    if archive_packages:
+        arelle_cmd.extend(["--packages", "|".join(archive_packages)])
     
     # Connectivity options
-    arelle_cmd.extend([
-        "--internetConnectivity", "offline"
-    ])
+    arelle_cmd += _OFFLINE_FLAGS
     
     return arelle_cmd
+
+def run_enhanced_arelle_validation(instance_path, extracted_schemas, prioritized_packages):
+    """
+    Validate with all available schemas and packages, in-process when Arelle can be imported,
+    else with the command from build_enhanced_arelle_command
+    """
+    imports = [schema for schema in extracted_schemas or () if schema.endswith('.xsd')]
+    xsd_packages, archive_packages = _partition_packages(prioritized_packages or ())
+    
+    result = _run_in_process(instance_path, imports=imports + xsd_packages,
+                             packages=archive_packages, calc_decimals=True)
+    if result is not None:
+        return result
+    
+    arelle_cmd = build_enhanced_arelle_command(instance_path, extracted_schemas, prioritized_packages)
+    return subprocess.run(arelle_cmd, capture_output=True, text=True, timeout=300)
@@ -6,17 +6,288 @@ Includes taxonomy ZIP processing, caching, and offline support.
 """
 
 import logging
+import re
 import subprocess
 import os
+import sys
 import zipfile
 import tempfile
 import shutil
-from typing import Dict, Any, Optional, List
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional, List, Iterable
 from datetime import datetime
 import json
+import functools
+import importlib.util
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Written once a taxonomy ZIP has been fully extracted into its cache directory
+EXTRACTION_SENTINEL = '.extracted'
+
+# Written once the Arelle web cache has been primed from the bundled archive
+CACHE_WARMED_SENTINEL = '.warmed'
+
+# Prefix of result cache keys; bump when the key scheme changes so old entries are ignored
+RESULT_CACHE_VERSION = 'b2'
+
+# Arelle command line validation timeout in seconds
+ARELLE_TIMEOUT = 120
+
+# Number of trailing output lines kept as raw output
+RAW_OUTPUT_TAIL_LINES = 500
+
+# Well-known EBA entry point schemas, in priority order after the FINREP schemas
+ENTRY_POINT_SCHEMAS = ('met.xsd', 'dim.xsd', 'eba_met.xsd')
+
+# Detail extraction patterns for Arelle messages (applied to lowercased text)
+_LINE_RE = re.compile(r'line\s+(\d+)')
+_FACT_RE = re.compile(r'fact\s+([a-zA-Z_:][a-zA-Z0-9_:]*)')
+_RULE_RE = re.compile(r'(eba_v\d+_[a-z])')
+_ELEMENT_RE = re.compile(r'element\s+([a-zA-Z_:][a-zA-Z0-9_:]*)')
+
+
+def _keyword_re(keywords) -> re.Pattern:
+    """Compile a substring alternation matching any of the keywords"""
+    return re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+
+
+# Enhanced categories for EBA FINREP business rules, checked in order
+_MESSAGE_CATEGORIES = tuple((category, _keyword_re(keywords)) for category, keywords in (
+    ('business_rule', ('eba_v', 'finrep', 'corep', 'business rule', 'constraint', 'consistency')),
+    ('calculation', ('calculation', 'summation', 'numeric', 'arithmetic', 'balance')),
+    ('formula', ('formula', 'expression', 'assertion')),
+    ('schema', ('schema', 'xsd', 'element', 'type', 'definition')),
+    ('instance', ('instance', 'fact', 'context', 'unit', 'entity')),
+    ('dimension', ('dimension', 'domain', 'member', 'axis', 'hierarchy')),
+    ('linkbase', ('linkbase', 'link', 'arc', 'label', 'reference')),
+    ('namespace', ('namespace', 'prefix', 'uri', 'import')),
+    ('validation', ('validation', 'rule', 'check', 'verify')),
+))
+
+_BUSINESS_RULE_INDICATORS_RE = _keyword_re((
+    'eba_v', 'finrep', 'corep', 'business rule', 'constraint violation',
+    'consistency check', 'validation rule', 'regulatory rule'
+))
+
+# Output line classification: message level markers and business rule mentions
+_CLASSIFY_RE = re.compile(
+    r'(?P<error>\[ERROR\]|ERROR:|EXCEPTION|FATAL)'
+    r'|(?P<warning>\[WARNING\]|WARNING:|INCONSISTENCY)'
+    r'|(?P<info>\[INFO\]|INFO:|VALIDATION)',
+    re.IGNORECASE
+)
+_BUSINESS_RULE_LINE_RE = re.compile(
+    'eba_v|eba_validation|business rule|finrep|corep|calculation|formula|constraint|consistency',
+    re.IGNORECASE
+)
+_VALIDATION_INFO_RE = re.compile('rule|validation|check', re.IGNORECASE)
+
+# Leading "[LEVEL] timestamp - " prefix, ignored when fingerprinting repeated messages
+_MESSAGE_PREFIX_RE = re.compile(r'^\[\w+\]\s*(?:\d{4}-\d{2}-\d{2}[ T][\d:,.]+\s*-\s*)?')
+
+
+@functools.lru_cache(maxsize=1)
+def _arelle_module_probe() -> bool:
+    """Check once whether Arelle runs as a python module"""
+    try:
+        result = subprocess.run(
+            ['python', '-m', 'arelle.CmdLine', '--help'], 
+            capture_output=True, text=True, timeout=10
+        )
+        return result.returncode == 0
+    except Exception as e:
+        logger.warning(f"Module check failed: {e}")
+        return False
+
+
+def _chmod_and_retry(func, path, _exc) -> None:
+    """shutil.rmtree error handler: make the entry and its parent writable, then retry once"""
+    os.chmod(os.path.dirname(path), 0o755)
+    os.chmod(path, 0o755)
+    func(path)
+
+
+def _file_mtime(path: str) -> float:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return 0
+
+
+@functools.lru_cache(maxsize=1024)
+def _result_cache_key(xbrl_path: str, xbrl_mtime: float, taxonomy_path: str, taxonomy_mtime: float) -> str:
+    import hashlib
+    
+    cache_input = f"{xbrl_path}_{xbrl_mtime}_{taxonomy_path}_{taxonomy_mtime}"
+    digest = hashlib.blake2b(cache_input.encode(), digest_size=16).hexdigest()
+    return f"{RESULT_CACHE_VERSION}_{digest}"
+
+
+def _classify_line(line: str) -> Optional[str]:
+    """Return 'error', 'warning' or 'info' for an output line; errors take precedence"""
+    line_class = None
+    for match in _CLASSIFY_RE.finditer(line):
+        if match.lastgroup == 'error':
+            return 'error'
+        if line_class != 'warning':
+            line_class = match.lastgroup
+    return line_class
+
+
+class ArelleController:
+    """
+    Persistent in-process Arelle controller.
+
+    Loads Arelle, the EBA plugin and the disclosure system once and reuses
+    them for every instance, so validations no longer pay interpreter start-up
+    and plugin loading per file.
+    """
+
+    def __init__(self, xbrl_cache_dir: Optional[str] = None):
+        from arelle import Cntlr, PluginManager
+
+        self.cntlr = Cntlr.Cntlr(logFileName='logToBuffer')
+        self.cntlr.webCache.workOffline = True
+        if xbrl_cache_dir:
+            # Resolve schema URLs from the runner's pre-warmed web cache
+            self.cntlr.webCache.cacheDir = xbrl_cache_dir
+        PluginManager.addPluginModule('validate/EBA')
+        self.cntlr.modelManager.loadCustomTransforms()
+        self.cntlr.modelManager.validateDisclosureSystem = True
+        self.cntlr.modelManager.disclosureSystem.select('eba')
+
+        # Arelle's model manager is not thread-safe
+        self._lock = threading.Lock()
+        # Taxonomy packages already registered with Arelle's package manager
+        self._packages = set()
+        logger.info("✅ In-process Arelle controller initialized")
+
+    def _add_packages(self, packages: Iterable[str]) -> None:
+        """Register taxonomy packages (--packages); mappings are global, so each is added once"""
+        new_packages = [package for package in packages if package not in self._packages]
+        if not new_packages:
+            return
+        from arelle import PackageManager
+
+        for package in new_packages:
+            PackageManager.addPackage(self.cntlr, package)
+            self._packages.add(package)
+        PackageManager.rebuildRemappings(self.cntlr)
+
+    def _set_calc_validation(self, calc_decimals: bool) -> None:
+        """Calculation linkbase checks with inferred decimals (--calcDecimals), or none"""
+        model_manager = self.cntlr.modelManager
+        try:
+            from arelle.ValidateXbrlCalcs import ValidateCalcsMode
+        except ImportError:  # Arelle before 2.x configures calculations with two flags
+            model_manager.validateCalcLB = calc_decimals
+            model_manager.validateInferDecimals = calc_decimals
+        else:
+            model_manager.validateCalcs = ValidateCalcsMode.XBRL_v2_1 if calc_decimals else ValidateCalcsMode.NONE
+
+    def validate(self, xbrl_path: str, taxonomy_entry_point: Optional[str] = None,
+                 imports: Iterable[str] = (), packages: Iterable[str] = (),
+                 calc_decimals: bool = False) -> Dict[str, Any]:
+        """
+        Load and validate one instance, returning the captured log lines
+
+        Args:
+            imports: Extra schemas loaded alongside the instance (--import)
+            packages: Taxonomy package ZIPs or directories (--packages)
+            calc_decimals: Check calculations, inferring decimals (--calcDecimals)
+
+        Returns:
+            Dictionary with return_code and lines formatted as '[LEVEL] message'
+        """
+        from arelle import FileSource, ModelDocument, Validate
+
+        supplemental = [taxonomy_entry_point] if taxonomy_entry_point else []
+        supplemental += imports
+
+        with self._lock:
+            self.cntlr.logHandler.clearLogBuffer()
+            model_xbrl = None
+            return_code = 0
+            try:
+                self._add_packages(packages)
+                self._set_calc_validation(calc_decimals)
+                model_xbrl = self.cntlr.modelManager.load(FileSource.openFileSource(xbrl_path, self.cntlr))
+                if model_xbrl is None or model_xbrl.modelDocument is None:
+                    return_code = 1
+                else:
+                    for schema in supplemental:
+                        if os.path.isfile(schema):
+                            ModelDocument.load(model_xbrl, schema, isSupplemental=True)
+                    Validate.validate(model_xbrl)
+            except Exception as e:
+                logger.error(f"❌ In-process Arelle validation failed: {e}")
+                self.cntlr.addToLog(f"[EXCEPTION] {e}", level=logging.ERROR)
+                return_code = 1
+            finally:
+                if model_xbrl is not None:
+                    model_xbrl.close()
+
+            lines = [
+                f"[{record.levelname}] {record.getMessage()}"
+                for record in self.cntlr.logHandler.logRecordBuffer
+            ]
+            self.cntlr.logHandler.clearLogBuffer()
+
+        return {'return_code': return_code, 'lines': lines}
+
+
+_arelle_controller = None
+_arelle_controller_lock = threading.Lock()
+
+
+def get_arelle_controller(xbrl_cache_dir: Optional[str] = None) -> Optional[ArelleController]:
+    """
+    Return the shared in-process controller, or None if Arelle cannot be imported
+    
+    xbrl_cache_dir only applies when the controller is first created.
+    """
+    global _arelle_controller
+    if _arelle_controller is None:
+        with _arelle_controller_lock:
+            if _arelle_controller is None:
+                try:
+                    _arelle_controller = ArelleController(xbrl_cache_dir)
+                except Exception as e:
+                    logger.info(f"In-process Arelle unavailable, using command line: {e}")
+                    _arelle_controller = False
+    return _arelle_controller or None
+
+
+# Upper bound on pool size; each worker holds open file handles for a whole DTS
+MAX_VALIDATION_WORKERS = 32
+
+
+def _init_validation_worker(cache_dir: str) -> None:
+    """Point every worker's Arelle web cache at the shared runner cache"""
+    os.environ['XDG_CONFIG_HOME'] = cache_dir
+
+
+def _validate_instance_worker(runner: 'ArelleRunner', xbrl_path: str, taxonomy_path: str,
+                              processed_taxonomy: Dict[str, Any]) -> Dict[str, Any]:
+    """Process pool entry point for ArelleRunner.validate_many"""
+    try:
+        return runner._validate_instance(xbrl_path, taxonomy_path, processed_taxonomy)
+    except Exception as e:
+        return {
+            'method': 'arelle_fallback',
+            'status': 'error',
+            'error': str(e)
+        }
+
+
 class ArelleRunner:
     """
     Manages Arelle validation as fallback strategy with enhanced features:
@@ -30,28 +301,44 @@ class ArelleRunner:
         self.cache_dir = os.path.join(tempfile.gettempdir(), 'arelle_cache')
         self.taxonomy_cache_dir = os.path.join(self.cache_dir, 'taxonomies')
         self.result_cache_dir = os.path.join(self.cache_dir, 'results')
+        # One marker per externally extracted taxonomy whose permissions were fixed
+        self.permissions_cache_dir = os.path.join(self.cache_dir, 'permissions')
+        # Arelle's web cache; where Arelle puts it when XDG_CONFIG_HOME is cache_dir
+        self.xbrl_cache_dir = os.path.join(self.cache_dir, 'arelle', 'cache')
         
         # Create cache directories
         os.makedirs(self.taxonomy_cache_dir, exist_ok=True)
         os.makedirs(self.result_cache_dir, exist_ok=True)
+        os.makedirs(self.permissions_cache_dir, exist_ok=True)
+        os.makedirs(self.xbrl_cache_dir, exist_ok=True)
+        
+        self._warm_taxonomy_cache()
         
         # Check Arelle availability
         self.arelle_available = self._check_arelle_installation()
         logger.info(f"🔧 Arelle runner initialized - Available: {self.arelle_available}")
     
-    def _check_arelle_installation(self) -> bool:
-        """Check if Arelle is properly installed and accessible"""
-        try:
-            # Try module approach first
-            result = subprocess.run(
-                ['python', '-m', 'arelle.CmdLine', '--help'], 
-                capture_output=True, text=True, timeout=10
-            )
-            if result.returncode == 0:
-                logger.info("✅ Arelle available via python module")
-                return True
-        except Exception as e:
-            logger.warning(f"Module check failed: {e}")
+    def _check_arelle_installation(self, force_refresh: bool = False) -> bool:
+        """
+        Check if Arelle is properly installed and accessible
+        
+        Probe results are cached per process; pass force_refresh=True to
+        re-run them, e.g. after installing Arelle or changing ARELLE_PATH.
+        """
+        if force_refresh:
+            from arelle_core import refresh_arelle_probe
+            _arelle_module_probe.cache_clear()
+            refresh_arelle_probe()
+        
+        # Prefer the persistent in-process controller; it is only started on first validation
+        if importlib.util.find_spec('arelle') is not None:
+            logger.info("✅ Arelle available in-process")
+            return True
+        
+        # Try module approach first
+        if _arelle_module_probe():
+            logger.info("✅ Arelle available via python module")
+            return True
         
         # Fallback: Use existing arelle_core.py infrastructure
         try:
@@ -69,6 +356,43 @@ class ArelleRunner:
         
         return False
     
+    def _warm_taxonomy_cache(self) -> bool:
+        """
+        Prime Arelle's web cache from a bundled archive, once per host
+        
+        The bundle (config.ARELLE_CACHE_BUNDLE) is a tar archive laid out the
+        way Arelle maps URLs to cache paths, e.g.
+        http/www.eba.europa.eu/eu/fr/xbrl/crr/dict/met/met.xsd, so offline
+        validation finds every EBA, XBRL and W3C schema locally.
+        """
+        sentinel = os.path.join(self.xbrl_cache_dir, CACHE_WARMED_SENTINEL)
+        if os.path.exists(sentinel):
+            return True
+        
+        try:
+            from config import ARELLE_CACHE_BUNDLE
+        except Exception:
+            ARELLE_CACHE_BUNDLE = None
+        
+        if not ARELLE_CACHE_BUNDLE or not os.path.exists(ARELLE_CACHE_BUNDLE):
+            return False
+        
+        try:
+            import tarfile
+            
+            logger.info(f"📦 Warming Arelle cache from: {os.path.basename(ARELLE_CACHE_BUNDLE)}")
+            with tarfile.open(ARELLE_CACHE_BUNDLE) as bundle:
+                if hasattr(tarfile, 'data_filter'):
+                    bundle.extractall(self.xbrl_cache_dir, filter='data')
+                else:
+                    bundle.extractall(self.xbrl_cache_dir)
+            open(sentinel, 'w').close()
+            logger.info("✅ Arelle cache warmed")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to warm Arelle cache: {e}")
+            return False
+    
     def validate_with_arelle(self, xbrl_path: str, taxonomy_path: str) -> Dict[str, Any]:
         """
         Execute Arelle validation with enhanced taxonomy processing
@@ -82,54 +406,14 @@ class ArelleRunner:
         """
         
         if not self.arelle_available:
-            return {
-                'method': 'arelle_fallback',
-                'status': 'unavailable',
-                'message': 'Arelle is not installed or accessible'
-            }
+            return self._unavailable_result()
         
         try:
-            validation_result = {
-                'method': 'arelle_fallback',
-                'status': 'running',
-                'timestamp': datetime.now().isoformat(),
-                'files': {
-                    'xbrl_file': os.path.basename(xbrl_path),
-                    'taxonomy_file': os.path.basename(taxonomy_path)
-                }
-            }
-            
             # STEP 1: Process taxonomy (extract if ZIP)
             logger.info(f"📦 Processing taxonomy: {os.path.basename(taxonomy_path)}")
             processed_taxonomy = self._process_taxonomy(taxonomy_path)
             
-            if not processed_taxonomy['success']:
-                validation_result['status'] = 'error'
-                validation_result['error'] = processed_taxonomy['error']
-                return validation_result
-            
-            taxonomy_entry_point = processed_taxonomy['entry_point']
-            validation_result['taxonomy_processing'] = processed_taxonomy
-            
-            # STEP 2: Check cache for existing results
-            cache_key = self._generate_cache_key(xbrl_path, taxonomy_entry_point)
-            cached_result = self._get_cached_result(cache_key)
-            
-            if cached_result:
-                logger.info("💾 Using cached Arelle validation result")
-                cached_result['cache_hit'] = True
-                return cached_result
-            
-            # STEP 3: Execute Arelle validation
-            logger.info("🔍 Executing Arelle validation...")
-            arelle_result = self._execute_arelle_validation(xbrl_path, taxonomy_entry_point)
-            validation_result.update(arelle_result)
-            
-            # STEP 4: Cache results for future use
-            if validation_result.get('status') == 'completed':
-                self._cache_result(cache_key, validation_result)
-            
-            return validation_result
+            return self._validate_instance(xbrl_path, taxonomy_path, processed_taxonomy)
             
         except Exception as e:
             logger.error(f"❌ Arelle validation failed: {e}")
@@ -139,6 +423,142 @@ class ArelleRunner:
                 'error': str(e)
             }
     
+    def validate_batch(self, xbrl_paths: List[str], taxonomy_path: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Validate many XBRL instances against one taxonomy
+        
+        The taxonomy is processed once and shared by every instance; results
+        are still cached per file.
+        
+        Args:
+            xbrl_paths: Paths to XBRL instance files
+            taxonomy_path: Path to taxonomy file or ZIP
+            
+        Returns:
+            Dictionary mapping each instance path to its validation result
+        """
+        
+        if not self.arelle_available:
+            return {xbrl_path: self._unavailable_result() for xbrl_path in xbrl_paths}
+        
+        logger.info(f"📦 Processing taxonomy for batch of {len(xbrl_paths)} files: "
+                   f"{os.path.basename(taxonomy_path)}")
+        processed_taxonomy = self._process_taxonomy(taxonomy_path)
+        
+        results = {}
+        for xbrl_path in xbrl_paths:
+            try:
+                results[xbrl_path] = self._validate_instance(xbrl_path, taxonomy_path, processed_taxonomy)
+            except Exception as e:
+                logger.error(f"❌ Arelle validation failed for {xbrl_path}: {e}")
+                results[xbrl_path] = {
+                    'method': 'arelle_fallback',
+                    'status': 'error',
+                    'error': str(e)
+                }
+        
+        return results
+    
+    def validate_many(self, xbrl_paths: List[str], taxonomy_path: str,
+                      max_workers: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Validate many XBRL instances in parallel worker processes
+        
+        The taxonomy is extracted once up front and shared read-only by all
+        workers, which also share the on-disk Arelle cache.
+        
+        Args:
+            xbrl_paths: Paths to XBRL instance files
+            taxonomy_path: Path to taxonomy file or ZIP
+            max_workers: Number of worker processes (defaults to CPU count, capped)
+            
+        Returns:
+            Dictionary mapping each instance path to its validation result
+        """
+        
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        max_workers = max(1, min(max_workers, MAX_VALIDATION_WORKERS, len(xbrl_paths)))
+        
+        if max_workers == 1 or not self.arelle_available:
+            return self.validate_batch(xbrl_paths, taxonomy_path)
+        
+        logger.info(f"📦 Processing taxonomy for {len(xbrl_paths)} files on {max_workers} workers: "
+                   f"{os.path.basename(taxonomy_path)}")
+        processed_taxonomy = self._process_taxonomy(taxonomy_path)
+        
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 initializer=_init_validation_worker,
+                                 initargs=(self.cache_dir,)) as executor:
+            futures = {
+                xbrl_path: executor.submit(_validate_instance_worker, self, xbrl_path,
+                                           taxonomy_path, processed_taxonomy)
+                for xbrl_path in xbrl_paths
+            }
+            
+            results = {}
+            for xbrl_path, future in futures.items():
+                try:
+                    results[xbrl_path] = future.result()
+                except Exception as e:
+                    logger.error(f"❌ Arelle worker failed for {xbrl_path}: {e}")
+                    results[xbrl_path] = {
+                        'method': 'arelle_fallback',
+                        'status': 'error',
+                        'error': str(e)
+                    }
+        
+        return results
+    
+    def _unavailable_result(self) -> Dict[str, Any]:
+        return {
+            'method': 'arelle_fallback',
+            'status': 'unavailable',
+            'message': 'Arelle is not installed or accessible'
+        }
+    
+    def _validate_instance(self, xbrl_path: str, taxonomy_path: str,
+                           processed_taxonomy: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate a single instance against an already processed taxonomy"""
+        
+        validation_result = {
+            'method': 'arelle_fallback',
+            'status': 'running',
+            'timestamp': datetime.now().isoformat(),
+            'files': {
+                'xbrl_file': os.path.basename(xbrl_path),
+                'taxonomy_file': os.path.basename(taxonomy_path)
+            }
+        }
+        
+        if not processed_taxonomy['success']:
+            validation_result['status'] = 'error'
+            validation_result['error'] = processed_taxonomy['error']
+            return validation_result
+        
+        taxonomy_entry_point = processed_taxonomy['entry_point']
+        validation_result['taxonomy_processing'] = processed_taxonomy
+        
+        # STEP 2: Check cache for existing results
+        cache_key = self._generate_cache_key(xbrl_path, taxonomy_entry_point)
+        cached_result = self._get_cached_result(cache_key)
+        
+        if cached_result:
+            logger.info("💾 Using cached Arelle validation result")
+            cached_result['cache_hit'] = True
+            return cached_result
+        
+        # STEP 3: Execute Arelle validation
+        logger.info("🔍 Executing Arelle validation...")
+        arelle_result = self._execute_arelle_validation(xbrl_path, taxonomy_entry_point)
+        validation_result.update(arelle_result)
+        
+        # STEP 4: Cache results for future use
+        if validation_result.get('status') == 'completed':
+            self._cache_result(cache_key, validation_result)
+        
+        return validation_result
+    
     def _process_taxonomy(self, taxonomy_path: str) -> Dict[str, Any]:
         """
         Process taxonomy file - extract ZIP if needed, validate structure
@@ -161,14 +581,19 @@ class ArelleRunner:
                 result['is_zip'] = True
                 logger.info("📂 Extracting taxonomy ZIP file...")
                 
-                # Create extraction directory
-                extraction_dir = os.path.join(self.taxonomy_cache_dir, 
-                                            f"taxonomy_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
-                os.makedirs(extraction_dir, exist_ok=True)
+                # Content-addressed extraction directory, reused across validations
+                extraction_dir = os.path.join(self.taxonomy_cache_dir,
+                                              f"taxonomy_{self._zip_content_key(taxonomy_path)}")
+                sentinel = os.path.join(extraction_dir, EXTRACTION_SENTINEL)
                 
-                # Extract ZIP
-                with zipfile.ZipFile(taxonomy_path, 'r') as zip_ref:
-                    zip_ref.extractall(extraction_dir)
+                if os.path.exists(sentinel):
+                    logger.info(f"💾 Reusing extracted taxonomy: {os.path.basename(extraction_dir)}")
+                else:
+                    os.makedirs(extraction_dir, exist_ok=True)
+                    with zipfile.ZipFile(taxonomy_path, 'r') as zip_ref:
+                        extracted = self._extract_zip_entries(zip_ref, extraction_dir)
+                    open(sentinel, 'w').close()
+                    logger.info(f"📂 Extracted {extracted} new files to {os.path.basename(extraction_dir)}")
                 
                 result['extraction_path'] = extraction_dir
                 
@@ -186,6 +611,9 @@ class ArelleRunner:
             else:
                 # Direct taxonomy file
                 if os.path.exists(taxonomy_path):
+                    if os.path.isdir(taxonomy_path):
+                        # Extracted elsewhere, so permissions are not guaranteed
+                        self._ensure_directory_permissions(taxonomy_path)
                     result['entry_point'] = taxonomy_path
                     result['success'] = True
                 else:
@@ -199,46 +627,142 @@ class ArelleRunner:
                 'error': f"Taxonomy processing failed: {str(e)}"
             }
     
+    def _zip_content_key(self, zip_path: str) -> str:
+        """Hash the ZIP contents in 1 MiB blocks to key its extraction directory"""
+        import hashlib
+        
+        digest = hashlib.sha1()
+        with open(zip_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()[:16]
+    
+    def _extract_zip_entries(self, zip_ref: zipfile.ZipFile, extraction_dir: str) -> int:
+        """
+        Stream ZIP entries to disk, skipping files that are already extracted
+        
+        Returns:
+            Number of files written
+        """
+        
+        root = os.path.realpath(extraction_dir)
+        extracted = 0
+        
+        for info in zip_ref.infolist():
+            dest = os.path.realpath(os.path.join(root, info.filename))
+            if not dest.startswith(root + os.sep):
+                logger.warning(f"⚠️ Skipping unsafe ZIP entry: {info.filename}")
+                continue
+            
+            if info.is_dir():
+                os.makedirs(dest, exist_ok=True)
+                continue
+            
+            if os.path.exists(dest) and os.path.getsize(dest) == info.file_size:
+                continue
+            
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            with zip_ref.open(info) as src, open(dest, 'wb') as dst:
+                shutil.copyfileobj(src, dst, length=1 << 20)
+            extracted += 1
+        
+        return extracted
+    
     def _find_taxonomy_entry_point(self, taxonomy_dir: str) -> Optional[str]:
         """
         Find the correct EBA FINREP entry point for the XBRL instance
         PRIORITY: Look for FINREP GAAP specific entry points first
         """
         
-        import glob
-        
-        # Ensure directory has proper permissions
-        self._ensure_directory_permissions(taxonomy_dir)
-        
-        # PRIORITY 1: Look for FINREP GAAP specific entry points first
-        finrep_patterns = [
-            '**/finrep*gaap*.xsd',          # FINREP GAAP specific schemas (HIGHEST PRIORITY)
-            '**/finrep*.xsd',               # Any FINREP schemas
-            '**/met.xsd',                   # Metadata entry points
-            '**/dim.xsd',                   # Dimension entry points
-            '**/eba_met.xsd'                # EBA metadata schema
-        ]
+        # Classify every schema in a single directory walk:
+        #   0: finrep*gaap*.xsd (FINREP GAAP specific, HIGHEST PRIORITY)
+        #   1: finrep*.xsd
+        #   2-4: met.xsd, dim.xsd, eba_met.xsd
+        #   5: fallback - any XSD with 'eba' or 'finrep' in its path
+        fallback_priority = len(ENTRY_POINT_SCHEMAS) + 2
+        best_priority = fallback_priority + 1
+        best_path = None
         
-        for pattern in finrep_patterns:
-            matches = glob.glob(os.path.join(taxonomy_dir, pattern), recursive=True)
-            if matches:
-                logger.info(f"📁 Found EBA FINREP entry point: {os.path.basename(matches[0])}")
-                return matches[0]
+        for root, dirs, files in os.walk(taxonomy_dir):
+            for fname in files:
+                name = fname.lower()
+                if not name.endswith('.xsd'):
+                    continue
+                
+                if name.startswith('finrep'):
+                    priority = 0 if 'gaap' in name[6:] else 1
+                elif name in ENTRY_POINT_SCHEMAS:
+                    priority = ENTRY_POINT_SCHEMAS.index(name) + 2
+                else:
+                    # Relative to the taxonomy directory, whose hashed name may itself contain 'eba'
+                    path_lower = os.path.relpath(os.path.join(root, fname), taxonomy_dir).lower()
+                    if 'eba' not in path_lower and 'finrep' not in path_lower:
+                        continue
+                    priority = fallback_priority
+                
+                if priority < best_priority:
+                    best_priority = priority
+                    best_path = os.path.join(root, fname)
+                    if priority == 0:
+                        break
+            if best_priority == 0:
+                break
         
-        # PRIORITY 2: Fallback - try to find any EBA-related XSD
-        logger.info("🔍 Searching for fallback EBA schemas...")
-        all_xsd = glob.glob(os.path.join(taxonomy_dir, '**/*.xsd'), recursive=True)
-        eba_xsd = [f for f in all_xsd if 'eba' in f.lower() or 'finrep' in f.lower()]
+        if best_path and best_priority < fallback_priority:
+            logger.info(f"📁 Found EBA FINREP entry point: {os.path.basename(best_path)}")
+            return best_path
         
-        if eba_xsd:
-            logger.info(f"📁 Found fallback EBA schema: {os.path.basename(eba_xsd[0])}")
-            return eba_xsd[0]
+        if best_path:
+            logger.info(f"📁 Found fallback EBA schema: {os.path.basename(best_path)}")
+            return best_path
         
-        # PRIORITY 3: Last resort - use taxonomy directory itself
+        # Last resort - use taxonomy directory itself
         logger.warning(f"⚠️ Using taxonomy directory as entry point: {taxonomy_dir}")
         return taxonomy_dir
     
     def _execute_arelle_validation(self, xbrl_path: str, taxonomy_entry_point: str) -> Dict[str, Any]:
+        """Execute Arelle validation, in-process when possible, else via the command line"""
+        
+        controller = get_arelle_controller(self.xbrl_cache_dir)
+        if controller is not None:
+            return self._execute_in_process_validation(controller, xbrl_path, taxonomy_entry_point)
+        
+        return self._execute_command_line_validation(xbrl_path, taxonomy_entry_point)
+    
+    def _execute_in_process_validation(self, controller: ArelleController, xbrl_path: str,
+                                       taxonomy_entry_point: str) -> Dict[str, Any]:
+        """Validate with the shared in-process Arelle controller"""
+        
+        try:
+            output = controller.validate(xbrl_path, taxonomy_entry_point)
+            return_code = output['return_code']
+            
+            parsed_output = self._parse_arelle_output(output['lines'])
+            self._apply_return_code(parsed_output, return_code)
+            
+            arelle_result = {
+                'status': 'completed',
+                'return_code': return_code,
+                'execution_time': datetime.now().isoformat(),
+                'validation_successful': return_code == 0,
+                'execution_mode': 'in_process',
+                **parsed_output
+            }
+            
+            logger.info(f"✅ Arelle completed in-process - Return code: {return_code}, "
+                       f"Errors: {len(arelle_result.get('errors', []))}, "
+                       f"Warnings: {len(arelle_result.get('warnings', []))}")
+            
+            return arelle_result
+            
+        except Exception as e:
+            logger.error(f"❌ Arelle execution failed: {e}")
+            return {
+                'status': 'error',
+                'error': str(e)
+            }
+    
+    def _execute_command_line_validation(self, xbrl_path: str, taxonomy_entry_point: str) -> Dict[str, Any]:
         """Execute the actual Arelle validation command with FIXED parameter syntax"""
         
         try:
@@ -265,46 +789,52 @@ class ArelleRunner:
                 '--logFormat', '[%(levelname)s] %(message)s'
             ]
             
-            # DEBUG: Verifieer dat 'online' echt in command staat
-            cmd_str = ' '.join(cmd)
-            if 'offline' in cmd_str:
-                logger.error("❌ STILL USING OFFLINE MODE!")
-            if 'online' in cmd_str:
-                logger.info("✅ Using online mode correctly")
+            logger.info("🔧 Arelle command: %s", cmd)
             
-            # ENHANCED CONNECTIVITY - Allow online access for EBA schemas
-            # This enables downloading missing schemas from EBA website
-            logger.info("🌐 Enhanced Arelle command - allowing online schema downloads for EBA")
+            # Execute and parse output line by line as it is produced
+            # XDG_CONFIG_HOME makes Arelle use the runner's pre-warmed web cache
+            env = dict(os.environ, XDG_CONFIG_HOME=self.cache_dir)
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    text=True, errors='replace', bufsize=1, env=env)
+            timed_out = threading.Event()
             
-            logger.info("🌐 Enhanced Arelle command - allowing online schema downloads")
+            def _kill_on_timeout():
+                timed_out.set()
+                proc.kill()
             
-            logger.info(f"🔧 Arelle command: {' '.join(cmd)}")
+            timer = threading.Timer(ARELLE_TIMEOUT, _kill_on_timeout)
+            timer.start()
+            try:
+                with proc.stdout:
+                    parsed_output = self._parse_arelle_output(proc.stdout)
+                return_code = proc.wait()
+            finally:
+                timer.cancel()
             
-            # Execute with timeout
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+            if timed_out.is_set():
+                raise subprocess.TimeoutExpired(cmd, ARELLE_TIMEOUT)
             
-            # Parse Arelle output
-            parsed_output = self._parse_arelle_output(result.stdout, result.stderr, result.returncode)
+            self._apply_return_code(parsed_output, return_code)
             
             arelle_result = {
                 'status': 'completed',
-                'return_code': result.returncode,
+                'return_code': return_code,
                 'execution_time': datetime.now().isoformat(),
-                'validation_successful': result.returncode == 0,
+                'validation_successful': return_code == 0,
                 **parsed_output
             }
             
-            logger.info(f"✅ Arelle completed - Return code: {result.returncode}, "
+            logger.info(f"✅ Arelle completed - Return code: {return_code}, "
                        f"Errors: {len(arelle_result.get('errors', []))}, "
                        f"Warnings: {len(arelle_result.get('warnings', []))}")
             
             return arelle_result
             
         except subprocess.TimeoutExpired:
-            logger.error("❌ Arelle validation timed out after 120 seconds")
+            logger.error(f"❌ Arelle validation timed out after {ARELLE_TIMEOUT} seconds")
             return {
                 'status': 'timeout',
-                'error': 'Arelle validation timed out after 120 seconds'
+                'error': f'Arelle validation timed out after {ARELLE_TIMEOUT} seconds'
             }
         except Exception as e:
             logger.error(f"❌ Arelle execution failed: {e}")
@@ -313,29 +843,40 @@ class ArelleRunner:
                 'error': str(e)
             }
     
-    def _parse_arelle_output(self, stdout: str, stderr: str, return_code: int) -> Dict[str, Any]:
+    def _parse_arelle_output(self, lines: Iterable[str]) -> Dict[str, Any]:
         """
         Enhanced Arelle output parser to extract EBA FINREP business rule results
         
+        Lines are consumed incrementally, so a live process pipe can be passed
+        in directly. Repeated errors and warnings are reported once in
+        'errors'/'warnings' with an occurrence count. The return code dependent
+        summary fields are filled in afterwards by _apply_return_code.
+        
+        raw_output no longer mirrors the process streams:
+            stdout: the last RAW_OUTPUT_TAIL_LINES non error/warning lines
+            stderr: every error/warning line in order, repeats included
+        
         Returns:
             Structured validation results with errors, warnings, and business rule insights
         """
         
-        combined_output = stdout + stderr
-        lines = combined_output.split('\n')
+        output_tail = deque(maxlen=RAW_OUTPUT_TAIL_LINES)
+        diagnostic_lines = []
         
-        errors = []
-        warnings = []
+        # Repeated messages are categorized once and counted
+        errors = {}
+        warnings = {}
+        total_errors = 0
+        total_warnings = 0
         info_messages = []
         business_rules_processed = 0
         
         # Enhanced categories for EBA FINREP business rules
         error_categories = {}
         warning_categories = {}
-        business_rule_patterns = [
-            'eba_v', 'eba_validation', 'business rule', 'finrep', 'corep', 
-            'calculation', 'formula', 'constraint', 'consistency'
-        ]
+        
+        # Resolve the log level once rather than per line
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
         
         for line in lines:
             line = line.strip()
@@ -343,49 +884,66 @@ class ArelleRunner:
                 continue
             
             # ENHANCED: Detect business rule processing
-            if any(pattern in line.lower() for pattern in business_rule_patterns):
+            if _BUSINESS_RULE_LINE_RE.search(line):
                 business_rules_processed += 1
-                logger.debug(f"🔍 Business rule detected: {line[:100]}...")
+                if debug_enabled:
+                    logger.debug(f"🔍 Business rule detected: {line[:100]}...")
             
             # Parse different message types with enhanced patterns
-            if any(keyword in line.upper() for keyword in ['[ERROR]', 'ERROR:', 'EXCEPTION', 'FATAL']):
-                error_info = self._categorize_arelle_message(line, 'error')
-                errors.append(error_info)
-                
-                category = error_info.get('category', 'general')
-                error_categories[category] = error_categories.get(category, 0) + 1
+            line_class = _classify_line(line)
+            
+            if line_class == 'error' or line_class == 'warning':
+                if line_class == 'error':
+                    seen, categories = errors, error_categories
+                    total_errors += 1
+                else:
+                    seen, categories = warnings, warning_categories
+                    total_warnings += 1
                 
-            elif any(keyword in line.upper() for keyword in ['[WARNING]', 'WARNING:', 'INCONSISTENCY']):
-                warning_info = self._categorize_arelle_message(line, 'warning')
-                warnings.append(warning_info)
+                fingerprint = _MESSAGE_PREFIX_RE.sub('', line, count=1)
+                message_info = seen.get(fingerprint)
+                if message_info is None:
+                    message_info = self._categorize_arelle_message(line, line_class)
+                    message_info['count'] = 1
+                    seen[fingerprint] = message_info
+                else:
+                    message_info['count'] += 1
+                # Kept verbatim: consumers re-parse raw_output and count repeats themselves
+                diagnostic_lines.append(line)
                 
-                category = warning_info.get('category', 'general')
-                warning_categories[category] = warning_categories.get(category, 0) + 1
+                category = message_info.get('category', 'general')
+                categories[category] = categories.get(category, 0) + 1
                 
-            elif any(keyword in line.upper() for keyword in ['[INFO]', 'INFO:', 'VALIDATION']):
+            elif line_class == 'info':
                 info_messages.append(line)
+                output_tail.append(line)
                 # Extract business rule information from INFO messages
-                if any(pattern in line.lower() for pattern in ['rule', 'validation', 'check']):
+                if debug_enabled and _VALIDATION_INFO_RE.search(line):
                     logger.debug(f"📋 Validation info: {line}")
+                
+            else:
+                output_tail.append(line)
+        
+        errors = list(errors.values())
+        warnings = list(warnings.values())
         
         # Enhanced summary with business rule detection
         summary = {
-            'total_errors': len(errors),
-            'total_warnings': len(warnings),
+            'total_errors': total_errors,
+            'total_warnings': total_warnings,
+            'unique_errors': len(errors),
+            'unique_warnings': len(warnings),
             'business_rules_detected': business_rules_processed,
             'error_categories': error_categories,
-            'warning_categories': warning_categories,
-            'validation_passed': return_code == 0 and len(errors) == 0,
-            'return_code': return_code
+            'warning_categories': warning_categories
         }
         
         # Log enhanced results for debugging
         logger.info(f"📊 Enhanced Arelle parsing results:")
-        logger.info(f"   🔴 Errors: {len(errors)}")
-        logger.info(f"   🟡 Warnings: {len(warnings)}")
+        logger.info(f"   🔴 Errors: {total_errors} ({len(errors)} unique)")
+        logger.info(f"   🟡 Warnings: {total_warnings} ({len(warnings)} unique)")
         logger.info(f"   📋 Business rules detected: {business_rules_processed}")
         logger.info(f"   📄 Info messages: {len(info_messages)}")
-        logger.info(f"   🎯 Return code: {return_code}")
         
         return {
             'errors': errors,
@@ -393,12 +951,20 @@ class ArelleRunner:
             'info_messages': info_messages,
             'summary': summary,
             'business_rules_processed': business_rules_processed,
+            # Split by line class rather than by stream; see the docstring
             'raw_output': {
-                'stdout': stdout,
-                'stderr': stderr
+                'stdout': '\n'.join(output_tail),
+                'stderr': '\n'.join(diagnostic_lines)
             }
         }
     
+    def _apply_return_code(self, parsed_output: Dict[str, Any], return_code: int) -> None:
+        """Complete the parsed summary once the Arelle return code is known"""
+        summary = parsed_output['summary']
+        summary['validation_passed'] = return_code == 0 and not parsed_output['errors']
+        summary['return_code'] = return_code
+        logger.info(f"   🎯 Return code: {return_code}")
+    
     def _categorize_arelle_message(self, message: str, message_type: str) -> Dict[str, Any]:
         """Enhanced categorization for EBA FINREP business rule messages"""
         
@@ -409,58 +975,39 @@ class ArelleRunner:
             'is_business_rule': False
         }
         
-        # Enhanced categories for EBA FINREP business rules
-        categories = {
-            'business_rule': ['eba_v', 'finrep', 'corep', 'business rule', 'constraint', 'consistency'],
-            'calculation': ['calculation', 'summation', 'numeric', 'arithmetic', 'balance'],
-            'formula': ['formula', 'expression', 'assertion'],
-            'schema': ['schema', 'xsd', 'element', 'type', 'definition'],
-            'instance': ['instance', 'fact', 'context', 'unit', 'entity'],
-            'dimension': ['dimension', 'domain', 'member', 'axis', 'hierarchy'],
-            'linkbase': ['linkbase', 'link', 'arc', 'label', 'reference'],
-            'namespace': ['namespace', 'prefix', 'uri', 'import'],
-            'validation': ['validation', 'rule', 'check', 'verify']
-        }
-        
         message_lower = message.lower()
         
         # Enhanced business rule detection
-        business_rule_indicators = [
-            'eba_v', 'finrep', 'corep', 'business rule', 'constraint violation',
-            'consistency check', 'validation rule', 'regulatory rule'
-        ]
-        
-        if any(indicator in message_lower for indicator in business_rule_indicators):
+        if _BUSINESS_RULE_INDICATORS_RE.search(message_lower):
             message_info['is_business_rule'] = True
             message_info['category'] = 'business_rule'
         else:
             # Standard categorization
-            for category, keywords in categories.items():
-                if any(keyword in message_lower for keyword in keywords):
+            for category, keywords_re in _MESSAGE_CATEGORIES:
+                if keywords_re.search(message_lower):
                     message_info['category'] = category
                     break
         
         # Extract specific details with enhanced patterns
-        import re
         
         # Line number extraction
-        line_match = re.search(r'line\s+(\d+)', message_lower)
+        line_match = _LINE_RE.search(message_lower)
         if line_match:
             message_info['line_number'] = int(line_match.group(1))
         
         # Extract fact/concept name if present
-        fact_match = re.search(r'fact\s+([a-zA-Z_:][a-zA-Z0-9_:]*)', message_lower)
+        fact_match = _FACT_RE.search(message_lower)
         if fact_match:
             message_info['fact_name'] = fact_match.group(1)
         
         # Extract rule code if present (e.g., eba_v1234_c)
-        rule_match = re.search(r'(eba_v\d+_[a-z])', message_lower)
+        rule_match = _RULE_RE.search(message_lower)
         if rule_match:
             message_info['rule_code'] = rule_match.group(1)
             message_info['is_business_rule'] = True
         
         # Extract element names
-        element_match = re.search(r'element\s+([a-zA-Z_:][a-zA-Z0-9_:]*)', message_lower)
+        element_match = _ELEMENT_RE.search(message_lower)
         if element_match:
             message_info['element_name'] = element_match.group(1)
         
@@ -468,22 +1015,18 @@ class ArelleRunner:
     
     def _generate_cache_key(self, xbrl_path: str, taxonomy_path: str) -> str:
         """Generate a cache key for validation results"""
-        import hashlib
-        
         # Use file paths and modification times for cache key
-        xbrl_mtime = os.path.getmtime(xbrl_path) if os.path.exists(xbrl_path) else 0
-        taxonomy_mtime = os.path.getmtime(taxonomy_path) if os.path.exists(taxonomy_path) else 0
-        
-        cache_input = f"{xbrl_path}_{xbrl_mtime}_{taxonomy_path}_{taxonomy_mtime}"
-        return hashlib.md5(cache_input.encode()).hexdigest()
+        return _result_cache_key(xbrl_path, _file_mtime(xbrl_path),
+                                 taxonomy_path, _file_mtime(taxonomy_path))
     
     def _get_cached_result(self, cache_key: str) -> Optional[Dict[str, Any]]:
         """Retrieve cached validation result if available"""
         try:
             cache_file = os.path.join(self.result_cache_dir, f"{cache_key}.json")
             if os.path.exists(cache_file):
-                with open(cache_file, 'r') as f:
-                    return json.load(f)
+                with open(cache_file, 'rb') as f:
+                    data = f.read()
+                return orjson.loads(data) if orjson else json.loads(data)
         except Exception as e:
             logger.warning(f"Failed to read cache: {e}")
         return None
@@ -498,8 +1041,13 @@ class ArelleRunner:
             if 'raw_output' in cached_result:
                 del cached_result['raw_output']
             
-            with open(cache_file, 'w') as f:
-                json.dump(cached_result, f, indent=2)
+            if orjson:
+                data = orjson.dumps(cached_result, option=orjson.OPT_NON_STR_KEYS)
+            else:
+                data = json.dumps(cached_result, separators=(',', ':')).encode()
+            
+            with open(cache_file, 'wb') as f:
+                f.write(data)
                 
             logger.info(f"💾 Cached Arelle result: {cache_key}")
         except Exception as e:
@@ -508,37 +1056,61 @@ class ArelleRunner:
     def get_cache_info(self) -> Dict[str, Any]:
         """Get information about Arelle cache"""
         try:
-            cache_files = os.listdir(self.result_cache_dir) if os.path.exists(self.result_cache_dir) else []
-            taxonomy_dirs = os.listdir(self.taxonomy_cache_dir) if os.path.exists(self.taxonomy_cache_dir) else []
+            cached_results = 0
+            if os.path.exists(self.result_cache_dir):
+                with os.scandir(self.result_cache_dir) as entries:
+                    cached_results = sum(1 for entry in entries
+                                         if entry.name.endswith('.json') and entry.is_file(follow_symlinks=False))
+            
+            cached_taxonomies = 0
+            if os.path.exists(self.taxonomy_cache_dir):
+                with os.scandir(self.taxonomy_cache_dir) as entries:
+                    cached_taxonomies = sum(1 for _ in entries)
             
             return {
                 'cache_directory': self.cache_dir,
-                'cached_results': len([f for f in cache_files if f.endswith('.json')]),
-                'cached_taxonomies': len(taxonomy_dirs),
+                'cached_results': cached_results,
+                'cached_taxonomies': cached_taxonomies,
                 'arelle_available': self.arelle_available
             }
         except Exception as e:
             return {'error': str(e)}
     
     def _ensure_directory_permissions(self, directory_path: str) -> bool:
-        """Ensure directory has proper read/write permissions"""
+        """Ensure directory has proper read/write permissions (once per directory and mtime)"""
+        import hashlib
+        
         try:
-            if os.path.exists(directory_path):
-                os.chmod(directory_path, 0o755)  # Read/write/execute permissions
-                logger.info(f"✅ Fixed permissions for: {directory_path}")
-                
-                # Also fix permissions for all files in the directory
-                for root, dirs, files in os.walk(directory_path):
-                    for d in dirs:
-                        try:
-                            os.chmod(os.path.join(root, d), 0o755)
-                        except Exception:
-                            pass  # Ignore permission errors on individual files
-                    for f in files:
-                        try:
-                            os.chmod(os.path.join(root, f), 0o644)
-                        except Exception:
-                            pass  # Ignore permission errors on individual files
+            if not os.path.exists(directory_path):
+                return True
+            
+            # The marker lives in our own cache; caller directories are never written to
+            marker_key = f"{os.path.realpath(directory_path)}_{os.path.getmtime(directory_path)}"
+            sentinel = os.path.join(
+                self.permissions_cache_dir,
+                hashlib.blake2b(marker_key.encode(), digest_size=16).hexdigest()
+            )
+            if os.path.exists(sentinel):
+                return True
+            
+            os.chmod(directory_path, 0o755)  # Read/write/execute permissions
+            logger.info(f"✅ Fixed permissions for: {directory_path}")
+            
+            # Also fix permissions for all files in the directory
+            for root, dirs, files in os.walk(directory_path):
+                for d in dirs:
+                    try:
+                        os.chmod(os.path.join(root, d), 0o755)
+                    except Exception:
+                        pass  # Ignore permission errors on individual files
+                for f in files:
+                    try:
+                        os.chmod(os.path.join(root, f), 0o644)
+                    except Exception:
+                        pass  # Ignore permission errors on individual files
+            
+            os.makedirs(self.permissions_cache_dir, exist_ok=True)
+            open(sentinel, 'w').close()
             return True
         except Exception as e:
             logger.error(f"❌ Could not fix permissions for {directory_path}: {e}")
@@ -548,7 +1120,12 @@ class ArelleRunner:
         """Clear Arelle cache"""
         try:
             if os.path.exists(self.cache_dir):
-                shutil.rmtree(self.cache_dir)
+                # Permissions are only fixed for entries that fail to delete
+                if sys.version_info >= (3, 12):
+                    shutil.rmtree(self.cache_dir, onexc=_chmod_and_retry)
+                else:
+                    shutil.rmtree(self.cache_dir, onerror=_chmod_and_retry)
+                os.makedirs(self.xbrl_cache_dir, exist_ok=True)
                 os.makedirs(self.taxonomy_cache_dir, exist_ok=True)
                 os.makedirs(self.result_cache_dir, exist_ok=True)
             
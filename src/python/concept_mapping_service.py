@@ -1,9 +1,85 @@
 
 import logging
+import mmap
+import os
+import re
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
 from dmp_concept_resolver import concept_resolver
 
+try:
+    import re2  # google-re2: linear-time DFA matching with no backtracking
+except ImportError:  # re2 is optional; fall back to the standard library
+    re2 = None
+
 logger = logging.getLogger(__name__)
 
+# EBA concept patterns for files that are not well-formed XML, fused into one
+# alternation so the content is scanned once:
+# group 1 matches prefixed eba_met/find names, group 2 element QNames
+# Bytes pattern so the file can be scanned through mmap without decoding it
+_EBA_CONCEPT_PATTERN = (
+    rb'(?i)\b((?:eba_met[^:\s]*|find):[A-Za-z][A-Za-z0-9_]*)\b'
+    rb'|<([^>\s]+:[A-Za-z][A-Za-z0-9_]+)[>\s]'
+)
+
+def _compile_concept_pattern(pattern):
+    """Compile with re2 when installed, otherwise with the standard library"""
+    if re2 is not None:
+        try:
+            return re2.compile(pattern)
+        except Exception as e:
+            logger.warning(f"⚠️ re2 could not compile concept pattern ({e}), using re")
+    return re.compile(pattern)
+
+_EBA_CONCEPT_RE = _compile_concept_pattern(_EBA_CONCEPT_PATTERN)
+
+# Prefixed names outside element tags of well-formed instances: attribute
+# values that are a QName with a declared prefix (dimension="eba_dim:BAS"),
+# and eba_met/find names in attribute names, attribute values or text, as
+# the raw text scan finds them
+_QNAME_VALUE_RE = re.compile(r'([A-Za-z_][\w.-]*):[A-Za-z][A-Za-z0-9_]*')
+_EBA_NAME_RE = re.compile(r'(?i)\b((?:eba_met[^:\s]*|find):[A-Za-z][A-Za-z0-9_]*)\b')
+
+def _scan_concepts(pattern, content):
+    """Collect the concept names matched by one concept pattern scan"""
+    concepts = set()
+    for match in pattern.finditer(content):
+        concept = (match.group(1) or match.group(2)).decode('utf-8', 'replace')
+        if ':' in concept and len(concept) > 5:
+            concepts.add(sys.intern(concept))
+    return concepts
+
+# Generated XSD pieces, formatted per element and written around the element list
+_XSD_ELEMENT_TEMPLATE = '''
+    <xs:element name="{local_name}" type="xbrli:monetaryItemType" substitutionGroup="xbrli:item" 
+                id="{concept_name}" nillable="true">
+        <xs:annotation>
+            <xs:documentation xml:lang="en">
+                {label} (Generated from DMP 4.0 Database)
+            </xs:documentation>
+        </xs:annotation>
+    </xs:element>'''
+
+_XSD_SCHEMA_HEADER = '''<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+           xmlns:xbrli="http://www.xbrl.org/2003/instance"
+           xmlns:eba_met="http://www.eba.europa.eu/xbrl/crr/dict/met"
+           xmlns:find="http://www.eurofiling.info/xbrl/ext/filing-indicators"
+           targetNamespace="http://www.eba.europa.eu/xbrl/crr/dict/met"
+           elementFormDefault="qualified">
+           
+    <xs:import namespace="http://www.xbrl.org/2003/instance" 
+               schemaLocation="http://www.xbrl.org/2003/xbrl-instance-2003-12-31.xsd"/>
+    
+    <!-- Generated elements from DMP 4.0 Database -->
+    '''
+
+_XSD_SCHEMA_FOOTER = '''
+    
+</xs:schema>'''
+
 class ConceptMappingService:
     def __init__(self):
         self.concept_resolver = concept_resolver
@@ -20,31 +96,36 @@ class ConceptMappingService:
             xbrl_concepts = self._extract_concepts_from_xbrl(xbrl_file_path)
             logger.info(f"📄 Extracted {len(xbrl_concepts)} concepts from XBRL")
             
-            # Map concepts to DMP database
-            mapping_results = {
-                'resolved': {},
-                'unresolved': [],
-                'taxonomy_missing': [],
-                'dmp_available': []
-            }
+            # Resolve every concept not seen before in one batched DMP lookup
+            pending = [concept for concept in xbrl_concepts if concept not in self.mapping_cache]
+            if pending:
+                self.mapping_cache.update(self.concept_resolver.batch_resolve_concepts(pending))
             
+            resolved = {}
             for concept in xbrl_concepts:
-                # Check if concept exists in taxonomy (if provided)
-                in_taxonomy = taxonomy_concepts and concept in taxonomy_concepts
-                
-                # Try to resolve in DMP database
-                dmp_concept = self.concept_resolver.resolve_concept_from_dmp(concept)
-                
+                dmp_concept = self._resolve(concept)
                 if dmp_concept:
-                    mapping_results['resolved'][concept] = dmp_concept
-                    if not in_taxonomy:
-                        mapping_results['dmp_available'].append(concept)
-                        logger.info(f"🎯 DMP AVAILABLE: {concept} -> {dmp_concept['ConceptCode']}")
-                else:
-                    mapping_results['unresolved'].append(concept)
-                    if not in_taxonomy:
-                        mapping_results['taxonomy_missing'].append(concept)
-                        logger.warning(f"❌ MISSING EVERYWHERE: {concept}")
+                    resolved[concept] = dmp_concept
+            
+            # Categorize with set operations instead of per-concept membership checks
+            xbrl_set = set(xbrl_concepts)
+            taxonomy_set = frozenset(sys.intern(concept) for concept in taxonomy_concepts or ())
+            resolved_set = resolved.keys()
+            unresolved_set = xbrl_set - resolved_set
+            
+            mapping_results = {
+                'resolved': resolved,
+                'unresolved': list(unresolved_set),
+                'taxonomy_missing': list(unresolved_set - taxonomy_set),
+                'dmp_available': list(resolved_set - taxonomy_set)
+            }
+            
+            # Per-concept lines are debug only; the summary below stays at info
+            if logger.isEnabledFor(logging.DEBUG):
+                for concept in mapping_results['dmp_available']:
+                    logger.debug("🎯 DMP AVAILABLE: %s -> %s", concept, resolved[concept]['ConceptCode'])
+                for concept in mapping_results['taxonomy_missing']:
+                    logger.debug("❌ MISSING EVERYWHERE: %s", concept)
             
             logger.info(f"🎯 Pre-validation mapping results:")
             logger.info(f"   ✅ Resolved in DMP: {len(mapping_results['resolved'])}")
@@ -58,50 +139,130 @@ class ConceptMappingService:
             logger.error(f"❌ Pre-validation concept mapping failed: {str(e)}")
             return {'resolved': {}, 'unresolved': [], 'taxonomy_missing': [], 'dmp_available': []}
     
+    def _resolve(self, concept):
+        """Resolve a concept through the DMP resolver, remembering misses as well as hits"""
+        if concept in self.mapping_cache:
+            return self.mapping_cache[concept]
+        
+        dmp_concept = self.concept_resolver.resolve_concept_from_dmp(concept)
+        self.mapping_cache[concept] = dmp_concept
+        return dmp_concept
+    
     def _extract_concepts_from_xbrl(self, xbrl_file_path):
         """Extract EBA concepts from XBRL instance file"""
-        concepts = set()
+        try:
+            return list(self._extract_concepts_streaming(xbrl_file_path))
+        except ET.ParseError as e:
+            # Not well-formed XML: fall back to scanning the raw text
+            logger.warning(f"⚠️ XML parsing failed ({e}), falling back to regex concept extraction")
+        except Exception as e:
+            logger.error(f"❌ Failed to extract concepts from XBRL: {str(e)}")
+            return []
         
         try:
-            with open(xbrl_file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Look for EBA concept patterns
-            import re
-            patterns = [
-                r'\b(eba_met[^:\s]*:[A-Za-z][A-Za-z0-9_]*)\b',
-                r'\b(find:[A-Za-z][A-Za-z0-9_]*)\b',
-                r'<([^>\s]+:[A-Za-z][A-Za-z0-9_]+)[>\s]'
-            ]
-            
-            for pattern in patterns:
-                matches = re.findall(pattern, content, re.IGNORECASE)
-                for match in matches:
-                    if isinstance(match, tuple):
-                        match = match[0] if match[0] else match[1]
-                    if ':' in match and len(match) > 5:
-                        concepts.add(match)
-            
-            return list(concepts)
-            
+            return list(self._extract_concepts_regex(xbrl_file_path))
         except Exception as e:
             logger.error(f"❌ Failed to extract concepts from XBRL: {str(e)}")
             return []
     
-    def generate_missing_schema_elements(self, dmp_available_concepts):
-        """Generate XSD schema elements for concepts available in DMP but missing from taxonomy"""
+    def _extract_concepts_streaming(self, xbrl_file_path):
+        """Collect prefixed QNames from element tags, attribute values and text in one streaming parse"""
+        concepts = set()
+        uri_prefixes = {}
+        declared_prefixes = set()
+        seen_tags = set()
+        root = None
+        depth = 0
+        
+        def add_concept(concept):
+            if len(concept) > 5:
+                # Interned so later set/dict probes compare by identity
+                concepts.add(sys.intern(concept))
+        
+        def add_text_concepts(text):
+            for name in _EBA_NAME_RE.findall(text):
+                add_concept(name)
+        
+        for event, item in ET.iterparse(xbrl_file_path, events=('start-ns', 'start', 'end')):
+            if event == 'start':
+                depth += 1
+                if root is None:
+                    root = item
+                
+                tag = item.tag
+                if tag in seen_tags:
+                    continue
+                seen_tags.add(tag)
+                
+                if tag[0] == '{':
+                    uri, local_name = tag[1:].split('}', 1)
+                    prefix = uri_prefixes.get(uri)
+                    if prefix:
+                        add_concept(f"{prefix}:{local_name}")
+            
+            elif event == 'end':
+                depth -= 1
+                # Text is only complete at the end event
+                for key, value in item.attrib.items():
+                    if key[0] == '{':
+                        # Prefixed attribute names such as find:filed
+                        uri, local_name = key[1:].split('}', 1)
+                        prefix = uri_prefixes.get(uri)
+                        if prefix:
+                            add_text_concepts(f"{prefix}:{local_name}")
+                    if ':' in value:
+                        value = value.strip()
+                        match = _QNAME_VALUE_RE.fullmatch(value)
+                        if match and match.group(1) in declared_prefixes:
+                            add_concept(value)
+                        add_text_concepts(value)
+                if item.text and ':' in item.text:
+                    add_text_concepts(item.text)
+                if depth == 1:
+                    # Drop each finished top-level subtree
+                    root.clear()
+            
+            else:  # start-ns
+                prefix, uri = item
+                uri_prefixes.setdefault(uri, prefix)
+                if prefix:
+                    declared_prefixes.add(prefix)
+        
+        return concepts
+    
+    def _extract_concepts_regex(self, xbrl_file_path):
+        """Scan the raw file text for EBA concept patterns"""
+        with open(xbrl_file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return set()
+            
+            # Let the OS page the file in on demand instead of reading it into memory
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                # Look for EBA concept patterns
+                try:
+                    return _scan_concepts(_EBA_CONCEPT_RE, content)
+                except Exception as e:
+                    if isinstance(_EBA_CONCEPT_RE, re.Pattern):
+                        raise
+                    # re2 is a compiled extension; its failure must not empty the concept list
+                    logger.warning(f"⚠️ re2 concept scan failed ({e}), rescanning with re")
+                return _scan_concepts(re.compile(_EBA_CONCEPT_PATTERN), content)
+    
+    def generate_missing_schema_elements(self, dmp_available_concepts, resolved_map):
+        """
+        Generate XSD schema elements for concepts available in DMP but missing from taxonomy.
+        resolved_map is the 'resolved' mapping from pre_validate_concepts; nothing is looked up again.
+        """
         try:
             if not dmp_available_concepts:
                 return None
             
             logger.info(f"🔧 Generating schema elements for {len(dmp_available_concepts)} DMP concepts")
             
-            schema_elements = []
-            for concept_name in dmp_available_concepts:
-                dmp_concept = self.concept_resolver.resolve_concept_from_dmp(concept_name)
-                if dmp_concept:
-                    element = self._create_xsd_element(concept_name, dmp_concept)
-                    schema_elements.append(element)
+            schema_elements = [
+                self._create_xsd_element(concept_name, resolved_map[concept_name])
+                for concept_name in dmp_available_concepts
+            ]
             
             if schema_elements:
                 # Create temporary XSD file
@@ -119,40 +280,19 @@ class ConceptMappingService:
         """Create XSD element definition for DMP concept"""
         prefix, local_name = concept_name.split(':', 1) if ':' in concept_name else ('', concept_name)
         
-        element = f'''
-    <xs:element name="{local_name}" type="xbrli:monetaryItemType" substitutionGroup="xbrli:item" 
-                id="{concept_name}" nillable="true">
-        <xs:annotation>
-            <xs:documentation xml:lang="en">
-                {dmp_concept.get('ConceptLabel', local_name)} (Generated from DMP 4.0 Database)
-            </xs:documentation>
-        </xs:annotation>
-    </xs:element>'''
-        
-        return element
+        return _XSD_ELEMENT_TEMPLATE.format(
+            local_name=local_name,
+            concept_name=concept_name,
+            label=dmp_concept.get('ConceptLabel', local_name)
+        )
     
     def _create_temporary_schema(self, schema_elements):
         """Create temporary XSD schema file with generated elements"""
-        import tempfile
-        
-        schema_content = f'''<?xml version="1.0" encoding="UTF-8"?>
-<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
-           xmlns:xbrli="http://www.xbrl.org/2003/instance"
-           xmlns:eba_met="http://www.eba.europa.eu/xbrl/crr/dict/met"
-           xmlns:find="http://www.eurofiling.info/xbrl/ext/filing-indicators"
-           targetNamespace="http://www.eba.europa.eu/xbrl/crr/dict/met"
-           elementFormDefault="qualified">
-           
-    <xs:import namespace="http://www.xbrl.org/2003/instance" 
-               schemaLocation="http://www.xbrl.org/2003/xbrl-instance-2003-12-31.xsd"/>
-    
-    <!-- Generated elements from DMP 4.0 Database -->
-    {"".join(schema_elements)}
-    
-</xs:schema>'''
-        
-        temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.xsd', delete=False, encoding='utf-8')
-        temp_file.write(schema_content)
-        temp_file.close()
+        # Write the pieces straight to the file rather than assembling one big string
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.xsd', delete=False, encoding='utf-8',
+                                         buffering=1024 * 1024) as temp_file:
+            temp_file.write(_XSD_SCHEMA_HEADER)
+            temp_file.writelines(schema_elements)
+            temp_file.write(_XSD_SCHEMA_FOOTER)
         
         return temp_file.name
@@ -2,6 +2,12 @@
 import os
 import json
 import logging
+import functools
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -9,21 +15,40 @@ logging.basicConfig(level=logging.INFO)
 # Arelle CLI path
 ARELLE_PATH = r"C:\Users\berbe\Documents\AI\XBRL-validation\Arella\arella\Arelle\arelleCmdLine.exe"
 
-# Load validation rules
+# Optional tar archive of EBA/XBRL/W3C schemas in Arelle's URL cache layout,
+# unpacked once into the Arelle web cache so validation can run offline
+ARELLE_CACHE_BUNDLE = os.environ.get("ARELLE_CACHE_BUNDLE", "")
+
+def _load_json(path):
+    """Parse a JSON file from raw bytes, with orjson when it is installed"""
+    with open(path, "rb") as f:
+        data = f.read()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+# Load validation rules (parsed on first use, then cached)
+@functools.cache
 def load_finrep_rules():
     try:
-        with open("finrep_validation_rules.json", "r", encoding="utf-8") as f:
-            return {entry["rule_id"]: entry for entry in json.load(f)}
+        return {entry["rule_id"]: entry for entry in _load_json("finrep_validation_rules.json")}
     except Exception:
         return {}
 
-# Load cell mapping
+# Load cell mapping (parsed on first use, then cached)
+@functools.cache
 def load_cell_mapping():
     try:
-        with open("xbrl_cell_mappings.json", "r", encoding="utf-8") as f:
-            return json.load(f)
+        return _load_json("xbrl_cell_mappings.json")
     except Exception:
         return []
 
-FINREP_RULES = load_finrep_rules()
-CELL_MAPPING = load_cell_mapping()
+_LAZY_SETTINGS = {
+    "FINREP_RULES": load_finrep_rules,
+    "CELL_MAPPING": load_cell_mapping,
+}
+
+def __getattr__(name):
+    # Keep config.FINREP_RULES / config.CELL_MAPPING working without loading at import
+    loader = _LAZY_SETTINGS.get(name)
+    if loader is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return loader()
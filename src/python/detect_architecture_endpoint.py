@@ -6,13 +6,151 @@ Useful for debugging and testing architecture detection logic.
 """
 
 import os
+import time
+import hashlib
 import logging
-from flask import request, jsonify
+import functools
+import threading
+from collections import OrderedDict
+from flask import Response, request, jsonify
 from werkzeug.utils import secure_filename
-from hybrid_validation_engine import detect_architecture_version, ARCHITECTURES
+from hybrid_validation_engine import detect_architecture_version, extract_namespaces, ARCHITECTURES
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to Flask's jsonify
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+class OrjsonResponse(Response):
+    """JSON response whose body was serialized by orjson"""
+    default_mimetype = 'application/json'
+
+def _json_response(payload, status=200):
+    """Serialize a response payload with orjson when available"""
+    if orjson is not None:
+        return OrjsonResponse(orjson.dumps(payload), status=status)
+    return jsonify(payload), status
+
+# Copy buffer for saving uploads; large instance files are written in few syscalls
+UPLOAD_COPY_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Detection results keyed on (content digest, filename); detection also looks at the filename
+DETECTION_CACHE_SIZE = 256
+_detection_cache = OrderedDict()
+_detection_cache_lock = threading.Lock()
+
+# Seconds a database existence check stays valid
+PATH_PROBE_TTL = 30
+
+@functools.lru_cache(maxsize=64)
+def _exists_cached(path, time_bucket):
+    """os.path.exists memoized per time bucket; a new bucket forces a fresh stat"""
+    return os.path.exists(path)
+
+def _probe_bucket():
+    return int(time.monotonic() // PATH_PROBE_TTL)
+
+def _database_exists(path):
+    return _exists_cached(path, _probe_bucket())
+
+# Architecture listing minus the availability flag, which is filled in per probe bucket
+_STATIC_ARCHITECTURES = {
+    arch_key: {
+        'name': arch_config['name'],
+        'database_path': arch_config['dmp_db_path'],
+        'taxonomy_folder': arch_config['taxonomy_folder'],
+        'detection_namespaces': arch_config['namespaces']
+    }
+    for arch_key, arch_config in ARCHITECTURES.items()
+}
+
+# Static per-architecture fields of the /detect-architecture response
+_ARCH_DETAILS_TEMPLATE = {
+    arch_key: {
+        'name': arch_config['name'],
+        'expected_namespaces': arch_config['namespaces'],
+        'database_path': arch_config['dmp_db_path'],
+        'taxonomy_folder': arch_config['taxonomy_folder']
+    }
+    for arch_key, arch_config in ARCHITECTURES.items()
+}
+
+def _architecture_details(detected_version):
+    """Per-architecture details with the availability and selection flags filled in"""
+    return {
+        arch_key: {
+            **template,
+            'database_exists': _database_exists(template['database_path']),
+            'selected': arch_key == detected_version
+        }
+        for arch_key, template in _ARCH_DETAILS_TEMPLATE.items()
+    }
+
+@functools.lru_cache(maxsize=1)
+def _architectures_payload(time_bucket):
+    """/architectures response body, rebuilt once per probe bucket"""
+    supported = {}
+    for arch_key, static_info in _STATIC_ARCHITECTURES.items():
+        supported[arch_key] = {
+            'name': static_info['name'],
+            'database_path': static_info['database_path'],
+            'database_available': _exists_cached(static_info['database_path'], time_bucket),
+            'taxonomy_folder': static_info['taxonomy_folder'],
+            'detection_namespaces': static_info['detection_namespaces']
+        }
+    
+    return {
+        'success': True,
+        'architectures': {
+            'supported_architectures': supported,
+            'total_architectures': len(supported)
+        }
+    }
+
+def _save_upload(uploaded_file, destination_path):
+    """
+    Stream an uploaded file to disk with a large fixed-size copy buffer,
+    hashing it on the way. Returns (sha256 hex digest, size in bytes).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(destination_path, 'wb', buffering=0) as dst:
+        while True:
+            chunk = uploaded_file.stream.read(UPLOAD_COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            dst.write(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+def _detect_with_cache(instance_path, instance_filename, content_digest):
+    """Return (detected_version, namespaces), parsing only for content not seen before"""
+    cache_key = (content_digest, instance_filename.lower())
+    with _detection_cache_lock:
+        cached = _detection_cache.get(cache_key)
+        if cached is not None:
+            _detection_cache.move_to_end(cache_key)
+            logger.info(f"⚡ Using cached architecture detection for {instance_filename}")
+            return cached
+    
+    detected_version = detect_architecture_version(instance_path)
+    
+    # Get detailed namespace information
+    try:
+        namespaces = extract_namespaces(instance_path)
+    except Exception as ns_error:
+        namespaces = {'error': f"Failed to parse namespaces: {ns_error}"}
+    
+    result = (detected_version, namespaces)
+    with _detection_cache_lock:
+        _detection_cache[cache_key] = result
+        if len(_detection_cache) > DETECTION_CACHE_SIZE:
+            _detection_cache.popitem(last=False)
+    return result
+
 def register_detect_architecture_routes(app, upload_folder):
     """Register architecture detection routes"""
     
@@ -48,35 +186,17 @@ def register_detect_architecture_routes(app, upload_folder):
             # Save file temporarily
             instance_filename = secure_filename(instance_file.filename)
             instance_path = os.path.join(upload_folder, instance_filename)
-            instance_file.save(instance_path)
+            content_digest, file_size = _save_upload(instance_file, instance_path)
             
             # Detect architecture
-            detected_version = detect_architecture_version(instance_path)
-            
-            # Get detailed namespace information
-            import xml.etree.ElementTree as ET
-            try:
-                tree = ET.parse(instance_path)
-                root = tree.getroot()
-                
-                # Extract all namespaces
-                namespaces = {}
-                for key, value in root.attrib.items():
-                    if key.startswith('xmlns:'):
-                        prefix = key.replace('xmlns:', '')
-                        namespaces[prefix] = value
-                    elif key == 'xmlns':
-                        namespaces['default'] = value
-                
-            except Exception as ns_error:
-                namespaces = {'error': f"Failed to parse namespaces: {ns_error}"}
+            detected_version, namespaces = _detect_with_cache(instance_path, instance_filename, content_digest)
             
             # Build response
             detection_result = {
                 'success': True,
                 'file_info': {
                     'filename': instance_filename,
-                    'file_size': os.path.getsize(instance_path)
+                    'file_size': file_size
                 },
                 'detection_result': {
                     'detected_architecture': detected_version,
@@ -84,20 +204,9 @@ def register_detect_architecture_routes(app, upload_folder):
                     'confidence': 'high' if detected_version != 'unknown' else 'none'
                 },
                 'namespaces_found': namespaces,
-                'architecture_details': {}
+                'architecture_details': _architecture_details(detected_version)
             }
             
-            # Add details for each architecture
-            for arch_key, arch_config in ARCHITECTURES.items():
-                detection_result['architecture_details'][arch_key] = {
-                    'name': arch_config['name'],
-                    'expected_namespaces': arch_config['namespaces'],
-                    'database_path': arch_config['dmp_db_path'],
-                    'database_exists': os.path.exists(arch_config['dmp_db_path']),
-                    'taxonomy_folder': arch_config['taxonomy_folder'],
-                    'selected': arch_key == detected_version
-                }
-            
             # Add recommendation
             if detected_version != 'unknown':
                 config = ARCHITECTURES[detected_version]
@@ -120,7 +229,7 @@ def register_detect_architecture_routes(app, upload_folder):
             except:
                 pass
             
-            return jsonify(detection_result), 200
+            return _json_response(detection_result)
             
         except Exception as e:
             logger.error(f"❌ Architecture detection failed: {e}")
@@ -144,24 +253,7 @@ def register_detect_architecture_routes(app, upload_folder):
         List all supported DPM architectures with availability status
         """
         try:
-            architectures_info = {
-                'supported_architectures': {},
-                'total_architectures': len(ARCHITECTURES)
-            }
-            
-            for arch_key, arch_config in ARCHITECTURES.items():
-                architectures_info['supported_architectures'][arch_key] = {
-                    'name': arch_config['name'],
-                    'database_path': arch_config['dmp_db_path'],
-                    'database_available': os.path.exists(arch_config['dmp_db_path']),
-                    'taxonomy_folder': arch_config['taxonomy_folder'],
-                    'detection_namespaces': arch_config['namespaces']
-                }
-            
-            return jsonify({
-                'success': True,
-                'architectures': architectures_info
-            }), 200
+            return _json_response(_architectures_payload(_probe_bucket()))
             
         except Exception as e:
             logger.error(f"Failed to list architectures: {e}")
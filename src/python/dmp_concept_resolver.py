@@ -1,98 +1,455 @@
 
 
+import os
+import sys
+import json
+import bisect
 import logging
-import re
-from dmp_database import dmp_db
+import tempfile
+import threading
+from collections import OrderedDict
+from dmp_database import get_dmp_db
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Parameters per IN (...) lookup; keeps each statement well inside Access query limits
+BULK_LOOKUP_CHUNK_SIZE = 200
+
+# Resolved concepts kept in the LRU cache; unresolvable concepts are cached as None
+CONCEPT_CACHE_SIZE = 65536
+_NOT_CACHED = object()
+
+# The concept and member tables are static per DMP release: after the first load they are
+# kept as JSON next to the .accdb and reused until the database file is newer
+REFERENCE_SNAPSHOT_SUFFIX = '.reference.json'
+
+# Namespace prefix -> equivalent prefixes to try, in order of preference
+_PREFIX_MAPPINGS = {
+    sys.intern(prefix): tuple(map(sys.intern, variants))
+    for prefix, variants in {
+        'eba_met': ('eba_met', 'find'),
+        'eba_met_3.4': ('eba_met', 'find'),
+        'eba_met_4.0': ('eba_met', 'find'),
+        'find': ('find', 'eba_met')
+    }.items()
+}
+
 class DMPConceptResolver:
     def __init__(self):
-        self.concept_cache = {}
-        self.prefix_mappings = {
-            'eba_met': ['eba_met', 'find'],
-            'eba_met_3.4': ['eba_met', 'find'],
-            'eba_met_4.0': ['eba_met', 'find'],
-            'find': ['find', 'eba_met']
-        }
+        self.concept_cache = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        # Guards concept_cache and its counters: an LRU read reorders the dict
+        self._cache_lock = threading.RLock()
+        
+        # In-memory copies of the concept and member tables, keyed by lowercased code
+        # (Access compares text case-insensitively). Loaded once per database.
+        self._index_lock = threading.Lock()
+        self._index_owner = None
+        self._indexes_loaded = False
+        self._index_db_version = None
+        self._exact_idx = {}
+        self._member_idx = {}
+        # Member codes joined into one newline-separated string for substring search,
+        # with the start offset and member of each code
+        self._member_haystack = ''
+        self._member_offsets = []
+        self._member_rows = []
+        
+        # Formatted SQL text keyed by (query kind, table...), so the same string
+        # (and the driver's prepared statement for it) is reused across lookups
+        self._sql_cache = {}
+    
+    def _get_sql(self, key, builder):
+        """Return the SQL text cached under key, building it on first use"""
+        sql = self._sql_cache.get(key)
+        if sql is None:
+            sql = self._sql_cache[key] = builder()
+        return sql
+    
+    def _ensure_indexes(self):
+        """Load lookup tables on first use for the current database; False if they could not be loaded"""
+        connection_manager = get_dmp_db().connection_manager
+        if self._index_owner is connection_manager:
+            return self._indexes_loaded
+        
+        with self._index_lock:
+            if self._index_owner is connection_manager:
+                return self._indexes_loaded
+            
+            exact_idx = {}
+            member_idx = {}
+            member_codes = []
+            loaded = False
+            db_version = None
+            try:
+                snapshot = self._load_reference_snapshot(connection_manager)
+                if snapshot is not None:
+                    # The version probe is skipped too; later per-concept queries reuse it
+                    if connection_manager.db_version is None:
+                        connection_manager.db_version = snapshot['db_version']
+                    logger.info(f"⚡ Using reference table snapshot for {os.path.basename(connection_manager.db_path)}")
+                else:
+                    with connection_manager.pooled_connection() as connection:
+                        cursor = connection.cursor()
+                        snapshot = self._read_reference_tables(cursor, self._detect_database_version(connection))
+                    if snapshot['concepts']:
+                        self._save_reference_snapshot(connection_manager, snapshot)
+                
+                db_version = snapshot['db_version']
+                self._index_concepts(snapshot, exact_idx)
+                self._index_members(snapshot['members'], member_idx, member_codes)
+                loaded = True
+                logger.info(f"✅ Loaded concept index: {len(exact_idx)} concept keys, {len(member_idx)} member keys")
+            except Exception as e:
+                logger.warning(f"⚠️ Could not load concept index, using per-concept queries: {e}")
+            
+            self._exact_idx = exact_idx
+            self._member_idx = member_idx
+            self._member_offsets = []
+            self._member_rows = []
+            position = 0
+            for code, member in member_codes:
+                self._member_offsets.append(position)
+                self._member_rows.append(member)
+                position += len(code) + 1
+            self._member_haystack = '\n'.join(code for code, _ in member_codes)
+            self._index_db_version = db_version
+            self._indexes_loaded = loaded
+            self._index_owner = connection_manager
+            return loaded
+    
+    def _read_reference_tables(self, cursor, db_version):
+        """
+        Read the concept and member tables into a JSON-serializable snapshot:
+        concept rows are [code, label, type, metric code], member rows [code, XBRL code, label]
+        """
+        queries_manager = get_dmp_db().queries_manager
+        snapshot = {'db_version': db_version, 'concept_source': None, 'concepts': [], 'members': []}
+        
+        if db_version == 'dmp_3_3':
+            # DimensionalItem, or Item when DimensionalItem is unavailable
+            for table in ('DimensionalItem', 'Item'):
+                try:
+                    cursor.execute(f"SELECT Code, Label FROM [{table}]")
+                except Exception:
+                    continue
+                snapshot['concept_source'] = table
+                snapshot['concepts'] = [[code, label, table, ''] for code, label in cursor.fetchall()]
+                break
+        else:
+            concept_table = queries_manager.get_actual_table_name('tConcept')
+            if concept_table in queries_manager.table_name_set:
+                cursor.execute(f"SELECT ConceptCode, ConceptLabel, ConceptType, MetricCode FROM [{concept_table}]")
+                snapshot['concept_source'] = 'tConcept'
+                snapshot['concepts'] = [list(row) for row in cursor.fetchall()]
+        
+        member_table = queries_manager.get_actual_table_name('tMember')
+        if member_table in queries_manager.table_name_set:
+            cursor.execute(f"SELECT MemberCode, MemberXbrlCode, MemberLabel FROM [{member_table}]")
+            snapshot['members'] = [list(row) for row in cursor.fetchall()]
+        
+        return snapshot
+    
+    def _index_concepts(self, snapshot, exact_idx):
+        """Index concepts by code; DMP 4.0 tConcept also by label for keys not already taken"""
+        source = snapshot['concept_source']
+        label_idx = {}
+        for code, label, concept_type, metric_code in snapshot['concepts']:
+            concept = {
+                'ConceptCode': code,
+                'ConceptLabel': label,
+                'ConceptType': concept_type,
+                'MetricCode': metric_code,
+                'source': source
+            }
+            if code:
+                exact_idx.setdefault(code.lower(), concept)
+            if label and source == 'tConcept':
+                label_idx.setdefault(label.lower(), concept)
+        
+        for key, concept in label_idx.items():
+            exact_idx.setdefault(key, concept)
+    
+    def _index_members(self, member_rows, member_idx, member_codes):
+        """Index members by MemberCode and MemberXbrlCode; member_codes collects (lowercased code, member) in table order"""
+        for member_code, member_xbrl_code, member_label in member_rows:
+            member = {
+                'ConceptCode': member_code,
+                'ConceptLabel': member_label,
+                'ConceptType': 'Member',
+                'MemberXbrlCode': member_xbrl_code,
+                'MetricCode': '',
+                'source': 'tMember'
+            }
+            for key in (member_code, member_xbrl_code):
+                if key:
+                    key = key.lower()
+                    member_idx.setdefault(key, member)
+                    member_codes.append((key, member))
+    
+    def _reference_snapshot_path(self, connection_manager):
+        return f"{connection_manager.db_path}{REFERENCE_SNAPSHOT_SUFFIX}"
+    
+    def _load_reference_snapshot(self, connection_manager):
+        """Snapshot written for this database file, or None when missing or older than the database"""
+        snapshot_path = self._reference_snapshot_path(connection_manager)
+        try:
+            if os.path.getmtime(snapshot_path) < os.path.getmtime(connection_manager.db_path):
+                return None
+            with open(snapshot_path, 'rb') as f:
+                data = f.read()
+            return orjson.loads(data) if orjson is not None else json.loads(data)
+        except (OSError, ValueError):
+            return None
+    
+    def _save_reference_snapshot(self, connection_manager, snapshot):
+        """Write the snapshot next to the database; skipped quietly when the folder is not writable"""
+        snapshot_path = self._reference_snapshot_path(connection_manager)
+        tmp_path = None
+        try:
+            if orjson is not None:
+                data = orjson.dumps(snapshot, default=str)
+            else:
+                data = json.dumps(snapshot, default=str).encode('utf-8')
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(snapshot_path) or '.', suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            # Readers never see a half-written file
+            os.replace(tmp_path, snapshot_path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.debug(f"Could not write reference table snapshot {snapshot_path}: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def _find_member_containing(self, text):
+        """First member (in table order) whose MemberCode or MemberXbrlCode contains text"""
+        position = self._member_haystack.find(text.lower())
+        if position < 0 or not text:
+            return None
+        # Codes never contain the newline separator, so a match lies within one code
+        return self._member_rows[bisect.bisect_right(self._member_offsets, position) - 1]
+    
+    def _cache_lookup(self, concept_name):
+        """Return (found, concept) from the LRU cache; concept is None for a cached miss"""
+        with self._cache_lock:
+            cached = self.concept_cache.get(concept_name, _NOT_CACHED)
+            if cached is _NOT_CACHED:
+                self._cache_misses += 1
+                return False, None
+            self.concept_cache.move_to_end(concept_name)
+            self._cache_hits += 1
+            return True, cached
+    
+    def _cache_store(self, concept_name, dmp_concept):
+        """Cache a resolution (None for a miss), evicting the least recently used entry when full"""
+        with self._cache_lock:
+            self.concept_cache[concept_name] = dmp_concept
+            self.concept_cache.move_to_end(concept_name)
+            if len(self.concept_cache) > CONCEPT_CACHE_SIZE:
+                self.concept_cache.popitem(last=False)
+    
+    def cache_info(self):
+        """Concept cache statistics"""
+        with self._cache_lock:
+            return {
+                'hits': self._cache_hits,
+                'misses': self._cache_misses,
+                'size': len(self.concept_cache),
+                'max_size': CONCEPT_CACHE_SIZE,
+                'cached_unresolved': sum(1 for concept in self.concept_cache.values() if concept is None)
+            }
+    
+    def clear_cache(self):
+        """Forget all cached resolutions, including cached misses"""
+        with self._cache_lock:
+            self.concept_cache.clear()
+            self._cache_hits = 0
+            self._cache_misses = 0
     
     def resolve_concept_from_dmp(self, concept_name):
         """
         Resolve XBRL concept to DMP database concept with Member table support
         """
-        if concept_name in self.concept_cache:
-            return self.concept_cache[concept_name]
+        found, cached = self._cache_lookup(concept_name)
+        if found:
+            return cached
         
         try:
             # Clean concept name - remove prefix
             clean_concept = self._clean_concept_name(concept_name)
             
             # Try multiple search strategies including Member table
+            # Exact concept and member matches are tried together before any LIKE search
             dmp_concept = (
-                self._search_by_exact_match(concept_name) or
+                self._search_exact_all(concept_name, clean_concept) or
                 self._search_by_clean_name(clean_concept) or
                 self._search_by_prefix_variants(concept_name) or
                 self._search_by_partial_match(clean_concept) or
-                self._search_in_member_table(concept_name) or  # NEW: Member table search
+                self._search_in_member_table(concept_name, include_exact=False) or  # NEW: Member table search
                 self._search_using_queries_manager(concept_name)
             )
             
             if dmp_concept:
-                logger.info(f"✅ Resolved concept: {concept_name} -> {dmp_concept['ConceptCode']} (source: {dmp_concept.get('source', 'unknown')})")
-                self.concept_cache[concept_name] = dmp_concept
+                logger.info("✅ Resolved concept: %s -> %s (source: %s)", concept_name, dmp_concept['ConceptCode'], dmp_concept.get('source', 'unknown'))
+                self._cache_store(concept_name, dmp_concept)
                 return dmp_concept
             else:
-                logger.warning(f"❌ Could not resolve concept: {concept_name}")
+                logger.warning("❌ Could not resolve concept: %s", concept_name)
+                # Remember the miss so repeat lookups skip every search strategy
+                self._cache_store(concept_name, None)
                 return None
                 
         except Exception as e:
-            logger.error(f"Error resolving concept {concept_name}: {e}")
+            logger.error("Error resolving concept %s: %s", concept_name, e)
             return None
     
+    def _concept_from_row(self, row):
+        """Concept dict for a (ConceptCode, ConceptLabel, ConceptType, MetricCode) tConcept row"""
+        code, label, concept_type, metric_code = row[:4]
+        return {
+            'ConceptCode': code,
+            'ConceptLabel': label,
+            'ConceptType': concept_type,
+            'MetricCode': metric_code,
+            'source': 'tConcept'
+        }
+    
     def _clean_concept_name(self, concept_name):
         """Remove namespace prefix from concept"""
-        if ':' in concept_name:
-            return concept_name.split(':', 1)[1]
-        return concept_name
+        _, sep, local_name = concept_name.partition(':')
+        return local_name if sep else concept_name
+    
+    def _search_exact_all(self, concept_name, clean_name):
+        """
+        Exact concept match (plus DMP 3.3 substring match) and exact member match in one step:
+        from the in-memory index, or otherwise a single UNION ALL query ordered by priority
+        """
+        if self._ensure_indexes():
+            return (
+                self._search_by_exact_match(concept_name) or
+                self._search_in_member_table(concept_name, include_partial=False)
+            )
+        
+        try:
+            with get_dmp_db().connection_manager.pooled_connection() as connection:
+                cursor = connection.cursor()
+                
+                db_version = self._detect_database_version(connection)
+                available_tables = get_dmp_db().queries_manager.table_name_set
+                concept_table = None
+                if db_version == 'dmp_3_3':
+                    params = [concept_name, f"%{concept_name}%"]
+                    concept_source = 'DimensionalItem'
+                else:
+                    params = []
+                    concept_table = get_dmp_db().queries_manager.get_actual_table_name('tConcept')
+                    if concept_table in available_tables:
+                        params += [concept_name, concept_name]
+                    else:
+                        concept_table = None
+                    concept_source = 'tConcept'
+                
+                member_table = get_dmp_db().queries_manager.get_actual_table_name('tMember')
+                if member_table in available_tables:
+                    params += [concept_name, concept_name, clean_name, clean_name]
+                else:
+                    member_table = None
+                
+                if not params:
+                    return None
+                
+                query = self._get_sql(
+                    ('exact_all', db_version, concept_table, member_table),
+                    lambda: self._build_exact_all_sql(db_version, concept_table, member_table)
+                )
+                cursor.execute(query, params)
+                result = cursor.fetchone()
+                if not result:
+                    return None
+                
+                code, label, concept_type, metric_code, member_xbrl_code, priority = result[:6]
+                if priority <= 2:
+                    return {
+                        'ConceptCode': code,
+                        'ConceptLabel': label,
+                        'ConceptType': concept_type,
+                        'MetricCode': metric_code or '',
+                        'source': concept_source
+                    }
+                
+                search_type = "exact match" if priority == 3 else "clean name exact match"
+                logger.info("🎯 Found in Member table (%s): %s -> %s (XBRL: %s)", search_type, concept_name, code, member_xbrl_code)
+                return {
+                    'ConceptCode': code,
+                    'ConceptLabel': label,
+                    'ConceptType': 'Member',
+                    'MemberXbrlCode': member_xbrl_code,
+                    'MetricCode': '',
+                    'source': 'tMember',
+                    'searchType': search_type
+                }
+                
+        except Exception as e:
+            logger.debug("Combined exact search failed (%s), using separate queries", e)
+            return (
+                self._search_by_exact_match(concept_name) or
+                self._search_in_member_table(concept_name, include_partial=False)
+            )
+    
+    def _build_exact_all_sql(self, db_version, concept_table, member_table):
+        """UNION ALL of the exact concept and member lookups used by _search_exact_all, ordered by priority"""
+        parts = []
+        if db_version == 'dmp_3_3':
+            parts.append(
+                "SELECT Code AS ConceptCode, Label AS ConceptLabel, 'DimensionalItem' AS ConceptType, "
+                "'' AS MetricCode, '' AS MemberXbrlCode, 1 AS Priority FROM [DimensionalItem] WHERE Code = ?"
+            )
+            parts.append("SELECT Code, Label, 'DimensionalItem', '', '', 2 FROM [DimensionalItem] WHERE Code LIKE ?")
+        elif concept_table:
+            parts.append(
+                f"SELECT ConceptCode, ConceptLabel, ConceptType, MetricCode, '' AS MemberXbrlCode, "
+                f"1 AS Priority FROM [{concept_table}] WHERE ConceptCode = ? OR ConceptLabel = ?"
+            )
+        
+        if member_table:
+            for priority in (3, 4):
+                parts.append(
+                    f"SELECT MemberCode, MemberLabel, 'Member', '', MemberXbrlCode, {priority} "
+                    f"FROM [{member_table}] WHERE MemberCode = ? OR MemberXbrlCode = ?"
+                )
+        
+        # First column list names the union; the derived table needs an alias in Access
+        return f"SELECT TOP 1 * FROM ({' UNION ALL '.join(parts)}) AS exact_matches ORDER BY Priority"
     
     def _search_by_exact_match(self, concept_name):
         """Search for exact concept match in DMP database using working tables"""
+        if self._ensure_indexes():
+            dmp_concept = self._exact_idx.get(concept_name.lower())
+            if dmp_concept or self._index_db_version != 'dmp_3_3':
+                return dmp_concept
+            # DMP 3.3 also accepts substring matches, which still need the database
+        
         try:
-            connection = dmp_db.connection_manager.get_connection()
-            cursor = connection.cursor()
-            
-            # FIXED: Use DMP 3.3 proper tables for concept search
-            db_version = self._detect_database_version(connection)
-            
-            if db_version == 'dmp_3_3':
-                # Priority: Use DimensionalItem (main concept table in DMP 3.3)
-                try:
-                    query = """
-                    SELECT TOP 1 Code as ConceptCode, 
-                           Label as ConceptLabel,
-                           'DimensionalItem' as ConceptType
-                    FROM DimensionalItem 
-                    WHERE Code = ? OR Code LIKE ?
-                    """
-                    cursor.execute(query, (concept_name, f"%{concept_name}%"))
-                    result = cursor.fetchone()
-                    
-                    if result:
-                        return {
-                            'ConceptCode': result[0],
-                            'ConceptLabel': result[1],
-                            'ConceptType': result[2],
-                            'MetricCode': '',
-                            'source': 'DimensionalItem'
-                        }
-                except:
-                    # Fallback to Item table
+            with get_dmp_db().connection_manager.pooled_connection() as connection:
+                cursor = connection.cursor()
+                
+                # FIXED: Use DMP 3.3 proper tables for concept search
+                db_version = self._detect_database_version(connection)
+                
+                if db_version == 'dmp_3_3':
+                    # Priority: Use DimensionalItem (main concept table in DMP 3.3)
                     try:
                         query = """
                         SELECT TOP 1 Code as ConceptCode, 
                                Label as ConceptLabel,
-                               'Item' as ConceptType
-                        FROM Item 
+                               'DimensionalItem' as ConceptType
+                        FROM DimensionalItem 
                         WHERE Code = ? OR Code LIKE ?
                         """
                         cursor.execute(query, (concept_name, f"%{concept_name}%"))
@@ -104,82 +461,103 @@ class DMPConceptResolver:
                                 'ConceptLabel': result[1],
                                 'ConceptType': result[2],
                                 'MetricCode': '',
-                                'source': 'Item'
+                                'source': 'DimensionalItem'
                             }
                     except:
-                        pass
-            else:
-                # DMP 4.0 - use tConcept table with 4 columns
-                concept_table = dmp_db.queries_manager.get_actual_table_name('tConcept')
-                if concept_table in dmp_db.queries_manager.table_mappings.values():
-                    query = f"""
-                    SELECT ConceptCode, ConceptLabel, ConceptType, MetricCode
-                    FROM [{concept_table}] 
-                    WHERE ConceptCode = ? OR ConceptLabel = ?
-                    """
-                    cursor.execute(query, (concept_name, concept_name))
-                    result = cursor.fetchone()
-                    
-                    if result:
-                        return {
-                            'ConceptCode': getattr(result, 'ConceptCode', result[0]),
-                            'ConceptLabel': getattr(result, 'ConceptLabel', result[1] if len(result) > 1 else ''),
-                            'ConceptType': getattr(result, 'ConceptType', result[2] if len(result) > 2 else ''),
-                            'MetricCode': getattr(result, 'MetricCode', result[3] if len(result) > 3 else ''),
-                            'source': 'tConcept'
-                        }
-            
-            return None
-            
+                        # Fallback to Item table
+                        try:
+                            query = """
+                            SELECT TOP 1 Code as ConceptCode, 
+                                   Label as ConceptLabel,
+                                   'Item' as ConceptType
+                            FROM Item 
+                            WHERE Code = ? OR Code LIKE ?
+                            """
+                            cursor.execute(query, (concept_name, f"%{concept_name}%"))
+                            result = cursor.fetchone()
+                            
+                            if result:
+                                return {
+                                    'ConceptCode': result[0],
+                                    'ConceptLabel': result[1],
+                                    'ConceptType': result[2],
+                                    'MetricCode': '',
+                                    'source': 'Item'
+                                }
+                        except:
+                            pass
+                else:
+                    # DMP 4.0 - use tConcept table with 4 columns
+                    concept_table = get_dmp_db().queries_manager.get_actual_table_name('tConcept')
+                    if concept_table in get_dmp_db().queries_manager.table_name_set:
+                        query = self._get_sql(('exact', concept_table), lambda: f"""
+                        SELECT ConceptCode, ConceptLabel, ConceptType, MetricCode
+                        FROM [{concept_table}] 
+                        WHERE ConceptCode = ? OR ConceptLabel = ?
+                        """)
+                        cursor.execute(query, (concept_name, concept_name))
+                        result = cursor.fetchone()
+                        
+                        if result:
+                            return self._concept_from_row(result)
+                
+                return None
+                
         except Exception as e:
             logger.error(f"Exact match search failed: {e}")
             return None
     
+    def _build_like_patterns(self, term, deep=True):
+        """
+        LIKE patterns to try in order: the anchored prefix form first, which Access can
+        answer from an index, then the unanchored substring form for a deep search
+        """
+        patterns = [f"{term}%"]
+        if deep:
+            patterns.append(f"%{term}%")
+        return patterns
+    
+    def _fetch_first_like(self, cursor, query, term, placeholders=2):
+        """Run a query whose LIKE placeholders all take the same pattern, for each pattern in turn; first row found or None"""
+        for pattern in self._build_like_patterns(term):
+            cursor.execute(query, (pattern,) * placeholders)
+            result = cursor.fetchone()
+            if result:
+                return result
+        return None
+    
     def _search_by_clean_name(self, clean_name):
         """Search using cleaned concept name with DMP 3.3 compatibility"""
         try:
-            connection = dmp_db.connection_manager.get_connection()
-            cursor = connection.cursor()
-            
-            db_version = self._detect_database_version(connection)
-            
-            if db_version == 'dmp_3_3':
-                # Search in multiple DMP 3.3 tables for concepts
-                # 1. Try DimensionalItem first
-                try:
-                    query = """
-                    SELECT TOP 1 Code as ConceptCode,
-                           Label as ConceptLabel,
-                           'DimensionalItem' as ConceptType
-                    FROM DimensionalItem 
-                    WHERE Code LIKE ? OR Label LIKE ?
-                    """
-                    search_pattern = f"%{clean_name}%"
-                    cursor.execute(query, (search_pattern, search_pattern))
-                    result = cursor.fetchone()
-                    
-                    if result:
-                        return {
-                            'ConceptCode': result[0],
-                            'ConceptLabel': result[1], 
-                            'ConceptType': result[2],
-                            'MetricCode': '',
-                            'source': 'DimensionalItem'
-                        }
-                except:
-                    pass
+            with get_dmp_db().connection_manager.pooled_connection() as connection:
+                cursor = connection.cursor()
                 
-                # 2. Try PrimaryItem
-                try:
-                    query = """
-                    SELECT TOP 1 Code as ConceptCode,
-                           Label as ConceptLabel,
-                           'PrimaryItem' as ConceptType
-                    FROM PrimaryItem 
-                    WHERE Code LIKE ? OR Label LIKE ?
-                    """
-                    cursor.execute(query, (search_pattern, search_pattern))
-                    result = cursor.fetchone()
+                db_version = self._detect_database_version(connection)
+                
+                if db_version == 'dmp_3_3':
+                    # DimensionalItem and PrimaryItem in one round trip, DimensionalItem rows first
+                    query = self._get_sql(('clean_name', 'dmp_3_3'), lambda: """
+                    SELECT TOP 1 ConceptCode, ConceptLabel, ConceptType FROM (
+                        SELECT Code AS ConceptCode, Label AS ConceptLabel, 'DimensionalItem' AS ConceptType, 1 AS Priority
+                        FROM DimensionalItem WHERE Code LIKE ? OR Label LIKE ?
+                        UNION ALL
+                        SELECT Code, Label, 'PrimaryItem', 2
+                        FROM PrimaryItem WHERE Code LIKE ? OR Label LIKE ?
+                    ) AS clean_matches ORDER BY Priority
+                    """)
+                    try:
+                        result = self._fetch_first_like(cursor, query, clean_name, placeholders=4)
+                    except Exception as e:
+                        # Databases without PrimaryItem: search DimensionalItem on its own
+                        logger.debug("Combined clean name search failed (%s), searching DimensionalItem only", e)
+                        query = """
+                        SELECT TOP 1 Code as ConceptCode,
+                               Label as ConceptLabel,
+                               'DimensionalItem' as ConceptType
+                        FROM DimensionalItem 
+                        WHERE Code LIKE ? OR Label LIKE ?
+                        """
+                        result = self._fetch_first_like(cursor, query, clean_name)
                     
                     if result:
                         return {
@@ -187,62 +565,51 @@ class DMPConceptResolver:
                             'ConceptLabel': result[1], 
                             'ConceptType': result[2],
                             'MetricCode': '',
-                            'source': 'PrimaryItem'
+                            'source': result[2]
                         }
-                except:
-                    pass
-            else:
-                # DMP 4.0 logic
-                concept_table = dmp_db.queries_manager.get_actual_table_name('tConcept')
-                if concept_table in dmp_db.queries_manager.table_mappings.values():
-                    query = f"SELECT ConceptCode, ConceptLabel, ConceptType, MetricCode FROM [{concept_table}] WHERE ConceptCode LIKE ? OR ConceptLabel LIKE ?"
-                    search_pattern1 = f"%{clean_name}%"
-                    search_pattern2 = f"%{clean_name}%"
-                    cursor.execute(query, (search_pattern1, search_pattern2))
-                    result = cursor.fetchone()
+                else:
+                    # DMP 4.0 logic
+                    concept_table = get_dmp_db().queries_manager.get_actual_table_name('tConcept')
+                    if concept_table in get_dmp_db().queries_manager.table_name_set:
+                        query = self._get_sql(
+                            ('clean_name', concept_table),
+                            lambda: f"SELECT ConceptCode, ConceptLabel, ConceptType, MetricCode FROM [{concept_table}] WHERE ConceptCode LIKE ? OR ConceptLabel LIKE ?"
+                        )
+                        result = self._fetch_first_like(cursor, query, clean_name)
+                        
+                        if result:
+                            return self._concept_from_row(result)
                     
-                    if result:
-                        return {
-                            'ConceptCode': getattr(result, 'ConceptCode', result[0]),
-                            'ConceptLabel': getattr(result, 'ConceptLabel', result[1] if len(result) > 1 else ''),
-                            'ConceptType': getattr(result, 'ConceptType', result[2] if len(result) > 2 else ''),
-                            'MetricCode': getattr(result, 'MetricCode', result[3] if len(result) > 3 else ''),
-                            'source': 'tConcept'
-                        }
+                    # Search in datapoint table
+                    datapoint_table = get_dmp_db().queries_manager.get_actual_table_name('tDataPoint')
+                    if datapoint_table in get_dmp_db().queries_manager.table_name_set:
+                        query = self._get_sql(
+                            ('clean_name', datapoint_table),
+                            lambda: f"SELECT DataPointCode, DataPointLabel, 'DataPoint' as ConceptType FROM [{datapoint_table}] WHERE DataPointCode LIKE ? OR DataPointLabel LIKE ?"
+                        )
+                        result = self._fetch_first_like(cursor, query, clean_name)
+                        
+                        if result:
+                            return {
+                                'ConceptCode': result[0],
+                                'ConceptLabel': result[1],
+                                'ConceptType': 'DataPoint',
+                                'MetricCode': '',
+                                'source': 'tDataPoint'
+                            }
+                
+                return None
                 
-                # Search in datapoint table
-                datapoint_table = dmp_db.queries_manager.get_actual_table_name('tDataPoint')
-                if datapoint_table in dmp_db.queries_manager.table_mappings.values():
-                    query = f"SELECT DataPointCode, DataPointLabel, 'DataPoint' as ConceptType FROM [{datapoint_table}] WHERE DataPointCode LIKE ? OR DataPointLabel LIKE ?"
-                    search_pattern1 = f"%{clean_name}%"
-                    search_pattern2 = f"%{clean_name}%"
-                    cursor.execute(query, (search_pattern1, search_pattern2))
-                    result = cursor.fetchone()
-                    
-                    if result:
-                        return {
-                            'ConceptCode': getattr(result, 'DataPointCode', result[0]),
-                            'ConceptLabel': getattr(result, 'DataPointLabel', result[1] if len(result) > 1 else ''),
-                            'ConceptType': 'DataPoint',
-                            'MetricCode': getattr(result, 'MetricCode', result[2] if len(result) > 2 else ''),
-                            'source': 'tDataPoint'
-                        }
-            
-            return None
-            
         except Exception as e:
             logger.error(f"Clean name search failed: {e}")
             return None
     
-    def _search_in_member_table(self, concept_name):
+    def _search_in_member_table(self, concept_name, include_exact=True, include_partial=True):
         """NEW: Search for concept in Member table using both MemberCode and MemberXbrlCode"""
         try:
-            connection = dmp_db.connection_manager.get_connection()
-            cursor = connection.cursor()
-            
-            member_table = dmp_db.queries_manager.get_actual_table_name('tMember')
-            if member_table not in dmp_db.queries_manager.table_mappings.values():
-                logger.debug(f"Member table not available for concept search")
+            member_table = get_dmp_db().queries_manager.get_actual_table_name('tMember')
+            if member_table not in get_dmp_db().queries_manager.table_name_set:
+                logger.debug("Member table not available for concept search")
                 return None
             
             # Clean the concept name for better matching
@@ -256,88 +623,118 @@ class DMPConceptResolver:
                 (f"%{clean_name}%", "clean name partial match")
             ]
             
-            for pattern, search_type in search_patterns:
-                if "partial" in search_type:
-                    query = f"""
-                    SELECT TOP 1 MemberCode, MemberXbrlCode, MemberLabel
-                    FROM [{member_table}] 
-                    WHERE MemberCode LIKE ? OR MemberXbrlCode LIKE ?
-                    """
-                    cursor.execute(query, (pattern, pattern))
-                else:
-                    query = f"""
-                    SELECT MemberCode, MemberXbrlCode, MemberLabel
-                    FROM [{member_table}] 
-                    WHERE MemberCode = ? OR MemberXbrlCode = ?
-                    """
-                    cursor.execute(query, (pattern, pattern))
-                
-                result = cursor.fetchone()
-                if result:
-                    member_code = getattr(result, 'MemberCode', result[0])
-                    member_xbrl_code = getattr(result, 'MemberXbrlCode', result[1] if len(result) > 1 else '')
-                    member_label = getattr(result, 'MemberLabel', result[2] if len(result) > 2 else '')
-                    
-                    logger.info(f"🎯 Found in Member table ({search_type}): {concept_name} -> {member_code} (XBRL: {member_xbrl_code})")
-                    
-                    return {
-                        'ConceptCode': member_code,
-                        'ConceptLabel': member_label,
-                        'ConceptType': 'Member',
-                        'MemberXbrlCode': member_xbrl_code,
-                        'MetricCode': '',
-                        'source': 'tMember',
-                        'searchType': search_type
-                    }
+            exact_patterns = search_patterns[:2] if include_exact else []
+            search_patterns = search_patterns[2:] if include_partial else []
             
-            return None
+            if self._ensure_indexes():
+                # Served entirely from memory: dict probes for exact codes, one substring
+                # scan of the joined member codes for partial matches
+                candidates = [(self._member_idx.get(pattern.lower()), search_type) for pattern, search_type in exact_patterns]
+                candidates += [(self._find_member_containing(pattern.strip('%')), search_type) for pattern, search_type in search_patterns]
+                for member, search_type in candidates:
+                    if member:
+                        logger.info("🎯 Found in Member table (%s): %s -> %s (XBRL: %s)", search_type, concept_name, member['ConceptCode'], member['MemberXbrlCode'])
+                        return {**member, 'searchType': search_type}
+                return None
             
+            search_patterns = exact_patterns + search_patterns
+            
+            with get_dmp_db().connection_manager.pooled_connection() as connection:
+                cursor = connection.cursor()
+                
+                for pattern, search_type in search_patterns:
+                    if "partial" in search_type:
+                        query = self._get_sql(('member_partial', member_table), lambda: f"""
+                        SELECT TOP 1 MemberCode, MemberXbrlCode, MemberLabel
+                        FROM [{member_table}] 
+                        WHERE MemberCode LIKE ? OR MemberXbrlCode LIKE ?
+                        """)
+                        cursor.execute(query, (pattern, pattern))
+                    else:
+                        query = self._get_sql(('member_exact', member_table), lambda: f"""
+                        SELECT MemberCode, MemberXbrlCode, MemberLabel
+                        FROM [{member_table}] 
+                        WHERE MemberCode = ? OR MemberXbrlCode = ?
+                        """)
+                        cursor.execute(query, (pattern, pattern))
+                    
+                    result = cursor.fetchone()
+                    if result:
+                        member_code, member_xbrl_code, member_label = result[:3]
+                        
+                        logger.info("🎯 Found in Member table (%s): %s -> %s (XBRL: %s)", search_type, concept_name, member_code, member_xbrl_code)
+                        
+                        return {
+                            'ConceptCode': member_code,
+                            'ConceptLabel': member_label,
+                            'ConceptType': 'Member',
+                            'MemberXbrlCode': member_xbrl_code,
+                            'MetricCode': '',
+                            'source': 'tMember',
+                            'searchType': search_type
+                        }
+                
+                return None
+                
         except Exception as e:
-            logger.error(f"Member table search failed for {concept_name}: {e}")
+            logger.error("Member table search failed for %s: %s", concept_name, e)
             return None
     
     def _search_by_prefix_variants(self, concept_name):
         """Search using different prefix variants with DMP 3.3 compatibility"""
         try:
-            if ':' not in concept_name:
+            prefix, sep, local_name = concept_name.partition(':')
+            if not sep:
                 return None
-                
-            prefix, local_name = concept_name.split(':', 1)
             
-            # Get variants for this prefix
-            variants = self.prefix_mappings.get(prefix, [prefix])
-            
-            connection = dmp_db.connection_manager.get_connection()
-            cursor = connection.cursor()
+            # Get variants for this prefix, in order of preference
+            variants = _PREFIX_MAPPINGS.get(sys.intern(prefix), (prefix,))
+            variant_concepts = [f"{variant_prefix}:{local_name}" for variant_prefix in variants]
             
-            db_version = self._detect_database_version(connection)
-            
-            if db_version == 'dmp_3_3':
-                # Skip prefix variant search for DMP 3.3 to avoid SQL errors
-                return None
-            else:
-                # DMP 4.0 logic
-                concept_table = dmp_db.queries_manager.get_actual_table_name('tConcept')
-                if concept_table not in dmp_db.queries_manager.table_mappings.values():
+            if self._ensure_indexes():
+                if self._index_db_version == 'dmp_3_3':
                     return None
+                for variant_concept in variant_concepts:
+                    dmp_concept = self._exact_idx.get(variant_concept.lower())
+                    # The index also holds labels; this search only matches codes
+                    if dmp_concept and dmp_concept['ConceptCode'].lower() == variant_concept.lower():
+                        return dmp_concept
+                return None
+            
+            with get_dmp_db().connection_manager.pooled_connection() as connection:
+                cursor = connection.cursor()
                 
-                for variant_prefix in variants:
-                    variant_concept = f"{variant_prefix}:{local_name}"
-                    query = f"SELECT ConceptCode, ConceptLabel, ConceptType, MetricCode FROM [{concept_table}] WHERE ConceptCode = ?"
-                    cursor.execute(query, (variant_concept,))
-                    result = cursor.fetchone()
+                db_version = self._detect_database_version(connection)
+                
+                if db_version == 'dmp_3_3':
+                    # Skip prefix variant search for DMP 3.3 to avoid SQL errors
+                    return None
+                else:
+                    # DMP 4.0 logic
+                    concept_table = get_dmp_db().queries_manager.get_actual_table_name('tConcept')
+                    if concept_table not in get_dmp_db().queries_manager.table_name_set:
+                        return None
                     
-                    if result:
-                        return {
-                            'ConceptCode': getattr(result, 'ConceptCode', result[0]),
-                            'ConceptLabel': getattr(result, 'ConceptLabel', result[1] if len(result) > 1 else ''),
-                            'ConceptType': getattr(result, 'ConceptType', result[2] if len(result) > 2 else ''),
-                            'MetricCode': getattr(result, 'MetricCode', result[3] if len(result) > 3 else ''),
-                            'source': 'tConcept'
-                        }
-            
-            return None
-            
+                    # All variants in one round trip; the preferred variant is picked afterwards
+                    query = self._get_sql(
+                        ('by_codes', concept_table, len(variant_concepts)),
+                        lambda: f"SELECT ConceptCode, ConceptLabel, ConceptType, MetricCode FROM [{concept_table}] "
+                                f"WHERE ConceptCode IN ({', '.join('?' * len(variant_concepts))})"
+                    )
+                    cursor.execute(query, variant_concepts)
+                    rows_by_code = {}
+                    for row in cursor.fetchall():
+                        if row[0]:
+                            rows_by_code.setdefault(row[0].lower(), row)
+                    
+                    for variant_concept in variant_concepts:
+                        result = rows_by_code.get(variant_concept.lower())
+                        if result:
+                            logger.debug("Prefix variant matched: %s -> %s", concept_name, result[0])
+                            return self._concept_from_row(result)
+                
+                return None
+                
         except Exception as e:
             logger.error(f"Prefix variant search failed: {e}")
             return None
@@ -345,36 +742,33 @@ class DMPConceptResolver:
     def _search_by_partial_match(self, clean_name):
         """Search using partial match with DMP 3.3 compatibility"""
         try:
-            connection = dmp_db.connection_manager.get_connection()
-            cursor = connection.cursor()
-            
-            db_version = self._detect_database_version(connection)
-            
-            if db_version == 'dmp_3_3':
-                # Simple query without problematic WHERE clauses
-                return None  # Skip partial matching for DMP 3.3 to avoid SQL errors
-            else:
-                # DMP 4.0 logic
-                concept_table = dmp_db.queries_manager.get_actual_table_name('tConcept')
-                if concept_table in dmp_db.queries_manager.table_mappings.values():
-                    patterns = [clean_name, clean_name.upper(), clean_name.lower()]
-                    
-                    for pattern in patterns:
-                        query = f"SELECT ConceptCode, ConceptLabel, ConceptType, MetricCode FROM [{concept_table}] WHERE ConceptCode LIKE ?"
-                        cursor.execute(query, (f"%{pattern}%",))
-                        result = cursor.fetchone()
-                        
-                        if result:
-                            return {
-                                'ConceptCode': getattr(result, 'ConceptCode', result[0]),
-                                'ConceptLabel': getattr(result, 'ConceptLabel', result[1] if len(result) > 1 else ''),
-                                'ConceptType': getattr(result, 'ConceptType', result[2] if len(result) > 2 else ''),
-                                'MetricCode': getattr(result, 'MetricCode', result[3] if len(result) > 3 else ''),
-                                'source': 'tConcept'
-                            }
-            
-            return None
-            
+            with get_dmp_db().connection_manager.pooled_connection() as connection:
+                cursor = connection.cursor()
+                
+                db_version = self._detect_database_version(connection)
+                
+                if db_version == 'dmp_3_3':
+                    # Simple query without problematic WHERE clauses
+                    return None  # Skip partial matching for DMP 3.3 to avoid SQL errors
+                else:
+                    # DMP 4.0 logic
+                    concept_table = get_dmp_db().queries_manager.get_actual_table_name('tConcept')
+                    if concept_table in get_dmp_db().queries_manager.table_name_set:
+                        query = self._get_sql(
+                            ('partial', concept_table),
+                            lambda: f"SELECT ConceptCode, ConceptLabel, ConceptType, MetricCode FROM [{concept_table}] WHERE ConceptCode LIKE ?"
+                        )
+                        # Anchored prefix first: an index seek on ConceptCode rather than a table scan.
+                        # Access LIKE ignores case, so one substring pass covers every casing.
+                        for pattern in self._build_like_patterns(clean_name):
+                            cursor.execute(query, (pattern,))
+                            result = cursor.fetchone()
+                            
+                            if result:
+                                return self._concept_from_row(result)
+                
+                return None
+                
         except Exception as e:
             logger.error(f"Partial match search failed: {e}")
             return None
@@ -390,40 +784,169 @@ class DMPConceptResolver:
             return None
     
     def batch_resolve_concepts(self, concept_list):
-        """Batch resolve multiple concepts efficiently"""
+        """
+        Batch resolve multiple concepts efficiently: exact concept and member matches are
+        fetched with chunked IN queries (or the in-memory index), only the remaining
+        concepts go through the per-concept strategies
+        """
         results = {}
-        for concept in concept_list:
+        pending = []
+        for concept in dict.fromkeys(concept_list):
+            found, cached = self._cache_lookup(concept)
+            if found:
+                results[concept] = cached
+            else:
+                pending.append(concept)
+        
+        for bulk_search in (self._search_by_exact_match_bulk, self._search_members_bulk):
+            if not pending:
+                break
+            matches = bulk_search(pending)
+            remaining = []
+            for concept in pending:
+                dmp_concept = matches.get(concept.lower())
+                if dmp_concept:
+                    self._cache_store(concept, dmp_concept)
+                    results[concept] = dmp_concept
+                else:
+                    remaining.append(concept)
+            pending = remaining
+        
+        for concept in pending:
             results[concept] = self.resolve_concept_from_dmp(concept)
+        
         return results
     
+    def _fetch_in_chunks(self, cursor, query_template, values, repeat=1):
+        """Run query_template once per chunk of values; each '{}' becomes a '?' list"""
+        rows = []
+        for start in range(0, len(values), BULK_LOOKUP_CHUNK_SIZE):
+            chunk = values[start:start + BULK_LOOKUP_CHUNK_SIZE]
+            placeholders = ', '.join('?' * len(chunk))
+            cursor.execute(query_template.format(*([placeholders] * repeat)), chunk * repeat)
+            rows.extend(cursor.fetchall())
+        return rows
+    
+    def _search_by_exact_match_bulk(self, concept_names):
+        """Fetch exact concept code matches for many concepts, keyed by lowercased code"""
+        if self._ensure_indexes():
+            return {
+                key: self._exact_idx[key]
+                for key in (concept.lower() for concept in concept_names)
+                if key in self._exact_idx
+            }
+        
+        matches = {}
+        try:
+            with get_dmp_db().connection_manager.pooled_connection() as connection:
+                cursor = connection.cursor()
+                
+                if self._detect_database_version(connection) == 'dmp_3_3':
+                    query_template = "SELECT Code, Label, 'DimensionalItem' FROM DimensionalItem WHERE Code IN ({})"
+                    source = 'DimensionalItem'
+                else:
+                    concept_table = get_dmp_db().queries_manager.get_actual_table_name('tConcept')
+                    if concept_table not in get_dmp_db().queries_manager.table_name_set:
+                        return matches
+                    query_template = f"SELECT ConceptCode, ConceptLabel, ConceptType, MetricCode FROM [{concept_table}] WHERE ConceptCode IN ({{}})"
+                    source = 'tConcept'
+                
+                for row in self._fetch_in_chunks(cursor, query_template, concept_names):
+                    if row[0] is None:
+                        continue
+                    # Access compares text case-insensitively, so key the same way
+                    matches.setdefault(str(row[0]).lower(), {
+                        'ConceptCode': row[0],
+                        'ConceptLabel': row[1],
+                        'ConceptType': row[2],
+                        'MetricCode': row[3] if source == 'tConcept' else '',
+                        'source': source
+                    })
+                
+                logger.info(f"✅ Bulk exact match resolved {len(matches)} of {len(concept_names)} concepts")
+                
+        except Exception as e:
+            logger.error(f"Bulk exact match search failed: {e}")
+        
+        return matches
+    
+    def _search_members_bulk(self, concept_names):
+        """Fetch exact MemberCode / MemberXbrlCode matches for many concepts, keyed by lowercased code"""
+        if self._ensure_indexes():
+            return {
+                key: {**self._member_idx[key], 'searchType': 'exact match'}
+                for key in (concept.lower() for concept in concept_names)
+                if key in self._member_idx
+            }
+        
+        matches = {}
+        try:
+            member_table = get_dmp_db().queries_manager.get_actual_table_name('tMember')
+            if member_table not in get_dmp_db().queries_manager.table_name_set:
+                return matches
+            
+            with get_dmp_db().connection_manager.pooled_connection() as connection:
+                cursor = connection.cursor()
+                
+                query_template = (
+                    f"SELECT MemberCode, MemberXbrlCode, MemberLabel FROM [{member_table}] "
+                    f"WHERE MemberCode IN ({{}}) OR MemberXbrlCode IN ({{}})"
+                )
+                for member_code, member_xbrl_code, member_label in self._fetch_in_chunks(cursor, query_template, concept_names, repeat=2):
+                    member = {
+                        'ConceptCode': member_code,
+                        'ConceptLabel': member_label,
+                        'ConceptType': 'Member',
+                        'MemberXbrlCode': member_xbrl_code,
+                        'MetricCode': '',
+                        'source': 'tMember',
+                        'searchType': 'exact match'
+                    }
+                    for key in (member_code, member_xbrl_code):
+                        if key:
+                            matches.setdefault(key.lower(), member)
+                
+                logger.info(f"✅ Bulk member match resolved {len(matches)} member codes for {len(concept_names)} concepts")
+                
+        except Exception as e:
+            logger.error(f"Bulk member search failed: {e}")
+        
+        return matches
+    
     def get_concept_statistics(self):
         """Get statistics about concept resolution"""
         try:
-            connection = dmp_db.connection_manager.get_connection()
-            cursor = connection.cursor()
-            
-            stats = {}
-            
-            # Count concepts
-            concept_table = dmp_db.queries_manager.get_actual_table_name('tConcept')
-            if concept_table in dmp_db.queries_manager.table_mappings.values():
-                cursor.execute(f"SELECT COUNT(*) FROM [{concept_table}]")
-                stats['total_concepts'] = cursor.fetchone()[0]
-            
-            # Count datapoints
-            datapoint_table = dmp_db.queries_manager.get_actual_table_name('tDataPoint')
-            if datapoint_table in dmp_db.queries_manager.table_mappings.values():
-                cursor.execute(f"SELECT COUNT(*) FROM [{datapoint_table}]")
-                stats['total_datapoints'] = cursor.fetchone()[0]
-            
-            # Count members
-            member_table = dmp_db.queries_manager.get_actual_table_name('tMember')
-            if member_table in dmp_db.queries_manager.table_mappings.values():
-                cursor.execute(f"SELECT COUNT(*) FROM [{member_table}]")
-                stats['total_members'] = cursor.fetchone()[0]
-            
-            return stats
-            
+            with get_dmp_db().connection_manager.pooled_connection() as connection:
+                cursor = connection.cursor()
+                
+                available_tables = get_dmp_db().queries_manager.table_name_set
+                counted_tables = {}
+                
+                concept_table = get_dmp_db().queries_manager.get_actual_table_name('tConcept')
+                if concept_table in available_tables:
+                    counted_tables['total_concepts'] = concept_table
+                elif self._detect_database_version(connection) == 'dmp_3_3':
+                    counted_tables['total_concepts'] = 'DimensionalItem'
+                
+                datapoint_table = get_dmp_db().queries_manager.get_actual_table_name('tDataPoint')
+                if datapoint_table in available_tables:
+                    counted_tables['total_datapoints'] = datapoint_table
+                
+                member_table = get_dmp_db().queries_manager.get_actual_table_name('tMember')
+                if member_table in available_tables:
+                    counted_tables['total_members'] = member_table
+                
+                if not counted_tables:
+                    return {}
+                
+                # All counts in a single round trip
+                cursor.execute("SELECT " + ", ".join(
+                    f"(SELECT COUNT(*) FROM [{table}]) AS {stat}" for stat, table in counted_tables.items()
+                ))
+                stats = dict(zip(counted_tables, cursor.fetchone()))
+                
+                return stats
+                
         except Exception as e:
             logger.error(f"Failed to get concept statistics: {e}")
             return {'error': str(e)}
@@ -431,46 +954,72 @@ class DMPConceptResolver:
     def get_member_statistics(self):
         """Get statistics about Member table"""
         try:
-            connection = dmp_db.connection_manager.get_connection()
-            cursor = connection.cursor()
-            
-            member_table = dmp_db.queries_manager.get_actual_table_name('tMember')
-            if member_table not in dmp_db.queries_manager.table_mappings.values():
-                return {'error': 'Member table not found'}
-            
-            # Count total members
-            cursor.execute(f"SELECT COUNT(*) FROM [{member_table}]")
-            total_members = cursor.fetchone()[0]
-            
-            # Count members with XBRL codes
-            cursor.execute(f"SELECT COUNT(*) FROM [{member_table}] WHERE MemberXbrlCode IS NOT NULL AND MemberXbrlCode != ''")
-            members_with_xbrl = cursor.fetchone()[0]
-            
-            # Sample some member codes
-            cursor.execute(f"SELECT TOP 10 MemberCode, MemberXbrlCode FROM [{member_table}] WHERE MemberXbrlCode IS NOT NULL")
-            sample_members = []
-            for row in cursor.fetchall():
-                sample_members.append({
-                    'memberCode': row[0],
-                    'memberXbrlCode': row[1] if len(row) > 1 else ''
-                })
-            
-            return {
-                'total_members': total_members,
-                'members_with_xbrl_codes': members_with_xbrl,
-                'sample_members': sample_members,
-                'table_name': member_table
-            }
-            
+            with get_dmp_db().connection_manager.pooled_connection() as connection:
+                cursor = connection.cursor()
+                
+                member_table = get_dmp_db().queries_manager.get_actual_table_name('tMember')
+                if member_table not in get_dmp_db().queries_manager.table_name_set:
+                    return {'error': 'Member table not found'}
+                
+                # Total members and members with XBRL codes in one pass over the table
+                cursor.execute(
+                    f"SELECT COUNT(*), SUM(IIF(MemberXbrlCode IS NOT NULL AND MemberXbrlCode <> '', 1, 0)) "
+                    f"FROM [{member_table}]"
+                )
+                total_members, members_with_xbrl = cursor.fetchone()[:2]
+                # SUM over an empty table is NULL
+                members_with_xbrl = members_with_xbrl or 0
+                
+                # Sample some member codes
+                cursor.execute(f"SELECT TOP 10 MemberCode, MemberXbrlCode FROM [{member_table}] WHERE MemberXbrlCode IS NOT NULL")
+                sample_members = []
+                for row in cursor.fetchall():
+                    sample_members.append({
+                        'memberCode': row[0],
+                        'memberXbrlCode': row[1] if len(row) > 1 else ''
+                    })
+                
+                return {
+                    'total_members': total_members,
+                    'members_with_xbrl_codes': members_with_xbrl,
+                    'sample_members': sample_members,
+                    'table_name': member_table
+                }
+                
         except Exception as e:
             logger.error(f"Failed to get member statistics: {e}")
             return {'error': str(e)}
     
     def _detect_database_version(self, connection) -> str:
-        """Detect whether this is DMP 3.3 or DMP 4.0 database"""
+        """Detect whether this is DMP 3.3 or DMP 4.0 database, once per connection"""
+        connection_manager = get_dmp_db().connection_manager
+        if connection_manager.db_version is None:
+            connection_manager.db_version = self._probe_database_version(connection)
+        return connection_manager.db_version
+    
+    def _probe_database_version(self, connection) -> str:
+        """Probe the schema for the DMP 3.3 or DMP 4.0 marker table"""
         try:
             cursor = connection.cursor()
             
+            # One catalog listing answers both questions without a failing query per missing table
+            # (MSysObjects is not used: it is usually unreadable without admin rights)
+            try:
+                table_names = {table_info.table_name.lower() for table_info in cursor.tables(tableType='TABLE')}
+            except Exception as e:
+                logger.debug(f"Table catalog unavailable ({e}), probing marker tables directly")
+                table_names = None
+            
+            if table_names is not None:
+                if 'dimensionalitem' in table_names:
+                    logger.debug("✅ Detected DMP 3.3 database - DimensionalItem table found")
+                    return 'dmp_3_3'
+                if 'tconcept' in table_names:
+                    logger.debug("✅ Detected DMP 4.0 database - tConcept table found")
+                    return 'dmp_4_0'
+                logger.warning("⚠️ No DimensionalItem or tConcept table found, defaulting to DMP 3.3")
+                return 'dmp_3_3'
+            
             # Check for DimensionalItem table (DMP 3.3 indicator)
             try:
                 cursor.execute("SELECT TOP 1 * FROM [DimensionalItem]")
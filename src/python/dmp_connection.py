@@ -1,14 +1,72 @@
 
 import pyodbc
 import os
+import queue
 import logging
+from contextlib import contextmanager
 
 logger = logging.getLogger(__name__)
 
+# Idle connections kept for pooled_connection(); extra borrowers open their own and close them on return
+CONNECTION_POOL_SIZE = 4
+
+def _is_connection_error(error):
+    """True for driver errors that leave the connection itself unusable (SQLSTATE class 08)"""
+    if isinstance(error, (pyodbc.OperationalError, pyodbc.InterfaceError)):
+        return True
+    return bool(error.args) and str(error.args[0]).startswith('08')
+
+class _CheckedCursor:
+    """Cursor that marks its borrowed connection broken when a statement hits a connection error"""
+    
+    def __init__(self, cursor, borrowed):
+        self._cursor = cursor
+        self._borrowed = borrowed
+    
+    def execute(self, *args):
+        try:
+            self._cursor.execute(*args)
+        except pyodbc.Error as e:
+            # Callers often swallow SQL errors; record the broken connection before they do
+            if _is_connection_error(e):
+                self._borrowed.invalidate()
+            raise
+        return self
+    
+    def __iter__(self):
+        return iter(self._cursor)
+    
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class _BorrowedConnection:
+    """
+    Connection handed out by pooled_connection(). Call invalidate() to keep it out of
+    the pool; cursors do so themselves when a statement hits a connection error.
+    """
+    
+    def __init__(self, connection):
+        self._connection = connection
+        self.broken = False
+    
+    def invalidate(self):
+        self.broken = True
+    
+    def cursor(self):
+        return _CheckedCursor(self._connection.cursor(), self)
+    
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
 class DMPConnection:
     def __init__(self, db_path):
         self.db_path = db_path
         self.connection = None
+        # 'dmp_3_3' / 'dmp_4_0', detected once per open connection by the concept resolver
+        self.db_version = None
+        self._pool = queue.Queue(maxsize=CONNECTION_POOL_SIZE)
+        # Bumped by close_connection(); connections borrowed before that are closed on return
+        self._pool_generation = 0
         
     def get_connection_string(self):
         """Get the connection string for the Access database"""
@@ -26,6 +84,44 @@ class DMPConnection:
             self.connection = pyodbc.connect(conn_str)
         return self.connection
     
+    @contextmanager
+    def pooled_connection(self):
+        """
+        Borrow a connection from the pool for the duration of a with-block.
+        Never blocks: when no idle connection is available a new one is opened,
+        so concurrent (and nested) borrowers each get their own connection.
+        A connection whose with-block raised a pyodbc.Error, or that was invalidated
+        (see _BorrowedConnection), is closed instead of pooled.
+        """
+        generation = self._pool_generation
+        try:
+            connection = self._pool.get_nowait()
+        except queue.Empty:
+            connection = pyodbc.connect(self.get_connection_string(), autocommit=True)
+        borrowed = _BorrowedConnection(connection)
+        try:
+            yield borrowed
+        except pyodbc.Error:
+            # The connection may be broken; don't hand it to the next borrower
+            borrowed.invalidate()
+            raise
+        finally:
+            if borrowed.broken or generation != self._pool_generation:
+                self._close_quietly(connection)
+            else:
+                try:
+                    self._pool.put_nowait(connection)
+                except queue.Full:
+                    connection.close()
+    
+    @staticmethod
+    def _close_quietly(connection):
+        """Close a connection that may already be broken"""
+        try:
+            connection.close()
+        except pyodbc.Error as e:
+            logger.debug(f"Ignoring error closing discarded connection: {e}")
+    
     def test_connection(self):
         """Test database connection with detailed diagnostics"""
         try:
@@ -77,3 +173,11 @@ class DMPConnection:
         if self.connection:
             self.connection.close()
             self.connection = None
+        # Connections still borrowed are closed when they come back rather than pooled
+        self._pool_generation += 1
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+        self.db_version = None
@@ -1,6 +1,7 @@
 
 import logging
 import os
+import threading
 from dmp_connection import DMPConnection
 from dmp_discovery import DMPDiscovery
 from dmp_queries import DMPQueries
@@ -47,7 +48,7 @@ class DMPDatabase:
             logger.info(f"🔄 Switching to DMP 4.0 database (default for unknown architecture: {architecture_version})")
         
         if old_path != self.db_path:
-            # Reinitialize components with new database
+            # Reinitialize components with new database (closing also forgets the detected version)
             self.connection_manager.close_connection()
             self.connection_manager = DMPConnection(self.db_path)
             self.discovery_manager = DMPDiscovery(self.connection_manager)
@@ -84,5 +85,22 @@ class DMPDatabase:
         """Close database connection"""
         self.connection_manager.close_connection()
 
-# Global instance
-dmp_db = DMPDatabase()
+# Global instance, created on first use: DMPQueries discovers the table layout
+# (opening the database) as soon as it is constructed
+_dmp_db = None
+_dmp_db_lock = threading.Lock()
+
+def get_dmp_db():
+    """Return the shared DMPDatabase, creating it on first call"""
+    global _dmp_db
+    if _dmp_db is None:
+        with _dmp_db_lock:
+            if _dmp_db is None:
+                _dmp_db = DMPDatabase()
+    return _dmp_db
+
+def __getattr__(name):
+    # Keep `from dmp_database import dmp_db` working for existing callers
+    if name == 'dmp_db':
+        return get_dmp_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
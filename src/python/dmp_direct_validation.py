@@ -1,18 +1,83 @@
+import copy
 import json
 import time
 import logging
-from flask import request, jsonify
-from dmp_database import dmp_db
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import current_app, request, jsonify
+from dmp_database import get_dmp_db
 from validation_logic import ValidationProcessor
 from taxonomy_dependency_manager import EBATaxonomyDependencyManager
 import os
+import re
+import xml.etree.ElementTree as ET
 from werkzeug.utils import secure_filename
 
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # lxml is optional; facts are read with ElementTree instead
+    lxml_etree = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to Flask's jsonify
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Copy buffer for saving uploaded instances
+UPLOAD_COPY_CHUNK_SIZE = 1024 * 1024
+
+# Plain decimal fact values (optionally negative)
+_NUMERIC_VALUE_RE = re.compile(r'-?\d+(?:\.\d+)?')
+
+# Result messages reporting a missing concept; searched without lowercasing each message
+_MISSING_RE = re.compile(r'missing', re.IGNORECASE)
+
+# Facts read from an instance for DMP-only validation, which checks no more than this;
+# parsing stops once this many are found
+FACT_EXTRACTION_LIMIT = 20
+
+# Completed validations keyed on (content digest, filename, mode, table code, database, package stamp);
+# resubmitting an unchanged instance returns the earlier result in a fresh envelope.
+# Entries are (result, envelope extras) and are deep-copied in and out, so callers can't alter them
+VALIDATION_CACHE_SIZE = 64
+_validation_cache = OrderedDict()
+_validation_cache_lock = threading.Lock()
+
+def _spooled_upload_path(stream):
+    """
+    Path of an upload stream that is a named file on disk, else None.
+    Only the public file API is used: in-memory streams have no name, and
+    unnamed temporary files report an integer descriptor instead of a path.
+    """
+    try:
+        name = stream.name
+    except (AttributeError, ValueError):
+        return None
+    if isinstance(name, str) and os.path.isfile(name):
+        return name
+    return None
+
+def _make_response(success, result, processing_time, **extras):
+    """Validation response envelope; the result is stamped with the response time here"""
+    result['timestamp'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    return {
+        'success': success,
+        'result': result,
+        'processingTime': processing_time,
+        **extras
+    }
+
+def clear_dmp_cache():
+    """Forget cached validation responses"""
+    with _validation_cache_lock:
+        _validation_cache.clear()
+
 class DMPDirectValidator:
     def __init__(self):
-        self.dmp_db = dmp_db
+        self.dmp_db = get_dmp_db()
         self.dep_manager = EBATaxonomyDependencyManager()
         
     def validate_dmp_direct(self, instance_file, validation_mode='fast', table_code=None):
@@ -29,16 +94,14 @@ class DMPDirectValidator:
             
             # Enhanced file saving with permission handling
             try:
-                instance_file.save(instance_path)
-                # Ensure file permissions are correct
-                os.chmod(instance_path, 0o644)
+                content_digest = self._save_instance_file(instance_file, instance_path)
                 logger.info(f"✅ Instance file saved: {instance_path}")
             except PermissionError as e:
                 logger.error(f"❌ Permission denied saving file: {e}")
                 # Try alternative upload directory
                 alt_path = os.path.join(os.path.expanduser("~"), "temp_xbrl_uploads", instance_filename)
                 os.makedirs(os.path.dirname(alt_path), exist_ok=True)
-                instance_file.save(alt_path)
+                content_digest = self._save_instance_file(instance_file, alt_path)
                 instance_path = alt_path
                 logger.info(f"✅ Used alternative path: {alt_path}")
             except Exception as e:
@@ -56,6 +119,20 @@ class DMPDirectValidator:
             if not dependency_status:
                 logger.warning("⚠️ Some taxonomy packages are missing - validation may have missing concepts")
             
+            # With all packages resolved the outcome only depends on the inputs below
+            cache_key = None
+            if dependency_status:
+                cache_key = (content_digest, instance_filename, validation_mode, table_code,
+                             self.dmp_db.db_path, self.dep_manager.package_dirs_stamp())
+                with _validation_cache_lock:
+                    cached = _validation_cache.get(cache_key)
+                    if cached is not None:
+                        _validation_cache.move_to_end(cache_key)
+                if cached is not None:
+                    logger.info(f"⚡ Returning cached validation result for unchanged {instance_filename}")
+                    result, extras = cached
+                    return _make_response(True, copy.deepcopy(result), time.time() - start_time, **extras)
+            
             # Use enhanced validation processor
             processor = ValidationProcessor()
             
@@ -78,14 +155,15 @@ class DMPDirectValidator:
             
             # Check if we still have missing concepts - provide download instructions
             dmp_results = processed_results.get('dmpResults', [])
-            missing_concept_results = [r for r in dmp_results if 'missing' in r.get('message', '').lower()]
+            missing_concept_count = sum(1 for r in dmp_results if _MISSING_RE.search(r.get('message', '')))
             
-            if missing_concept_results:
-                logger.warning(f"⚠️ Still have {len(missing_concept_results)} missing concepts")
+            if missing_concept_count:
+                logger.warning(f"⚠️ Still have {missing_concept_count} missing concepts")
                 
                 # Analyze missing concepts and provide instructions
-                full_output = (validation_result.stdout or "") + (validation_result.stderr or "")
-                missing_analysis = self.dep_manager.analyze_missing_concepts(full_output)
+                missing_analysis = self.dep_manager.analyze_missing_concepts(
+                    (validation_result.stdout, validation_result.stderr)
+                )
                 required_packages, missing_packages = self.dep_manager.check_required_dependencies(missing_analysis)
                 
                 if missing_packages:
@@ -139,40 +217,47 @@ class DMPDirectValidator:
             processing_time = time.time() - start_time
             
             # Build comprehensive response with dependency information
-            return {
-                'success': True,
-                'result': {
-                    'isValid': processed_results.get('isValid', False),
-                    'status': processed_results.get('status', 'invalid'),
-                    'errors': processed_results.get('errors', []),
-                    'dmpResults': dmp_results,
-                    'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                    'filesProcessed': {
-                        'instanceFile': instance_filename,
-                        'taxonomyFile': f'Enhanced EBA Validation (DMP-Direct + Dependencies)'
-                    },
-                    'validationStats': {
-                        'totalRules': len(dmp_results),
-                        'passedRules': stats.get('passedRules', 0),
-                        'failedRules': stats.get('failedRules', 0),
-                        'totalErrorsDetected': total_errors,
-                        'totalWarningsDetected': stats.get('totalWarningsDetected', 0),
-                        'missingConcepts': missing_concepts,
-                        'businessRuleErrors': business_errors,
-                        'loadingErrors': loading_errors,
-                        'dmpEnhanced': True,
-                        'dependencyStatus': 'resolved' if dependency_status else 'incomplete'
-                    },
-                    'dependencyInfo': {
-                        'status': 'resolved' if dependency_status else 'incomplete',
-                        'availablePackages': len(available_packages),
-                        'instructions': processed_results.get('dependencyInstructions'),
-                        'missingPackages': processed_results.get('missingPackages', [])
-                    }
+            response = _make_response(True, {
+                'isValid': processed_results.get('isValid', False),
+                'status': processed_results.get('status', 'invalid'),
+                'errors': processed_results.get('errors', []),
+                'dmpResults': dmp_results,
+                'filesProcessed': {
+                    'instanceFile': instance_filename,
+                    'taxonomyFile': f'Enhanced EBA Validation (DMP-Direct + Dependencies)'
                 },
-                'processingTime': processing_time,
-                'validationEngine': f'Enhanced Arelle + DMP Direct + Dependency Resolution (v2.0)'
-            }
+                'validationStats': {
+                    'totalRules': len(dmp_results),
+                    'passedRules': stats.get('passedRules', 0),
+                    'failedRules': stats.get('failedRules', 0),
+                    'totalErrorsDetected': total_errors,
+                    'totalWarningsDetected': stats.get('totalWarningsDetected', 0),
+                    'missingConcepts': missing_concepts,
+                    'businessRuleErrors': business_errors,
+                    'loadingErrors': loading_errors,
+                    'dmpEnhanced': True,
+                    'dependencyStatus': 'resolved' if dependency_status else 'incomplete'
+                },
+                'dependencyInfo': {
+                    'status': 'resolved' if dependency_status else 'incomplete',
+                    'availablePackages': len(available_packages),
+                    'instructions': processed_results.get('dependencyInstructions'),
+                    'missingPackages': processed_results.get('missingPackages', [])
+                }
+            }, processing_time,
+                validationEngine='Enhanced Arelle + DMP Direct + Dependency Resolution (v2.0)'
+            )
+            
+            if cache_key is not None:
+                extras = {key: value for key, value in response.items()
+                          if key not in ('success', 'result', 'processingTime')}
+                entry = (copy.deepcopy(response['result']), extras)
+                with _validation_cache_lock:
+                    _validation_cache[cache_key] = entry
+                    if len(_validation_cache) > VALIDATION_CACHE_SIZE:
+                        _validation_cache.popitem(last=False)
+            
+            return response
             
         except Exception as e:
             processing_time = time.time() - start_time
@@ -189,29 +274,25 @@ class DMPDirectValidator:
                 'severity': 'error'
             }
             
-            return {
-                'success': False,
-                'error': f'Enhanced validation failed: {str(e)}',
-                'result': {
-                    'isValid': False,
-                    'status': 'invalid',
-                    'errors': [{'message': str(e), 'severity': 'error'}],
-                    'dmpResults': [error_dmp_result],
-                    'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                    'filesProcessed': {
-                        'instanceFile': getattr(instance_file, 'filename', 'unknown'),
-                        'taxonomyFile': 'Error during enhanced processing'
-                    },
-                    'validationStats': {
-                        'totalRules': 1,
-                        'passedRules': 0,
-                        'failedRules': 1,
-                        'totalErrorsDetected': 1,
-                        'dependencyStatus': 'error'
-                    }
+            return _make_response(False, {
+                'isValid': False,
+                'status': 'invalid',
+                'errors': [{'message': str(e), 'severity': 'error'}],
+                'dmpResults': [error_dmp_result],
+                'filesProcessed': {
+                    'instanceFile': getattr(instance_file, 'filename', 'unknown'),
+                    'taxonomyFile': 'Error during enhanced processing'
                 },
-                'processingTime': processing_time,
-                'troubleshooting': {
+                'validationStats': {
+                    'totalRules': 1,
+                    'passedRules': 0,
+                    'failedRules': 1,
+                    'totalErrorsDetected': 1,
+                    'dependencyStatus': 'error'
+                }
+            }, processing_time,
+                error=f'Enhanced validation failed: {str(e)}',
+                troubleshooting={
                     'common_issues': [
                         'Missing EBA taxonomy packages',
                         'Arelle not properly configured',
@@ -226,18 +307,54 @@ class DMPDirectValidator:
                         'Test with simpler XBRL file'
                     ]
                 }
-            }
+            )
+    
+    def _save_instance_file(self, instance_file, destination_path):
+        """
+        Save an upload with 0o644 permissions and return its blake2b content digest.
+        An upload already spooled to disk is hard-linked into place and hashed by reading it;
+        otherwise (in-memory upload, or linking fails e.g. across filesystems)
+        it is streamed to disk with a large buffer and hashed on the way.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        source_path = _spooled_upload_path(instance_file.stream)
+        if source_path is not None:
+            link_path = f"{destination_path}.{os.getpid()}.{threading.get_ident()}.link"
+            try:
+                instance_file.stream.flush()
+                os.link(source_path, link_path)
+                os.chmod(link_path, 0o644)
+                os.replace(link_path, destination_path)
+                with open(destination_path, 'rb') as src:
+                    for chunk in iter(lambda: src.read(UPLOAD_COPY_CHUNK_SIZE), b''):
+                        digest.update(chunk)
+                return digest.hexdigest()
+            except OSError as e:
+                logger.debug(f"Could not link spooled upload, copying instead: {e}")
+                try:
+                    os.remove(link_path)
+                except OSError:
+                    pass
+            instance_file.stream.seek(0)
+        
+        fd = os.open(destination_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+        with os.fdopen(fd, 'wb') as dst:
+            for chunk in iter(lambda: instance_file.stream.read(UPLOAD_COPY_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                dst.write(chunk)
+        return digest.hexdigest()
     
     def _get_dmp_context(self, table_code):
         """Get DMP context for the specified table"""
         try:
+            # DMPQueries caches both per table code for SEARCH_CACHE_TTL seconds
             concepts = self.dmp_db.get_table_concepts(table_code)
             validation_rules = self.dmp_db.get_validation_rules(table_code)
             
             return {
                 'table_code': table_code,
-                'concepts': concepts[:50],  # Limit for performance
-                'validation_rules': validation_rules[:20]  # Limit for performance
+                'concepts': list(concepts[:50]),  # Limit for performance
+                'validation_rules': list(validation_rules[:20])  # Limit for performance
             }
         except Exception as e:
             logger.warning(f"Could not get DMP context: {str(e)}")
@@ -247,8 +364,11 @@ class DMPDirectValidator:
                 'validation_rules': []
             }
     
-    def _fast_dmp_validation(self, instance_path, instance_filename, table_code):
-        """Fast validation using only DMP database rules"""
+    def _fast_dmp_validation(self, instance_path, instance_filename, table_code, verbose=True):
+        """
+        Fast validation using only DMP database rules.
+        With verbose=False only failing facts get a result entry; the statistics still count every fact.
+        """
         start_time = time.time()
         
         try:
@@ -267,20 +387,30 @@ class DMPDirectValidator:
             
             # Apply DMP rules to facts
             dmp_results = []
-            errors = []
+            # Created on the first failure; most instances have none
+            errors = None
+            # Tallied while building the results rather than re-scanning them afterwards
+            checked_count = 0
+            failed_count = 0
+            rule_type_counts = {}
             
             # Simulate DMP validation results
-            for i, fact in enumerate(facts[:20]):  # Limit for performance
+            for i, fact in enumerate(facts[:FACT_EXTRACTION_LIMIT]):  # Limit for performance
                 concept_code = fact.get('concept', f'concept_{i}')
                 value = fact.get('value', '')
+                rule_type = 'completeness'
+                checked_count += 1
+                rule_type_counts[rule_type] = rule_type_counts.get(rule_type, 0) + 1
+                
+                status = 'Passed' if value else 'Failed'
+                if status == 'Passed' and not verbose:
+                    continue
                 
                 # Create validation result
-                if value and str(value).replace('.', '').replace('-', '').isdigit():
-                    status = 'Passed'
+                if value and _NUMERIC_VALUE_RE.fullmatch(value):
                     severity = 'info'
                     message = f'Numeric value {value} validated for concept {concept_code}'
                 else:
-                    status = 'Failed' if not value else 'Passed'
                     severity = 'error' if not value else 'info'
                     message = f'Value validation for concept {concept_code}: {value or "missing"}'
                 
@@ -290,7 +420,7 @@ class DMPDirectValidator:
                     'status': status,
                     'message': message,
                     'annotation': f'DMP database validation for {concept_code}',
-                    'ruleType': 'completeness',
+                    'ruleType': rule_type,
                     'severity': severity,
                     'value': value
                 }
@@ -298,6 +428,9 @@ class DMPDirectValidator:
                 dmp_results.append(dmp_result)
                 
                 if status == 'Failed':
+                    failed_count += 1
+                    if errors is None:
+                        errors = []
                     errors.append({
                         'message': message,
                         'severity': severity,
@@ -305,34 +438,29 @@ class DMPDirectValidator:
                         'concept': concept_code
                     })
             
-            failed_count = len([r for r in dmp_results if r['status'] == 'Failed'])
             is_valid = failed_count == 0
             
             processing_time = time.time() - start_time
             
-            return {
-                'success': True,
-                'result': {
-                    'isValid': is_valid,
-                    'status': 'valid' if is_valid else 'invalid',
-                    'errors': errors,
-                    'dmpResults': dmp_results,
-                    'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                    'filesProcessed': {
-                        'instanceFile': instance_filename,
-                        'taxonomyFile': 'DMP Database (Direct)'
-                    },
-                    'validationStats': {
-                        'totalRules': len(dmp_results),
-                        'passedRules': len(dmp_results) - failed_count,
-                        'failedRules': failed_count,
-                        'formulasChecked': len([r for r in dmp_results if r.get('ruleType') == 'formula']),
-                        'dimensionsValidated': len([r for r in dmp_results if r.get('ruleType') == 'dimensional'])
-                    }
+            return _make_response(True, {
+                'isValid': is_valid,
+                'status': 'valid' if is_valid else 'invalid',
+                'errors': errors or [],
+                'dmpResults': dmp_results,
+                'filesProcessed': {
+                    'instanceFile': instance_filename,
+                    'taxonomyFile': 'DMP Database (Direct)'
                 },
-                'processingTime': processing_time,
-                'validationEngine': 'DMP Direct (Fast Mode)'
-            }
+                'validationStats': {
+                    'totalRules': checked_count,
+                    'passedRules': checked_count - failed_count,
+                    'failedRules': failed_count,
+                    'formulasChecked': rule_type_counts.get('formula', 0),
+                    'dimensionsValidated': rule_type_counts.get('dimensional', 0)
+                }
+            }, processing_time,
+                validationEngine='DMP Direct (Fast Mode)'
+            )
             
         except Exception as e:
             processing_time = time.time() - start_time
@@ -347,33 +475,49 @@ class DMPDirectValidator:
         return self._fast_dmp_validation(instance_path, instance_filename, table_code)
     
     def _extract_xbrl_facts(self, instance_path):
-        """Extract facts from XBRL instance file"""
+        """
+        Extract facts (elements carrying a contextRef) from an XBRL instance file,
+        streaming the document and stopping after FACT_EXTRACTION_LIMIT facts
+        """
         facts = []
         
         try:
-            # Simple XML parsing to extract basic facts
-            import xml.etree.ElementTree as ET
-            
-            tree = ET.parse(instance_path)
-            root = tree.getroot()
-            
-            # Find all elements that look like facts
-            for elem in root.iter():
-                if elem.text and elem.tag and not elem.tag.startswith('{'):
-                    if ':' in elem.tag:
-                        concept = elem.tag.split(':')[-1]
-                    else:
-                        concept = elem.tag
-                    
+            if lxml_etree is not None:
+                events = lxml_etree.iterparse(instance_path, events=('end',), huge_tree=True, recover=True)
+            else:
+                events = ET.iterparse(instance_path, events=('start', 'end'))
+            
+            root = None
+            for event, elem in events:
+                if event == 'start':
+                    # ElementTree has no parent links; the root is kept to drop finished children
+                    if root is None:
+                        root = elem
+                    continue
+                
+                context_ref = elem.get('contextRef')
+                if context_ref is not None and elem.text:
                     facts.append({
-                        'concept': concept,
+                        'concept': self._local_name(elem),
                         'value': elem.text.strip(),
-                        'context': elem.get('contextRef', ''),
+                        'context': context_ref,
                         'unit': elem.get('unitRef', '')
                     })
+                    if len(facts) >= FACT_EXTRACTION_LIMIT:
+                        break
+                
+                # Processed elements are not needed again; keep memory flat on large instances
+                if lxml_etree is not None:
+                    elem.clear(keep_tail=True)
+                    while elem.getprevious() is not None:
+                        del elem.getparent()[0]
+                else:
+                    elem.clear()
+                    if elem is not root:
+                        del root[:]
             
             logger.info(f"Extracted {len(facts)} facts from XBRL instance")
-            return facts[:50]  # Limit for performance
+            return facts
             
         except Exception as e:
             logger.warning(f"Could not parse XBRL facts: {str(e)}")
@@ -384,6 +528,12 @@ class DMPDirectValidator:
                 {'concept': 'Equity', 'value': '200000', 'context': 'ctx1', 'unit': 'EUR'}
             ]
     
+    def _local_name(self, elem):
+        """Element name without its namespace"""
+        if lxml_etree is not None:
+            return lxml_etree.QName(elem).localname
+        return elem.tag.rpartition('}')[2]
+    
     def _get_general_dmp_rules(self):
         """Get general DMP validation rules when no specific table is selected"""
         return [
@@ -401,6 +551,32 @@ class DMPDirectValidator:
             }
         ]
 
+# Shared validator: it keeps no per-request state, and reusing it avoids building a new
+# dependency manager (and re-creating its package folders) on every request
+_validator = None
+_validator_lock = threading.Lock()
+
+def get_dmp_direct_validator():
+    """Return the shared DMPDirectValidator, creating it on first call"""
+    global _validator
+    if _validator is None:
+        with _validator_lock:
+            if _validator is None:
+                _validator = DMPDirectValidator()
+    return _validator
+
+def _json_response(payload, status=200):
+    """Serialize a (possibly large) response payload with orjson when available"""
+    if orjson is not None:
+        try:
+            body = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # Values orjson cannot encode (e.g. Decimal from the DMP database) go through jsonify
+            pass
+        else:
+            return current_app.response_class(body, mimetype='application/json'), status
+    return jsonify(payload), status
+
 def handle_validate_dmp_direct():
     """Enhanced Flask endpoint for DMP-direct validation with dependency resolution"""
     try:
@@ -425,10 +601,9 @@ def handle_validate_dmp_direct():
         logger.info(f"Mode: {validation_mode}")
         logger.info(f"Expected: Dependency resolution + comprehensive DMP results")
         
-        validator = DMPDirectValidator()
-        result = validator.validate_dmp_direct(instance_file, validation_mode, table_code)
+        result = get_dmp_direct_validator().validate_dmp_direct(instance_file, validation_mode, table_code)
         
-        return jsonify(result), 200 if result.get('success') else 500
+        return _json_response(result, 200 if result.get('success') else 500)
         
     except Exception as e:
         logger.error(f"❌ Enhanced DMP-direct validation endpoint failed: {str(e)}")
@@ -1,8 +1,14 @@
 
+import time
 import logging
+import functools
 
 logger = logging.getLogger(__name__)
 
+# Seconds a table listing is reused before the catalog is queried again
+TABLE_LIST_TTL = 300
+TABLE_STRUCTURE_CACHE_SIZE = 128
+
 class DMPDiscovery:
     def __init__(self, connection_manager):
         self.connection_manager = connection_manager
@@ -11,9 +17,23 @@ class DMPDiscovery:
             'Member', 'Metric', 'Axis', 'ValidationRules', 'BusinessRules',
             'DataPoint', 'Hierarchy', 'DimensionalStructure'
         ]
+        # Catalog calls are slow and the schema does not change while the process runs
+        self._tables_cache = None  # (monotonic timestamp, tuple of table names)
+        self._cached_table_structure = functools.lru_cache(maxsize=TABLE_STRUCTURE_CACHE_SIZE)(
+            self._read_table_structure
+        )
+    
+    def refresh(self):
+        """Forget cached table listings and column structures"""
+        self._tables_cache = None
+        self._cached_table_structure.cache_clear()
     
     def discover_tables(self):
         """Discover available tables in the database"""
+        cached = self._tables_cache
+        if cached is not None and time.monotonic() - cached[0] < TABLE_LIST_TTL:
+            return list(cached[1])
+        
         try:
             connection = self.connection_manager.get_connection()
             cursor = connection.cursor()
@@ -26,6 +46,8 @@ class DMPDiscovery:
                     tables.append(table_name)
             
             logger.info(f"Discovered {len(tables)} tables in DMP 4.0 database")
+            if tables:
+                self._tables_cache = (time.monotonic(), tuple(tables))
             return tables
             
         except Exception as e:
@@ -37,41 +59,75 @@ class DMPDiscovery:
         available_tables = self.discover_tables()
         dmp_tables_found = {}
         
+        # Lowercased once; the first table wins if two names differ only in case
+        lowercase_tables = {}
+        for table in available_tables:
+            lowercase_tables.setdefault(table.lower(), table)
+        
         for expected_table in self.dmp_4_0_tables:
-            # Check exact match first
-            if expected_table in available_tables:
-                dmp_tables_found[expected_table] = expected_table
+            expected_lower = expected_table.lower()
+            # Check exact (case-insensitive) match first
+            table = lowercase_tables.get(expected_lower)
+            if table is not None:
+                dmp_tables_found[expected_table] = table
             else:
-                # Check for similar names (case variations, prefixes, etc.)
-                for table in available_tables:
-                    if expected_table.lower() in table.lower():
+                # Check for similar names (prefixes, suffixes, etc.)
+                for table_lower, table in lowercase_tables.items():
+                    if expected_lower in table_lower:
                         dmp_tables_found[expected_table] = table
                         break
         
         logger.info(f"DMP 4.0 structure analysis: {len(dmp_tables_found)} standard tables found")
         return dmp_tables_found, available_tables
     
+    def _read_table_structure(self, table_name):
+        """Column structure straight from the ODBC catalog; errors propagate so they are not cached"""
+        connection = self.connection_manager.get_connection()
+        cursor = connection.cursor()
+        
+        return tuple(
+            (column.column_name, column.type_name, column.column_size, column.nullable)
+            for column in cursor.columns(table=table_name)
+        )
+    
     def get_table_structure(self, table_name):
         """Get column structure for a specific table"""
         try:
-            connection = self.connection_manager.get_connection()
-            cursor = connection.cursor()
-            
-            columns = []
-            for column in cursor.columns(table=table_name):
-                columns.append({
-                    'name': column.column_name,
-                    'type': column.type_name,
-                    'size': column.column_size,
-                    'nullable': column.nullable
-                })
-            
-            return columns
+            return [
+                {'name': name, 'type': type_name, 'size': size, 'nullable': nullable}
+                for name, type_name, size, nullable in self._cached_table_structure(table_name)
+            ]
             
         except Exception as e:
             logger.error(f"Failed to get structure for table {table_name}: {str(e)}")
             return []
     
+    def _count_rows(self, cursor, sampled_tables):
+        """
+        Row counts for (table_type, actual_table) pairs in one round-trip.
+        Falls back to one query per table if the combined statement fails;
+        a table whose count fails maps to the exception instead.
+        """
+        if not sampled_tables:
+            return {}
+        
+        try:
+            cursor.execute("SELECT " + ", ".join(
+                f"(SELECT COUNT(*) FROM [{actual_table}])" for _, actual_table in sampled_tables
+            ))
+            return dict(zip((table_type for table_type, _ in sampled_tables), cursor.fetchone()))
+        except Exception as e:
+            logger.warning(f"Combined row count failed, counting tables one by one: {e}")
+        
+        row_counts = {}
+        for table_type, actual_table in sampled_tables:
+            try:
+                cursor.execute(f"SELECT COUNT(*) FROM [{actual_table}]")
+                row_counts[table_type] = cursor.fetchone()[0]
+            except Exception as e:
+                row_counts[table_type] = e
+        return row_counts
+    
     def get_enhanced_connection_status(self):
         """Get enhanced connection status with DMP 4.0 structure analysis"""
         base_status = self.connection_manager.test_connection()
@@ -85,28 +141,28 @@ class DMPDiscovery:
                 connection = self.connection_manager.get_connection()
                 cursor = connection.cursor()
                 
-                table_info = []
-                
-                # Test ValidationRules table specifically
+                # ValidationRules first, then up to five other key tables
+                sampled_tables = []
                 if 'ValidationRules' in dmp_tables_found:
-                    try:
-                        actual_table = dmp_tables_found['ValidationRules']
-                        cursor.execute(f"SELECT COUNT(*) FROM [{actual_table}]")
-                        count = cursor.fetchone()[0]
-                        table_info.append({"table": "ValidationRules", "rows": count, "status": "available"})
-                        logger.info(f"✅ ValidationRules table found with {count} rules")
-                    except Exception as e:
-                        table_info.append({"table": "ValidationRules", "rows": 0, "status": "error", "error": str(e)})
-                
-                # Test other key tables
+                    sampled_tables.append(('ValidationRules', dmp_tables_found['ValidationRules']))
                 for table_type, actual_table in list(dmp_tables_found.items())[:5]:
                     if table_type != 'ValidationRules':
-                        try:
-                            cursor.execute(f"SELECT COUNT(*) FROM [{actual_table}]")
-                            count = cursor.fetchone()[0]
-                            table_info.append({"table": table_type, "rows": count, "status": "available"})
-                        except Exception as e:
-                            table_info.append({"table": table_type, "rows": 0, "status": "error"})
+                        sampled_tables.append((table_type, actual_table))
+                
+                row_counts = self._count_rows(cursor, sampled_tables)
+                
+                table_info = []
+                for table_type, _ in sampled_tables:
+                    count = row_counts[table_type]
+                    if isinstance(count, Exception):
+                        entry = {"table": table_type, "rows": 0, "status": "error"}
+                        if table_type == 'ValidationRules':
+                            entry["error"] = str(count)
+                        table_info.append(entry)
+                    else:
+                        table_info.append({"table": table_type, "rows": count, "status": "available"})
+                        if table_type == 'ValidationRules':
+                            logger.info(f"✅ ValidationRules table found with {count} rules")
                 
                 base_status.update({
                     "message": f"Connected to DMP 4.0 database with {len(dmp_tables_found)} standard tables",
@@ -1,17 +1,61 @@
+import time
 import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 import pyodbc
 
 logger = logging.getLogger(__name__)
 
+# Search, rule and table concept lookups per (method, term, limit); the DMP database is opened read-only, but the file
+# can be replaced on disk, so entries are dropped after SEARCH_CACHE_TTL seconds
+SEARCH_CACHE_SIZE = 256
+SEARCH_CACHE_TTL = 60.0
+
+# search_concepts scans the concept, datapoint and member tables concurrently on pooled connections
+PARALLEL_SEARCH = True
+
+def _top_bucket(count):
+    """
+    Row count for a TOP clause: the next power of two, at least 8. Access can't bind TOP as a
+    parameter, so bucketing keeps the cached SQL texts to a handful per query.
+    """
+    return max(8, 1 << (max(count, 1) - 1).bit_length())
+
 class DMPQueries:
     def __init__(self, connection_manager, discovery_manager):
         self.connection_manager = connection_manager
         self.discovery_manager = discovery_manager
         self.table_mappings = {}
+        self._search_cache = OrderedDict()
+        self._search_cache_lock = threading.Lock()
+        # Detected once; the database behind this instance does not change
+        self._db_version = None
+        # SQL text per (query, table, TOP bucket, operator); tables are fixed once mappings are discovered
+        self._sql_cache = {}
         self._discover_table_mappings()
     
+    @property
+    def table_mappings(self):
+        return self._table_mappings
+    
+    @table_mappings.setter
+    def table_mappings(self, mappings):
+        self._table_mappings = mappings
+        self._table_name_set = None
+    
+    @property
+    def table_name_set(self):
+        """Actual names of the mapped tables, for O(1) 'is this table available' checks"""
+        if self._table_name_set is None:
+            self._table_name_set = frozenset(self._table_mappings.values())
+        return self._table_name_set
+    
     def _discover_table_mappings(self):
         """Discover actual table names in the database"""
+        available_tables = []
         try:
             available_tables = self.discovery_manager.discover_tables()
             
@@ -25,11 +69,16 @@ class DMPQueries:
                 'tMember': ['tMember', 'Member', 'members', 'tbl_Member']
             }
             
+            # Case-insensitive lookup; the first table wins if two names differ only in case
+            lower_to_actual = {}
+            for table in available_tables:
+                lower_to_actual.setdefault(table.lower(), table)
+            
             for expected_name, possible_names in expected_tables.items():
                 actual_name = None
                 for possible_name in possible_names:
-                    if any(possible_name.lower() == table.lower() for table in available_tables):
-                        actual_name = next(table for table in available_tables if table.lower() == possible_name.lower())
+                    actual_name = lower_to_actual.get(possible_name.lower())
+                    if actual_name:
                         break
                 
                 if actual_name:
@@ -40,6 +89,67 @@ class DMPQueries:
             
         except Exception as e:
             logger.error(f"Failed to discover table mappings: {e}")
+        
+        # Discovery already tells DMP 3.3 from 4.0 when it found DimensionalItem or tConcept;
+        # same precedence as _detect_database_version, any other schema is left to its probes
+        if available_tables:
+            lowercase_tables = {table.lower() for table in available_tables}
+            if 'dimensionalitem' in lowercase_tables:
+                self._db_version = 'dmp_3_3'
+            elif 'tconcept' in lowercase_tables:
+                self._db_version = 'dmp_4_0'
+        
+        # Mappings were filled in place; rebuild the name set and query texts on next use
+        self._table_name_set = None
+        self._sql_cache.clear()
+        self.clear_search_cache()
+    
+    @contextmanager
+    def _cursor(self):
+        """Cursor on a pooled connection for the duration of a with-block"""
+        with self.connection_manager.pooled_connection() as connection:
+            cursor = connection.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+    
+    def _get_sql(self, key, builder):
+        """Return the SQL text cached under key, building it on first use"""
+        sql = self._sql_cache.get(key)
+        if sql is None:
+            sql = self._sql_cache[key] = builder()
+        return sql
+    
+    def _search_key(self, kind, search_term, *args):
+        """Cache key for a lookup; Access compares text case-insensitively, so the term is lowercased"""
+        return (kind, search_term.lower() if isinstance(search_term, str) else search_term) + args
+    
+    def _cached_search(self, cache_key):
+        """Copy of a cached, unexpired search result, or None"""
+        with self._search_cache_lock:
+            cached = self._search_cache.get(cache_key)
+            if cached is None:
+                return None
+            stored_at, results = cached
+            if time.monotonic() - stored_at > SEARCH_CACHE_TTL:
+                del self._search_cache[cache_key]
+                return None
+            self._search_cache.move_to_end(cache_key)
+        return [dict(result) for result in results]
+    
+    def _store_search(self, cache_key, results):
+        """Remember a complete search result, evicting the least recently used one when full"""
+        with self._search_cache_lock:
+            self._search_cache[cache_key] = (time.monotonic(), tuple(dict(result) for result in results))
+            self._search_cache.move_to_end(cache_key)
+            if len(self._search_cache) > SEARCH_CACHE_SIZE:
+                self._search_cache.popitem(last=False)
+    
+    def clear_search_cache(self):
+        """Forget cached search results"""
+        with self._search_cache_lock:
+            self._search_cache.clear()
     
     def get_actual_table_name(self, expected_name):
         """Get the actual table name for an expected table name"""
@@ -48,26 +158,21 @@ class DMPQueries:
     def get_dmp_tables(self):
         """Get list of DMP tables using actual database structure"""
         try:
-            connection = self.connection_manager.get_connection()
-            cursor = connection.cursor()
-            
             table_name = self.get_actual_table_name('tTable')
-            if table_name not in self.table_mappings.values():
+            if table_name not in self.table_name_set:
                 logger.warning(f"Table {table_name} not found, using available tables")
                 return self.discovery_manager.discover_tables()
             
-            query = f"SELECT TableCode, TableLabel FROM [{table_name}] ORDER BY TableCode"
-            cursor.execute(query)
-            
-            tables = []
-            for row in cursor.fetchall():
-                tables.append({
-                    'code': getattr(row, 'TableCode', row[0]),
-                    'label': getattr(row, 'TableLabel', row[1] if len(row) > 1 else row[0])
-                })
-            
-            logger.info(f"Retrieved {len(tables)} DMP tables")
-            return tables
+            with self._cursor() as cursor:
+                query = f"SELECT TableCode, TableLabel FROM [{table_name}] ORDER BY TableCode"
+                cursor.execute(query)
+
+                tables = []
+                for code, label in cursor:
+                    tables.append({'code': code, 'label': label})
+
+                logger.info(f"Retrieved {len(tables)} DMP tables")
+                return tables
             
         except Exception as e:
             logger.error(f"Failed to get DMP tables: {e}")
@@ -76,218 +181,299 @@ class DMPQueries:
     
     def get_table_concepts(self, table_code):
         """Get concepts for a specific table using actual database structure"""
+        cache_key = self._search_key('table_concepts', table_code)
+        cached = self._cached_search(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            connection = self.connection_manager.get_connection()
-            cursor = connection.cursor()
-            
-            # Try multiple approaches to find concepts
-            concept_results = []
-            
-            # Approach 1: Direct concept table
-            concept_table = self.get_actual_table_name('tConcept')
-            if concept_table in self.table_mappings.values():
-                try:
-                    query = f"SELECT TOP 100 ConceptCode, ConceptLabel, ConceptType FROM [{concept_table}]"
-                    cursor.execute(query)
-                    
-                    for row in cursor.fetchall():
-                        concept_results.append({
-                            'conceptCode': getattr(row, 'ConceptCode', row[0]),
-                            'conceptLabel': getattr(row, 'ConceptLabel', row[1] if len(row) > 1 else row[0]),
-                            'conceptType': getattr(row, 'ConceptType', row[2] if len(row) > 2 else 'Unknown')
-                        })
-                except Exception as e:
-                    logger.warning(f"Failed to query concept table: {e}")
-            
-            # Approach 2: DataPoint table
-            datapoint_table = self.get_actual_table_name('tDataPoint')
-            if datapoint_table in self.table_mappings.values():
-                try:
-                    query = f"SELECT TOP 100 DataPointCode, DataPointLabel FROM [{datapoint_table}]"
-                    cursor.execute(query)
-                    
-                    for row in cursor.fetchall():
-                        concept_results.append({
-                            'conceptCode': getattr(row, 'DataPointCode', row[0]),
-                            'conceptLabel': getattr(row, 'DataPointLabel', row[1] if len(row) > 1 else row[0]),
-                            'conceptType': 'DataPoint'
-                        })
-                except Exception as e:
-                    logger.warning(f"Failed to query datapoint table: {e}")
-            
-            logger.info(f"Retrieved {len(concept_results)} concepts for table {table_code}")
-            return concept_results
+            with self._cursor() as cursor:
+                # Try multiple approaches to find concepts
+                concept_results = []
+                # Results are only cached when no approach failed
+                complete = True
+
+                # Approach 1: Direct concept table
+                concept_table = self.get_actual_table_name('tConcept')
+                if concept_table in self.table_name_set:
+                    try:
+                        query = f"SELECT TOP 100 ConceptCode, ConceptLabel, ConceptType FROM [{concept_table}]"
+                        cursor.execute(query)
+
+                        for code, label, concept_type in cursor:
+                            concept_results.append({
+                                'conceptCode': code,
+                                'conceptLabel': label,
+                                'conceptType': concept_type
+                            })
+                    except Exception as e:
+                        complete = False
+                        logger.warning(f"Failed to query concept table: {e}")
+
+                # Approach 2: DataPoint table
+                datapoint_table = self.get_actual_table_name('tDataPoint')
+                if datapoint_table in self.table_name_set:
+                    try:
+                        query = f"SELECT TOP 100 DataPointCode, DataPointLabel FROM [{datapoint_table}]"
+                        cursor.execute(query)
+
+                        for code, label in cursor:
+                            concept_results.append({
+                                'conceptCode': code,
+                                'conceptLabel': label,
+                                'conceptType': 'DataPoint'
+                            })
+                    except Exception as e:
+                        complete = False
+                        logger.warning(f"Failed to query datapoint table: {e}")
+
+                logger.info(f"Retrieved {len(concept_results)} concepts for table {table_code}")
+                if complete:
+                    self._store_search(cache_key, concept_results)
+                return concept_results
             
         except Exception as e:
             logger.error(f"Failed to get table concepts: {e}")
             return []
     
     def search_concepts(self, search_term, limit=10):
-        """Search for concepts across all available tables including DMP 3.3 support"""
+        """
+        Search for concepts across all available tables including DMP 3.3 support.
+        A trailing * searches by prefix, a leading * by suffix and a quoted term ("...") exactly;
+        any other term matches anywhere in the code or label.
+        """
+        cache_key = self._search_key('concepts', search_term, limit)
+        cached = self._cached_search(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            connection = self.connection_manager.get_connection()
-            cursor = connection.cursor()
-            
-            results = []
+            match_op, match_term = self._classify_pattern(search_term)
             
             # Detect database version for appropriate table selection
-            db_version = self._detect_database_version(connection)
-            
-            # Search in concept table (version-aware)
-            concept_table = self.get_actual_table_name('tConcept')
-            if concept_table in self.table_mappings.values():
-                try:
-                    if db_version == 'dmp_3_3':
-                        # DMP 3.3: Use DimensionalItem or Item table
-                        if concept_table == 'DimensionalItem':
-                            query = f"""
-                            SELECT TOP {limit} Code, Label, 'DimensionalItem' as Type 
-                            FROM [{concept_table}] 
-                            WHERE Code LIKE ? OR Label LIKE ?
-                            """
-                        elif concept_table == 'Item':
-                            query = f"""
-                            SELECT TOP {limit} Code, Label, 'Item' as Type 
-                            FROM [{concept_table}] 
-                            WHERE Code LIKE ? OR Label LIKE ?
-                            """
-                        else:
-                            query = f"""
-                            SELECT TOP {limit} Code, Label, 'Concept' as Type 
-                            FROM [{concept_table}] 
-                            WHERE Code LIKE ? OR Label LIKE ?
-                            """
-                    else:
-                        # DMP 4.0: Use standard tConcept structure
-                        query = f"""
-                        SELECT TOP {limit} ConceptCode, ConceptLabel, ConceptType 
-                        FROM [{concept_table}] 
-                        WHERE ConceptCode LIKE ? OR ConceptLabel LIKE ?
-                        """
-                    
-                    cursor.execute(query, f"%{search_term}%", f"%{search_term}%")
-                    
-                    for row in cursor.fetchall():
-                        if db_version == 'dmp_3_3':
-                            results.append({
-                                'conceptCode': getattr(row, 'Code', row[0]),
-                                'conceptLabel': getattr(row, 'Label', row[1] if len(row) > 1 else row[0]),
-                                'conceptType': getattr(row, 'Type', row[2] if len(row) > 2 else 'Concept'),
-                                'source': concept_table
-                            })
-                        else:
-                            results.append({
-                                'conceptCode': getattr(row, 'ConceptCode', row[0]),
-                                'conceptLabel': getattr(row, 'ConceptLabel', row[1] if len(row) > 1 else row[0]),
-                                'conceptType': getattr(row, 'ConceptType', row[2] if len(row) > 2 else 'Concept'),
-                                'source': 'tConcept'
-                            })
-                except Exception as e:
-                    logger.warning(f"Failed to search concept table: {e}")
-            
-            # Search in datapoint table (version-aware)
-            datapoint_table = self.get_actual_table_name('tDataPoint')
-            if datapoint_table in self.table_mappings.values():
-                try:
-                    if db_version == 'dmp_3_3':
-                        # DMP 3.3: Use TableItem or Cell table
-                        if datapoint_table == 'TableItem':
-                            query = f"""
-                            SELECT TOP {limit} Code, Label 
-                            FROM [{datapoint_table}] 
-                            WHERE Code LIKE ? OR Label LIKE ?
-                            """
-                        else:
-                            query = f"""
-                            SELECT TOP {limit} Code, Code 
-                            FROM [{datapoint_table}] 
-                            WHERE Code LIKE ?
-                            """
-                            cursor.execute(query, f"%{search_term}%")
-                    else:
-                        # DMP 4.0: Use standard tDataPoint structure
-                        query = f"""
-                        SELECT TOP {limit} DataPointCode, DataPointLabel 
-                        FROM [{datapoint_table}] 
-                        WHERE DataPointCode LIKE ? OR DataPointLabel LIKE ?
-                        """
-                        cursor.execute(query, f"%{search_term}%", f"%{search_term}%")
-                    
-                    if db_version == 'dmp_3_3' and datapoint_table != 'TableItem':
-                        for row in cursor.fetchall():
-                            results.append({
-                                'conceptCode': getattr(row, 'Code', row[0]),
-                                'conceptLabel': getattr(row, 'Code', row[0]),
-                                'conceptType': 'DataPoint',
-                                'source': datapoint_table
-                            })
-                    else:
-                        for row in cursor.fetchall():
-                            if db_version == 'dmp_3_3':
-                                results.append({
-                                    'conceptCode': getattr(row, 'Code', row[0]),
-                                    'conceptLabel': getattr(row, 'Label', row[1] if len(row) > 1 else row[0]),
-                                    'conceptType': 'DataPoint',
-                                    'source': datapoint_table
-                                })
-                            else:
-                                results.append({
-                                    'conceptCode': getattr(row, 'DataPointCode', row[0]),
-                                    'conceptLabel': getattr(row, 'DataPointLabel', row[1] if len(row) > 1 else row[0]),
-                                    'conceptType': 'DataPoint',
-                                    'source': 'tDataPoint'
-                                })
-                except Exception as e:
-                    logger.warning(f"Failed to search datapoint table: {e}")
+            db_version = self._detect_database_version()
+            
+            # Concept, datapoint and member tables that exist, in result order
+            searches = []
+            for label, search, expected_name in (('concept', self._search_concept_table, 'tConcept'),
+                                                 ('datapoint', self._search_datapoint_table, 'tDataPoint'),
+                                                 ('member', self._search_member_table, 'tMember')):
+                table = self.get_actual_table_name(expected_name)
+                if table in self.table_name_set:
+                    searches.append((label, search, table))
+            
+            def run_search(search, table, cursor):
+                return search(cursor, table, db_version, limit, match_op, match_term)
+            
+            def run_pooled(search, table):
+                # Each table is scanned on its own connection so the scans overlap
+                with self._cursor() as search_cursor:
+                    return run_search(search, table, search_cursor)
+            
+            if PARALLEL_SEARCH and len(searches) > 1:
+                with ThreadPoolExecutor(max_workers=len(searches)) as pool:
+                    futures = [pool.submit(run_pooled, search, table) for _, search, table in searches]
+                    outcomes = []
+                    for future in futures:
+                        try:
+                            outcomes.append(future.result())
+                        except Exception as e:
+                            outcomes.append(e)
+            else:
+                outcomes = []
+                if searches:
+                    with self._cursor() as cursor:
+                        for _, search, table in searches:
+                            try:
+                                outcomes.append(run_search(search, table, cursor))
+                            except Exception as e:
+                                outcomes.append(e)
             
-            # Search in Member table (works for both versions)
-            member_table = self.get_actual_table_name('tMember')
-            if member_table in self.table_mappings.values():
-                try:
-                    query = f"""
-                    SELECT TOP {limit} MemberCode, MemberXbrlCode, MemberLabel 
-                    FROM [{member_table}] 
-                    WHERE MemberCode LIKE ? OR MemberXbrlCode LIKE ? OR MemberLabel LIKE ?
-                    """
-                    cursor.execute(query, f"%{search_term}%", f"%{search_term}%", f"%{search_term}%")
-                    
-                    for row in cursor.fetchall():
-                        results.append({
-                            'conceptCode': getattr(row, 'MemberCode', row[0]),
-                            'conceptXbrlCode': getattr(row, 'MemberXbrlCode', row[1] if len(row) > 1 else ''),
-                            'conceptLabel': getattr(row, 'MemberLabel', row[2] if len(row) > 2 else row[0]),
-                            'conceptType': 'Member',
-                            'source': 'tMember'
-                        })
-                except Exception as e:
-                    logger.warning(f"Failed to search member table: {e}")
+            results = []
+            # Results are only cached when no table search failed
+            complete = True
+            for (label, _, _), outcome in zip(searches, outcomes):
+                if isinstance(outcome, Exception):
+                    complete = False
+                    logger.warning(f"Failed to search {label} table: {outcome}")
+                else:
+                    results.extend(outcome)
             
             logger.info(f"Found {len(results)} concepts matching '{search_term}' (DB version: {db_version})")
+            if complete:
+                self._store_search(cache_key, results)
             return results
             
         except Exception as e:
             logger.error(f"Failed to search concepts: {e}")
             return []
     
-    def _detect_database_version(self, connection):
+    def _search_concept_table(self, cursor, concept_table, db_version, limit, match_op, match_term):
+        """Concept search results from the concept table (version-aware)"""
+        top = _top_bucket(limit)
+        if db_version == 'dmp_3_3':
+            # DMP 3.3: Use DimensionalItem or Item table
+            if concept_table == 'DimensionalItem':
+                query = self._get_sql(('concepts_3_3', concept_table, top, match_op), lambda: f"""
+                SELECT TOP {top} Code, Label, 'DimensionalItem' as Type 
+                FROM [{concept_table}] 
+                WHERE Code {match_op} ? OR Label {match_op} ?
+                """)
+            elif concept_table == 'Item':
+                query = self._get_sql(('concepts_3_3', concept_table, top, match_op), lambda: f"""
+                SELECT TOP {top} Code, Label, 'Item' as Type 
+                FROM [{concept_table}] 
+                WHERE Code {match_op} ? OR Label {match_op} ?
+                """)
+            else:
+                query = self._get_sql(('concepts_3_3', concept_table, top, match_op), lambda: f"""
+                SELECT TOP {top} Code, Label, 'Concept' as Type 
+                FROM [{concept_table}] 
+                WHERE Code {match_op} ? OR Label {match_op} ?
+                """)
+        else:
+            # DMP 4.0: Use standard tConcept structure
+            query = self._get_sql(('concepts_4_0', concept_table, top, match_op), lambda: f"""
+            SELECT TOP {top} ConceptCode, ConceptLabel, ConceptType 
+            FROM [{concept_table}] 
+            WHERE ConceptCode {match_op} ? OR ConceptLabel {match_op} ?
+            """)
+        
+        cursor.execute(query, match_term, match_term)
+        
+        source = concept_table if db_version == 'dmp_3_3' else 'tConcept'
+        return [
+            {
+                'conceptCode': code,
+                'conceptLabel': label,
+                'conceptType': concept_type,
+                'source': source
+            }
+            for code, label, concept_type in islice(cursor, limit)
+        ]
+    
+    def _search_datapoint_table(self, cursor, datapoint_table, db_version, limit, match_op, match_term):
+        """Concept search results from the datapoint table (version-aware)"""
+        top = _top_bucket(limit)
+        if db_version == 'dmp_3_3' and datapoint_table != 'TableItem':
+            # DMP 3.3 Cell table: codes only
+            query = self._get_sql(('datapoints_3_3', datapoint_table, top, match_op), lambda: f"""
+            SELECT TOP {top} Code, Code 
+            FROM [{datapoint_table}] 
+            WHERE Code {match_op} ?
+            """)
+            cursor.execute(query, match_term)
+            return [
+                {
+                    'conceptCode': code,
+                    'conceptLabel': code,
+                    'conceptType': 'DataPoint',
+                    'source': datapoint_table
+                }
+                for code, _ in islice(cursor, limit)
+            ]
+        
+        if db_version == 'dmp_3_3':
+            # DMP 3.3: TableItem table
+            query = self._get_sql(('datapoints_3_3', datapoint_table, top, match_op), lambda: f"""
+            SELECT TOP {top} Code, Label 
+            FROM [{datapoint_table}] 
+            WHERE Code {match_op} ? OR Label {match_op} ?
+            """)
+            source = datapoint_table
+        else:
+            # DMP 4.0: Use standard tDataPoint structure
+            query = self._get_sql(('datapoints_4_0', datapoint_table, top, match_op), lambda: f"""
+            SELECT TOP {top} DataPointCode, DataPointLabel 
+            FROM [{datapoint_table}] 
+            WHERE DataPointCode {match_op} ? OR DataPointLabel {match_op} ?
+            """)
+            source = 'tDataPoint'
+        
+        cursor.execute(query, match_term, match_term)
+        return [
+            {
+                'conceptCode': code,
+                'conceptLabel': label,
+                'conceptType': 'DataPoint',
+                'source': source
+            }
+            for code, label in islice(cursor, limit)
+        ]
+    
+    def _search_member_table(self, cursor, member_table, db_version, limit, match_op, match_term):
+        """Concept search results from the Member table (works for both versions)"""
+        top = _top_bucket(limit)
+        query = self._get_sql(('members', member_table, top, match_op), lambda: f"""
+        SELECT TOP {top} MemberCode, MemberXbrlCode, MemberLabel 
+        FROM [{member_table}] 
+        WHERE MemberCode {match_op} ? OR MemberXbrlCode {match_op} ? OR MemberLabel {match_op} ?
+        """)
+        cursor.execute(query, match_term, match_term, match_term)
+        return [
+            {
+                'conceptCode': member_code,
+                'conceptXbrlCode': xbrl_code,
+                'conceptLabel': label,
+                'conceptType': 'Member',
+                'source': 'tMember'
+            }
+            for member_code, xbrl_code, label in islice(cursor, limit)
+        ]
+    
+    def _classify_pattern(self, search_term):
+        """
+        (operator, parameter) for a search term. Exact and prefix patterns can use the
+        index on the code columns; suffix and substring patterns scan the table.
+        """
+        term = search_term
+        if len(term) > 1 and term[0] == term[-1] == '"':
+            return '=', term[1:-1]
+        if term.endswith('*') and not term.startswith('*'):
+            return 'LIKE', f"{term[:-1]}%"
+        if term.startswith('*') and not term.endswith('*'):
+            return 'LIKE', f"%{term[1:]}"
+        if len(term) > 1 and term[0] == term[-1] == '*':
+            term = term[1:-1]
+        return 'LIKE', f"%{term}%"
+    
+    def _detect_database_version(self):
         """Detect whether this is DMP 3.3 or DMP 4.0 database"""
+        if self._db_version is not None:
+            return self._db_version
+        
+        # The discovered table list answers without probe queries
+        available_tables = {table.lower() for table in self.discovery_manager.discover_tables()}
+        if available_tables:
+            if 'dimensionalitem' in available_tables:
+                self._db_version = 'dmp_3_3'
+            elif 'tconcept' in available_tables:
+                self._db_version = 'dmp_4_0'
+            else:
+                logger.warning("⚠️ No DimensionalItem or tConcept table found, defaulting to DMP 3.3")
+                self._db_version = 'dmp_3_3'
+            logger.debug(f"✅ Detected {self._db_version} database from table list")
+            return self._db_version
+        
         try:
-            cursor = connection.cursor()
-            
-            # Check for DimensionalItem table (DMP 3.3 indicator)
-            try:
-                cursor.execute("SELECT TOP 1 * FROM [DimensionalItem]")
-                logger.debug("✅ Detected DMP 3.3 database - DimensionalItem table found")
-                return 'dmp_3_3'
-            except:
-                # DimensionalItem not found, try tConcept table for DMP 4.0
+            # Probes borrow a cursor only when the table list was unavailable
+            with self._cursor() as cursor:
+                # Check for DimensionalItem table (DMP 3.3 indicator)
                 try:
-                    cursor.execute(f"SELECT TOP 1 * FROM [tConcept]")
-                    logger.debug("✅ Detected DMP 4.0 database - tConcept table found")
-                    return 'dmp_4_0'
+                    cursor.execute("SELECT TOP 1 * FROM [DimensionalItem]")
+                    logger.debug("✅ Detected DMP 3.3 database - DimensionalItem table found")
+                    self._db_version = 'dmp_3_3'
+                    return self._db_version
                 except:
-                    logger.warning("⚠️ No DimensionalItem or tConcept table found, defaulting to DMP 3.3")
-                    return 'dmp_3_3'
+                    # DimensionalItem not found, try tConcept table for DMP 4.0
+                    try:
+                        cursor.execute(f"SELECT TOP 1 * FROM [tConcept]")
+                        logger.debug("✅ Detected DMP 4.0 database - tConcept table found")
+                        self._db_version = 'dmp_4_0'
+                        return self._db_version
+                    except:
+                        logger.warning("⚠️ No DimensionalItem or tConcept table found, defaulting to DMP 3.3")
+                        return 'dmp_3_3'
                     
         except Exception as e:
             logger.warning(f"⚠️ Database version detection failed: {e}, defaulting to DMP 3.3")
@@ -295,48 +481,71 @@ class DMPQueries:
     
     def search_member_concepts(self, search_term, limit=10):
         """Dedicated search for Member table concepts"""
+        cache_key = self._search_key('members', search_term, limit)
+        cached = self._cached_search(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            connection = self.connection_manager.get_connection()
-            cursor = connection.cursor()
-            
             member_table = self.get_actual_table_name('tMember')
-            if member_table not in self.table_mappings.values():
+            if member_table not in self.table_name_set:
                 logger.warning(f"Member table not found")
                 return []
             
-            # Search both MemberCode and MemberXbrlCode
-            query = f"""
-            SELECT TOP {limit} MemberCode, MemberXbrlCode, MemberLabel, DimensionCode
-            FROM [{member_table}] 
-            WHERE MemberCode LIKE ? OR MemberXbrlCode LIKE ? OR MemberCode = ? OR MemberXbrlCode = ?
-            ORDER BY 
-                CASE 
-                    WHEN MemberCode = ? THEN 1
-                    WHEN MemberXbrlCode = ? THEN 2
-                    WHEN MemberCode LIKE ? THEN 3
-                    WHEN MemberXbrlCode LIKE ? THEN 4
-                    ELSE 5
-                END
-            """
-            
-            exact_term = search_term
-            like_term = f"%{search_term}%"
-            
-            cursor.execute(query, like_term, like_term, exact_term, exact_term, 
-                          exact_term, exact_term, like_term, like_term)
-            
-            results = []
-            for row in cursor.fetchall():
-                results.append({
-                    'memberCode': getattr(row, 'MemberCode', row[0]),
-                    'memberXbrlCode': getattr(row, 'MemberXbrlCode', row[1] if len(row) > 1 else ''),
-                    'memberLabel': getattr(row, 'MemberLabel', row[2] if len(row) > 2 else ''),
-                    'dimensionCode': getattr(row, 'DimensionCode', row[3] if len(row) > 3 else ''),
-                    'source': 'tMember'
-                })
-            
-            logger.info(f"Found {len(results)} member concepts for '{search_term}'")
-            return results
+            with self._cursor() as cursor:
+                # Ranked tiers: exact MemberCode, exact MemberXbrlCode, MemberCode LIKE, MemberXbrlCode LIKE.
+                # Each tier is its own query and later tiers only run while fewer than limit rows were found.
+                exact_term = search_term
+                like_term = f"%{search_term}%"
+                lowered_term = search_term.lower()
+
+                def is_exact(row):
+                    # Access compares text case-insensitively
+                    return (row[0] or '').lower() == lowered_term or (row[1] or '').lower() == lowered_term
+
+                # Not capped with TOP: exact matches are few, and a cap before the code-first
+                # sort could drop the exact MemberCode match in favour of an XBRL code one
+                query = self._get_sql(('member_exact', member_table), lambda: f"""
+                SELECT MemberCode, MemberXbrlCode, MemberLabel, DimensionCode
+                FROM [{member_table}] 
+                WHERE MemberCode = ? OR MemberXbrlCode = ?
+                """)
+                cursor.execute(query, exact_term, exact_term)
+                exact_rows = list(cursor)
+                rows = sorted(exact_rows, key=lambda row: 0 if (row[0] or '').lower() == lowered_term else 1)[:limit]
+
+                like_tiers = (
+                    ('member_code_like', "MemberCode LIKE ?", (like_term,)),
+                    ('member_xbrl_like', "MemberXbrlCode LIKE ? AND (MemberCode IS NULL OR NOT MemberCode LIKE ?)",
+                     (like_term, like_term))
+                )
+                for tier_name, condition, params in like_tiers:
+                    needed = limit - len(rows)
+                    if needed <= 0:
+                        break
+                    # Exact matches also satisfy the LIKE tiers; fetch enough to skip them
+                    top = _top_bucket(needed + len(exact_rows))
+                    query = self._get_sql((tier_name, member_table, top), lambda: f"""
+                    SELECT TOP {top} MemberCode, MemberXbrlCode, MemberLabel, DimensionCode
+                    FROM [{member_table}] 
+                    WHERE {condition}
+                    """)
+                    cursor.execute(query, *params)
+                    rows.extend([row for row in cursor if not is_exact(row)][:needed])
+
+                results = []
+                for member_code, xbrl_code, label, dimension_code in rows[:limit]:
+                    results.append({
+                        'memberCode': member_code,
+                        'memberXbrlCode': xbrl_code,
+                        'memberLabel': label,
+                        'dimensionCode': dimension_code,
+                        'source': 'tMember'
+                    })
+
+                logger.info(f"Found {len(results)} member concepts for '{search_term}'")
+                self._store_search(cache_key, results)
+                return results
             
         except Exception as e:
             logger.error(f"Failed to search member concepts: {e}")
@@ -345,56 +554,40 @@ class DMPQueries:
     def get_comprehensive_health_check(self):
         """Get comprehensive health check of the database"""
         try:
-            connection = self.connection_manager.get_connection()
-            cursor = connection.cursor()
-            
-            health_check = {
-                'available_tables': self.discovery_manager.discover_tables(),
-                'table_mappings': self.table_mappings,
-                'total_concepts': 0,
-                'total_datapoints': 0,
-                'total_validation_rules': 0,
-                'total_tables': 0
-            }
-            
-            # Count concepts
-            concept_table = self.get_actual_table_name('tConcept')
-            if concept_table in self.table_mappings.values():
-                try:
-                    cursor.execute(f"SELECT COUNT(*) FROM [{concept_table}]")
-                    health_check['total_concepts'] = cursor.fetchone()[0]
-                except:
-                    pass
-            
-            # Count datapoints
-            datapoint_table = self.get_actual_table_name('tDataPoint')
-            if datapoint_table in self.table_mappings.values():
-                try:
-                    cursor.execute(f"SELECT COUNT(*) FROM [{datapoint_table}]")
-                    health_check['total_datapoints'] = cursor.fetchone()[0]
-                except:
-                    pass
-            
-            # Count validation rules
-            validation_table = self.get_actual_table_name('tValidationRule')
-            if validation_table in self.table_mappings.values():
-                try:
-                    cursor.execute(f"SELECT COUNT(*) FROM [{validation_table}]")
-                    health_check['total_validation_rules'] = cursor.fetchone()[0]
-                except:
-                    pass
-            
-            # Count tables
-            table_table = self.get_actual_table_name('tTable')
-            if table_table in self.table_mappings.values():
-                try:
-                    cursor.execute(f"SELECT COUNT(*) FROM [{table_table}]")
-                    health_check['total_tables'] = cursor.fetchone()[0]
-                except:
-                    pass
-            
-            logger.info(f"Health check completed: {health_check['total_concepts']} concepts, {health_check['total_datapoints']} datapoints")
-            return health_check
+            with self._cursor() as cursor:
+                health_check = {
+                    'available_tables': self.discovery_manager.discover_tables(),
+                    'table_mappings': self.table_mappings,
+                    'total_concepts': 0,
+                    'total_datapoints': 0,
+                    'total_validation_rules': 0,
+                    'total_tables': 0
+                }
+
+                # Count every mapped table in one round-trip; per table only if that fails
+                counted_tables = {}
+                for stat, expected_name in (('total_concepts', 'tConcept'), ('total_datapoints', 'tDataPoint'),
+                                            ('total_validation_rules', 'tValidationRule'), ('total_tables', 'tTable')):
+                    actual_table = self.get_actual_table_name(expected_name)
+                    if actual_table in self.table_name_set:
+                        counted_tables[stat] = actual_table
+
+                if counted_tables:
+                    try:
+                        cursor.execute("SELECT " + ", ".join(
+                            f"(SELECT COUNT(*) FROM [{table}]) AS {stat}" for stat, table in counted_tables.items()
+                        ))
+                        health_check.update(zip(counted_tables, cursor.fetchone()))
+                    except Exception:
+                        for stat, table in counted_tables.items():
+                            try:
+                                cursor.execute(f"SELECT COUNT(*) FROM [{table}]")
+                                health_check[stat] = cursor.fetchone()[0]
+                            except:
+                                pass
+
+                logger.info(f"Health check completed: {health_check['total_concepts']} concepts, {health_check['total_datapoints']} datapoints")
+                return health_check
             
         except Exception as e:
             logger.error(f"Health check failed: {e}")
@@ -410,35 +603,39 @@ class DMPQueries:
     
     def get_validation_rules(self, table_code):
         """Get validation rules for a specific table"""
+        cache_key = self._search_key('rules', table_code)
+        cached = self._cached_search(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            connection = self.connection_manager.get_connection()
-            cursor = connection.cursor()
-            
             validation_table = self.get_actual_table_name('tValidationRule')
-            if validation_table not in self.table_mappings.values():
+            if validation_table not in self.table_name_set:
                 logger.warning(f"Validation rules table not found")
                 return []
             
-            query = f"""
-            SELECT TOP 50 RuleCode, RuleLabel, RuleType, Expression 
-            FROM [{validation_table}] 
-            WHERE TableCode = ? OR TableCode IS NULL
-            ORDER BY RuleCode
-            """
-            
-            cursor.execute(query, table_code)
-            
-            rules = []
-            for row in cursor.fetchall():
-                rules.append({
-                    'ruleCode': getattr(row, 'RuleCode', row[0]),
-                    'ruleLabel': getattr(row, 'RuleLabel', row[1] if len(row) > 1 else row[0]),
-                    'ruleType': getattr(row, 'RuleType', row[2] if len(row) > 2 else 'Unknown'),
-                    'expression': getattr(row, 'Expression', row[3] if len(row) > 3 else '')
-                })
-            
-            logger.info(f"Retrieved {len(rules)} validation rules for table {table_code}")
-            return rules
+            with self._cursor() as cursor:
+                query = f"""
+                SELECT TOP 50 RuleCode, RuleLabel, RuleType, Expression 
+                FROM [{validation_table}] 
+                WHERE TableCode = ? OR TableCode IS NULL
+                ORDER BY RuleCode
+                """
+
+                cursor.execute(query, table_code)
+
+                rules = []
+                for rule_code, label, rule_type, expression in cursor:
+                    rules.append({
+                        'ruleCode': rule_code,
+                        'ruleLabel': label,
+                        'ruleType': rule_type,
+                        'expression': expression
+                    })
+
+                logger.info(f"Retrieved {len(rules)} validation rules for table {table_code}")
+                self._store_search(cache_key, rules)
+                return rules
             
         except Exception as e:
             logger.error(f"Failed to get validation rules: {e}")
@@ -447,33 +644,31 @@ class DMPQueries:
     def get_dimensional_info(self, datapoint_code):
         """Get dimensional information for a datapoint"""
         try:
-            connection = self.connection_manager.get_connection()
-            cursor = connection.cursor()
-            
             dimension_table = self.get_actual_table_name('tDimension')
-            if dimension_table not in self.table_mappings.values():
+            if dimension_table not in self.table_name_set:
                 logger.warning(f"Dimension table not found")
                 return []
             
-            query = f"""
-            SELECT TOP 20 DimensionCode, DimensionLabel, DimensionType 
-            FROM [{dimension_table}] 
-            WHERE DataPointCode = ? OR DataPointCode IS NULL
-            ORDER BY DimensionCode
-            """
-            
-            cursor.execute(query, datapoint_code)
-            
-            dimensions = []
-            for row in cursor.fetchall():
-                dimensions.append({
-                    'dimensionCode': getattr(row, 'DimensionCode', row[0]),
-                    'dimensionLabel': getattr(row, 'DimensionLabel', row[1] if len(row) > 1 else row[0]),
-                    'dimensionType': getattr(row, 'DimensionType', row[2] if len(row) > 2 else 'Unknown')
-                })
-            
-            logger.info(f"Retrieved {len(dimensions)} dimensions for datapoint {datapoint_code}")
-            return dimensions
+            with self._cursor() as cursor:
+                query = f"""
+                SELECT TOP 20 DimensionCode, DimensionLabel, DimensionType 
+                FROM [{dimension_table}] 
+                WHERE DataPointCode = ? OR DataPointCode IS NULL
+                ORDER BY DimensionCode
+                """
+
+                cursor.execute(query, datapoint_code)
+
+                dimensions = []
+                for dimension_code, label, dimension_type in cursor:
+                    dimensions.append({
+                        'dimensionCode': dimension_code,
+                        'dimensionLabel': label,
+                        'dimensionType': dimension_type
+                    })
+
+                logger.info(f"Retrieved {len(dimensions)} dimensions for datapoint {datapoint_code}")
+                return dimensions
             
         except Exception as e:
             logger.error(f"Failed to get dimensional info: {e}")
@@ -482,25 +677,25 @@ class DMPQueries:
     def search_concept(self, concept_name):
         """Search for a concept in the DMP database"""
         try:
-            connection = self.connection_manager.get_connection()
-            cursor = connection.cursor()
-            
             concept_table = self.get_actual_table_name('tConcept')
-            if concept_table not in self.table_mappings.values():
+            if concept_table not in self.table_name_set:
                 return None
             
-            query = f"SELECT ConceptCode, ConceptLabel, ConceptType FROM [{concept_table}] WHERE ConceptCode = ? OR ConceptLabel = ?"
-            cursor.execute(query, (concept_name, concept_name))
-            result = cursor.fetchone()
-            
-            if result:
-                return {
-                    'ConceptCode': getattr(result, 'ConceptCode', result[0]),
-                    'ConceptLabel': getattr(result, 'ConceptLabel', result[1] if len(result) > 1 else ''),
-                    'ConceptType': getattr(result, 'ConceptType', result[2] if len(result) > 2 else ''),
-                    'MetricCode': getattr(result, 'MetricCode', result[3] if len(result) > 3 else '')
-                }
-            return None
+            with self._cursor() as cursor:
+                query = f"SELECT ConceptCode, ConceptLabel, ConceptType FROM [{concept_table}] WHERE ConceptCode = ? OR ConceptLabel = ?"
+                cursor.execute(query, (concept_name, concept_name))
+                result = cursor.fetchone()
+
+                if result:
+                    code, label, concept_type = result
+                    # The query selects no metric code
+                    return {
+                        'ConceptCode': code,
+                        'ConceptLabel': label,
+                        'ConceptType': concept_type,
+                        'MetricCode': ''
+                    }
+                return None
             
         except Exception as e:
             logger.error(f"Concept search failed: {e}")
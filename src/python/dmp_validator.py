@@ -7,7 +7,6 @@ Focuses on pure database validation without Arelle dependencies.
 
 import logging
 from typing import Dict, Any, List, Optional
-from dmp_database import dmp_db
 from dmp_concept_resolver import concept_resolver
 
 logger = logging.getLogger(__name__)
@@ -3,11 +3,10 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import time
 from datetime import datetime
-from dmp_database import dmp_db
-from config import FINREP_RULES
+from dmp_database import get_dmp_db
 from arelle_core import test_arelle_path
 from validation_endpoints import validate_files_core, validate_request_files
-from dmp_direct_validation import DMPDirectValidator
+from dmp_direct_validation import get_dmp_direct_validator, clear_dmp_cache
 from taxonomy_dependency_manager import EBATaxonomyDependencyManager
 from dmp_concept_resolver import concept_resolver
 from taxonomy_version_detector import get_taxonomy_recommendations
@@ -60,7 +59,7 @@ def health_check():
         # Test database connection
         db_status = "unknown"
         try:
-            connection_status = dmp_db.test_connection()
+            connection_status = get_dmp_db().test_connection()
             db_status = "connected" if connection_status.get('connected') else "disconnected"
         except Exception as e:
             db_status = f"error: {str(e)}"
@@ -514,10 +513,10 @@ def dmp_status():
         
         # Test DMP 4.0 database connectivity with enhanced diagnostics
         try:
-            dmp_status_result = dmp_db.test_connection()
+            dmp_status_result = get_dmp_db().test_connection()
             
             # Get comprehensive health check
-            health_check = dmp_db.queries_manager.get_comprehensive_health_check()
+            health_check = get_dmp_db().queries_manager.get_comprehensive_health_check()
             
             status["dmp_database"] = {
                 **dmp_status_result,
@@ -553,7 +552,7 @@ def dmp_status():
 def dmp_tables():
     """Get available DMP 4.0 tables"""
     try:
-        tables = dmp_db.get_dmp_tables()
+        tables = get_dmp_db().get_dmp_tables()
         
         return jsonify({
             "success": True,
@@ -569,6 +568,22 @@ def dmp_tables():
             "error": str(e)
         }), 500
 
+@app.route("/dmp/cache/clear", methods=["POST"])
+def dmp_cache_clear():
+    """Drop cached DMP table concepts, validation rules, searches and validation responses, e.g. after the DMP database was updated"""
+    try:
+        clear_dmp_cache()
+        get_dmp_db().queries_manager.clear_search_cache()
+        logger.info("🧹 DMP table cache cleared")
+        return jsonify({"success": True}), 200
+        
+    except Exception as e:
+        logger.error(f"Failed to clear DMP cache: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
 @app.route("/dmp/dependencies", methods=["GET"])
 def dmp_dependencies():
     """Check taxonomy dependency status"""
@@ -758,8 +773,7 @@ def validate_dmp_direct():
             logger.info(f"Table code: {table_code}")
         
         # Use enhanced DMP 4.0 validation service with dependency resolution
-        validator = DMPDirectValidator()
-        result = validator.validate_dmp_direct(instance_file, validation_mode, table_code)
+        result = get_dmp_direct_validator().validate_dmp_direct(instance_file, validation_mode, table_code)
         
         if result.get('success'):
             logger.info("✅ DMP 4.0 validation with dependency resolution completed successfully")
@@ -795,7 +809,7 @@ def debug_resolve_concept(concept_code):
         resolution = concept_resolver.resolve_concept_from_dmp(concept_code)
         
         # Also try Member table specifically
-        member_results = dmp_db.queries_manager.search_member_concepts(concept_code, limit=5)
+        member_results = get_dmp_db().queries_manager.search_member_concepts(concept_code, limit=5)
         
         # Get Member table stats
         member_stats = concept_resolver.get_member_statistics()
@@ -1077,13 +1091,13 @@ def debug_member_table_info():
         test_results = {}
         
         for concept in test_concepts:
-            member_results = dmp_db.queries_manager.search_member_concepts(concept, limit=3)
+            member_results = get_dmp_db().queries_manager.search_member_concepts(concept, limit=3)
             test_results[concept] = member_results
         
         return jsonify({
             "member_table_stats": stats,
             "test_concept_searches": test_results,
-            "table_mappings": dmp_db.queries_manager.table_mappings
+            "table_mappings": get_dmp_db().queries_manager.table_mappings
         })
         
     except Exception as e:
@@ -1094,7 +1108,7 @@ if __name__ == "__main__":
     # Print startup information
     print("🚀 Starting Enhanced XBRL Validation Server with DMP Integration")
     print(f"📁 Upload folder: {UPLOAD_FOLDER}")
-    print(f"🗄️  Using database: {os.path.basename(dmp_db.db_path)}")
+    print(f"🗄️  Using database: {os.path.basename(get_dmp_db().db_path)}")
     
     # Test Arelle integration
     try:
@@ -1105,7 +1119,7 @@ if __name__ == "__main__":
     
     # Test DMP database connection
     try:
-        connection_status = dmp_db.test_connection()
+        connection_status = get_dmp_db().test_connection()
         print(f"DMP Database: {'✓' if connection_status.get('connected') else '✗'} {connection_status.get('message', 'Unknown')}")
     except Exception as e:
         print(f"DMP Database: ✗ {str(e)}")
@@ -1130,7 +1144,7 @@ if __name__ == "__main__":
     
     print("🎯 Server optimized for comprehensive XBRL validation")
     print("📊 Enhanced features: ValidationRules, dependency resolution, missing concept detection, DMP version compatibility")
-    print("🆕 Endpoints: /dmp/status, /dmp/dependencies, /validate-dmp-direct, /validate-enhanced, /validation-modes, /debug/*")
+    print("🆕 Endpoints: /dmp/status, /dmp/dependencies, /dmp/cache/clear, /validate-dmp-direct, /validate-enhanced, /validation-modes, /debug/*")
     print("🔄 NEW: /debug/dmp-compatibility - Test DMP version compatibility")
     print("🔄 NEW: /debug/concept-resolution - Test DMP concept resolution for XBRL concepts")
     print("🔄 NEW: /debug/comprehensive-validation-test - Test the new comprehensive validation system")
@@ -1,7 +1,6 @@
 
 import logging
-import subprocess
-from arelle_core import build_enhanced_arelle_command
+from arelle_core import run_enhanced_arelle_validation
 from arelle_runner import ArelleRunner  # FIXED: Use ArelleRunner instead of old arelle_core
 from taxonomy_processor import TaxonomyProcessor
 from concept_mapping_service import ConceptMappingService
@@ -46,7 +45,9 @@ class EnhancedValidationEngine:
             generated_schema = None
             if concept_mapping['dmp_available']:
                 logger.info(f"🔧 Generating schema for {len(concept_mapping['dmp_available'])} DMP-available concepts")
-                generated_schema = self.concept_mapper.generate_missing_schema_elements(concept_mapping['dmp_available'])
+                generated_schema = self.concept_mapper.generate_missing_schema_elements(
+                    concept_mapping['dmp_available'], concept_mapping['resolved']
+                )
                 if generated_schema:
                     extracted_schemas.append(generated_schema)
             
@@ -102,18 +103,10 @@ class EnhancedValidationEngine:
             else:
                 prioritized_packages = []
             
-            # Build enhanced Arelle command
-            arelle_cmd = build_enhanced_arelle_command(instance_path, extracted_schemas, prioritized_packages)
-            
-            logger.info(f"🔧 Enhanced Arelle command with {len(extracted_schemas)} schemas and {len(prioritized_packages)} packages")
+            logger.info(f"🔧 Enhanced Arelle validation with {len(extracted_schemas)} schemas and {len(prioritized_packages)} packages")
             
             # Execute validation
-            result = subprocess.run(
-                arelle_cmd,
-                capture_output=True,
-                text=True,
-                timeout=300
-            )
+            result = run_enhanced_arelle_validation(instance_path, extracted_schemas, prioritized_packages)
             
             logger.info(f"✅ Enhanced Arelle validation completed with return code: {result.returncode}")
             return result
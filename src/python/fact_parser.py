@@ -12,6 +12,9 @@ import re
 
 logger = logging.getLogger(__name__)
 
+# Namespace declaration attribute: group 1 is the prefix, None for the default namespace
+XMLNS_RE = re.compile(r'^xmlns(?::(.+))?$')
+
 class XBRLFactParser:
     """
     Advanced XBRL fact parser with support for:
@@ -101,13 +104,11 @@ class XBRLFactParser:
         
         # Extract from root attributes
         for key, value in root.attrib.items():
-            if key.startswith('xmlns:'):
-                prefix = key.replace('xmlns:', '')
+            match = XMLNS_RE.match(key)
+            if match:
+                prefix = match.group(1) or 'default'
                 namespaces[prefix] = value
-                logger.debug(f"Found namespace prefix: {prefix} -> {value}")
-            elif key == 'xmlns':
-                namespaces['default'] = value
-                logger.debug(f"Found default namespace: {value}")
+                logger.debug(f"Found namespace {prefix} -> {value}")
         
         # ENHANCED: Also check for namespaces in document tree if root has none
         if not namespaces or len(namespaces) < 3:
@@ -115,14 +116,12 @@ class XBRLFactParser:
             # Scan more elements for namespace declarations
             for i, element in enumerate(root.iter()):
                 for key, value in element.attrib.items():
-                    if key.startswith('xmlns:'):
-                        prefix = key.replace('xmlns:', '')
+                    match = XMLNS_RE.match(key)
+                    if match:
+                        prefix = match.group(1) or 'default'
                         if prefix not in namespaces:
                             namespaces[prefix] = value
                             logger.debug(f"Found namespace in element {i}: {prefix} -> {value}")
-                    elif key == 'xmlns' and 'default' not in namespaces:
-                        namespaces['default'] = value
-                        logger.debug(f"Found default namespace in element {i}: {value}")
                 
                 # Stop scanning after finding sufficient namespaces or after 100 elements
                 if len(namespaces) > 10 or i > 100:
@@ -15,9 +15,14 @@ import os
 import xml.etree.ElementTree as ET
 from datetime import datetime
 from typing import Dict, Any, Optional, List
-from dmp_database import dmp_db
+from dmp_database import get_dmp_db
 from dmp_concept_resolver import concept_resolver
 
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # lxml is optional; namespaces are read with ElementTree instead
+    lxml_etree = None
+
 logger = logging.getLogger(__name__)
 
 # Architecture configurations - Updated to use same path resolution as working DMP system
@@ -58,6 +63,68 @@ ARCHITECTURES = {
     }
 }
 
+# Detection patterns, built once instead of on every detect_architecture_version call
+_ARCH_1_0_FILENAME_PATTERNS = (
+    'finrep020400', 'finrep9indgaap', 'gb_finrep', '_2021-06-30_', '_2020',
+    'fulltaxonomy3.0', 'phase2', 'dummylei', '_20201218', 'finrep2.4'
+)
+
+# Enhanced patterns for DPM 3.0/Architecture 1.0 detection
+_ARCH_1_0_PATTERNS = (
+    'dpm/3.0', 'eu/cr/3.0', 'finrep/3.0', 'corep/3.0', 'finrep/2.4',
+    'gb_finrep', 'finrep020400', 'finrep9indgaap', 'phase2'
+)
+
+# Enhanced patterns for DPM 4.0/Architecture 2.0 detection
+_ARCH_2_0_PATTERNS = (
+    'dpm/4.0', 'eu/cr/4.0', 'finrep/4.0', 'corep/4.0', 'eba_', 'find_',
+    'errata5', 'taxo_package_4.0'
+)
+
+_ARCH_NAMESPACES = {
+    arch_key: tuple(arch_config['namespaces'])
+    for arch_key, arch_config in ARCHITECTURES.items()
+}
+
+def extract_namespaces(xbrl_path: str, fallback_limit: int = 5) -> Dict[str, str]:
+    """
+    Stream namespace declarations from an XBRL file, stopping at the root element.
+    When the root declares none, keeps reading until more than fallback_limit are found.
+    """
+    if lxml_etree is not None:
+        return _extract_namespaces_lxml(xbrl_path, fallback_limit)
+    
+    namespaces = {}
+    root_seen = False
+    
+    with open(xbrl_path, 'rb') as f:
+        for event, item in ET.iterparse(f, events=('start-ns', 'start')):
+            if event == 'start-ns':
+                prefix, uri = item
+                namespaces[prefix or 'default'] = uri
+                if root_seen and len(namespaces) > fallback_limit:
+                    break
+            elif not root_seen:
+                root_seen = True
+                if namespaces:
+                    break
+    
+    return namespaces
+
+def _extract_namespaces_lxml(xbrl_path: str, fallback_limit: int) -> Dict[str, str]:
+    """extract_namespaces using lxml's nsmap, built in C for each element"""
+    namespaces = {}
+    
+    with open(xbrl_path, 'rb') as f:
+        for _, element in lxml_etree.iterparse(f, events=('start',)):
+            for prefix, uri in element.nsmap.items():
+                namespaces[prefix or 'default'] = uri
+            # nsmap includes inherited declarations, so the root alone usually suffices
+            if len(namespaces) > fallback_limit or (namespaces and element.getparent() is None):
+                break
+    
+    return namespaces
+
 def detect_architecture_version(xbrl_path: str) -> str:
     """
     Enhanced DPM architecture detection from XBRL file and filename
@@ -68,75 +135,38 @@ def detect_architecture_version(xbrl_path: str) -> str:
         filename = os.path.basename(xbrl_path).lower()
         
         # ENHANCED: Check filename patterns first for quick detection
-        arch_1_0_filename_patterns = [
-            'finrep020400', 'finrep9indgaap', 'gb_finrep', '_2021-06-30_', '_2020',
-            'fulltaxonomy3.0', 'phase2', 'dummylei', '_20201218', 'finrep2.4'
-        ]
-        
-        for pattern in arch_1_0_filename_patterns:
+        for pattern in _ARCH_1_0_FILENAME_PATTERNS:
             if pattern in filename:
                 logger.info(f"✅ Architecture 1.0 detected via filename pattern: {pattern}")
                 return 'arch_1_0'
         
-        # Parse XBRL file for namespace detection
-        tree = ET.parse(xbrl_path)
-        root = tree.getroot()
-        
-        # Enhanced namespace extraction
-        namespaces = {}
-        for key, value in root.attrib.items():
-            if key.startswith('xmlns:'):
-                prefix = key.replace('xmlns:', '')
-                namespaces[prefix] = value
-            elif key == 'xmlns':
-                namespaces['default'] = value
-        
-        # Also scan first few elements if root has no namespaces
-        if not namespaces:
-            for element in root.iter():
-                for key, value in element.attrib.items():
-                    if key.startswith('xmlns:'):
-                        prefix = key.replace('xmlns:', '')
-                        namespaces[prefix] = value
-                    elif key == 'xmlns':
-                        namespaces['default'] = value
-                if len(namespaces) > 5:
-                    break
+        # Read namespace declarations without building the document tree
+        namespaces = extract_namespaces(xbrl_path)
         
         logger.info(f"🔍 Detected namespaces: {list(namespaces.values())}")
         
-        # Enhanced patterns for DPM 3.0/Architecture 1.0 detection
-        arch_1_0_patterns = [
-            'dpm/3.0', 'eu/cr/3.0', 'finrep/3.0', 'corep/3.0', 'finrep/2.4',
-            'gb_finrep', 'finrep020400', 'finrep9indgaap', 'phase2'
-        ]
-        
-        # Enhanced patterns for DPM 4.0/Architecture 2.0 detection  
-        arch_2_0_patterns = [
-            'dpm/4.0', 'eu/cr/4.0', 'finrep/4.0', 'corep/4.0', 'eba_', 'find_',
-            'errata5', 'taxo_package_4.0'
-        ]
+        lowered_namespaces = [(namespace, namespace.lower()) for namespace in namespaces.values()]
         
         # Check for architecture 1.0 first (DPM 3.0)
-        for namespace in namespaces.values():
-            for pattern in arch_1_0_patterns:
-                if pattern in namespace.lower():
+        for namespace, lowered in lowered_namespaces:
+            for pattern in _ARCH_1_0_PATTERNS:
+                if pattern in lowered:
                     logger.info(f"✅ Architecture 1.0 (DPM 3.0) detected via pattern: {pattern} in {namespace}")
                     return 'arch_1_0'
             # Original check for exact matches
-            for arch_ns in ARCHITECTURES['arch_1_0']['namespaces']:
+            for arch_ns in _ARCH_NAMESPACES['arch_1_0']:
                 if arch_ns in namespace:
                     logger.info(f"✅ Architecture 1.0 detected via namespace: {arch_ns}")
                     return 'arch_1_0'
         
         # Check for architecture 2.0 (DPM 4.0)
-        for namespace in namespaces.values():
-            for pattern in arch_2_0_patterns:
-                if pattern in namespace.lower():
+        for namespace, lowered in lowered_namespaces:
+            for pattern in _ARCH_2_0_PATTERNS:
+                if pattern in lowered:
                     logger.info(f"✅ Architecture 2.0 (DPM 4.0) detected via pattern: {pattern} in {namespace}")
                     return 'arch_2_0'
             # Original check for exact matches
-            for arch_ns in ARCHITECTURES['arch_2_0']['namespaces']:
+            for arch_ns in _ARCH_NAMESPACES['arch_2_0']:
                 if arch_ns in namespace:
                     logger.info(f"✅ Architecture 2.0 detected via namespace: {arch_ns}")
                     return 'arch_2_0'
@@ -256,7 +286,7 @@ class HybridValidationEngine:
             if self.dmp_available:
                 # CRITICAL: Switch DMP database connection to correct architecture  
                 logger.info(f"🔄 Switching DMP database to: {self.dmp_db_path}")
-                dmp_db.switch_database(detected_architecture)  # Use consistent architecture parameter
+                get_dmp_db().switch_database(detected_architecture)  # Use consistent architecture parameter
                 
                 # Re-initialize components with correct database
                 from dmp_validator import DMPValidator
@@ -670,7 +700,7 @@ class HybridValidationEngine:
                 'fact_parser': True,
                 'rule_engine': self.dmp_available
             },
-            'dmp_info': dmp_db.test_connection() if self.dmp_available else None,
+            'dmp_info': get_dmp_db().test_connection() if self.dmp_available else None,
             'capabilities': {
                 'concept_resolution': self.dmp_available,
                 'rule_validation': self.dmp_available,
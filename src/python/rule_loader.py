@@ -7,7 +7,7 @@ Supports both DMP 3.3 and DMP 4.0 database schemas.
 
 import logging
 from typing import Dict, Any
-from dmp_database import dmp_db
+from dmp_database import get_dmp_db
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +23,7 @@ class DMPRuleLoader:
     def load_validation_rules(self) -> Dict[str, Any]:
         """Load validation rules from DMP database"""
         try:
-            connection = dmp_db.connection_manager.get_connection()
+            connection = get_dmp_db().connection_manager.get_connection()
             cursor = connection.cursor()
             
             # Determine database version first
@@ -74,8 +74,8 @@ class DMPRuleLoader:
             else:
                 # DMP 4.0: Use ValidationRule table
                 try:
-                    rules_table = dmp_db.queries_manager.get_actual_table_name('tValidationRule')
-                    if rules_table not in dmp_db.queries_manager.table_mappings.values():
+                    rules_table = get_dmp_db().queries_manager.get_actual_table_name('tValidationRule')
+                    if rules_table not in get_dmp_db().queries_manager.table_name_set:
                         logger.warning("ValidationRule table not found - rule validation disabled")
                         return {}
                     
@@ -135,7 +135,7 @@ class DMPRuleLoader:
             except:
                 # ValidationRuleSet not found, try ValidationRule table for DMP 4.0
                 try:
-                    rules_table = dmp_db.queries_manager.get_actual_table_name('tValidationRule')
+                    rules_table = get_dmp_db().queries_manager.get_actual_table_name('tValidationRule')
                     cursor.execute(f"SELECT TOP 1 * FROM [{rules_table}]")
                     columns = [desc[0] for desc in cursor.description]
                     
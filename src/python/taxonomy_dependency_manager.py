@@ -8,9 +8,103 @@ from pathlib import Path
 import logging
 import re
 import shutil
+import hashlib
+import threading
+from collections import OrderedDict
 
 logger = logging.getLogger(__name__)
 
+# Arelle messages that name concepts missing from the loaded taxonomy
+_MISSING_CONCEPT_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+    for pattern in (
+        r'Schema concept definition missing for\s+([^\n\r]+)',
+        r'Instance facts missing schema concept definition:\s*([^\n\r]+)',
+        r'facts missing schema concept definition:\s*([^\n\r]+)',
+        r'missing schema concept:\s*([^\n\r]+)',
+        r'concept definition not found:\s*([^\n\r]+)',
+        r'undefined concept:\s*([^\n\r]+)'
+    )
+]
+
+# auto_resolve_dependencies results per taxonomy base directory, as (directory stamp, result);
+# shared by all manager instances so the package scan survives across requests
+_dependency_status_cache = {}
+
+# Missing concept analyses keyed on a digest of the validation output, since identical outputs
+# recur across re-runs; only the digest is kept, not the (possibly multi-MB) output itself
+MISSING_CONCEPTS_CACHE_SIZE = 128
+_missing_concepts_cache = OrderedDict()
+_missing_concepts_cache_lock = threading.Lock()
+
+def _output_digest(output_parts):
+    """Digest of a tuple of output strings; each part is length-prefixed so part boundaries count"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in output_parts:
+        data = part.encode('utf-8', 'surrogatepass')
+        digest.update(len(data).to_bytes(8, 'little'))
+        digest.update(data)
+    return digest.digest()
+
+def _cached_missing_concepts(output_parts):
+    """_categorize_missing_concepts, reusing the analysis of an identical earlier output"""
+    key = _output_digest(output_parts)
+    with _missing_concepts_cache_lock:
+        cached = _missing_concepts_cache.get(key)
+        if cached is not None:
+            _missing_concepts_cache.move_to_end(key)
+            return cached
+    
+    missing_analysis = _categorize_missing_concepts(output_parts)
+    with _missing_concepts_cache_lock:
+        _missing_concepts_cache[key] = missing_analysis
+        if len(_missing_concepts_cache) > MISSING_CONCEPTS_CACHE_SIZE:
+            _missing_concepts_cache.popitem(last=False)
+    return missing_analysis
+
+def _categorize_missing_concepts(output_parts):
+    """
+    Missing concepts named in validation output, by category.
+    output_parts is a tuple of output strings (e.g. stdout and stderr) scanned one after the other.
+    """
+    missing_analysis = {
+        'eurofiling_concepts': [],
+        'eba_framework_concepts': [],
+        'xbrl_base_concepts': [],
+        'mixed_version_concepts': [],
+        'unknown_concepts': []
+    }
+    
+    # Extract missing concepts from validation output
+    missing_concepts = []
+    
+    for pattern in _MISSING_CONCEPT_PATTERNS:
+        for match in (m for part in output_parts for m in pattern.findall(part)):
+            # Split by comma and clean concept names
+            concepts = [c.strip() for c in match.split(',') if c.strip()]
+            for concept in concepts:
+                concept = concept.strip().strip('"\'')
+                if concept and len(concept) > 2:
+                    missing_concepts.append(concept)
+    
+    # Remove duplicates
+    missing_concepts = list(set(missing_concepts))
+    
+    # Categorize missing concepts
+    for concept in missing_concepts:
+        if concept.startswith('find:') or 'fIndicators' in concept or 'filingIndicators' in concept:
+            missing_analysis['eurofiling_concepts'].append(concept)
+        elif concept.startswith('eba_met_3_4:') or concept.startswith('eba_met_3_5:'):
+            missing_analysis['mixed_version_concepts'].append(concept)
+        elif concept.startswith('eba_met:') or concept.startswith('eba_dim:') or concept.startswith('eba_'):
+            missing_analysis['eba_framework_concepts'].append(concept)
+        elif concept.startswith('xbrli:') or concept.startswith('link:') or concept.startswith('xbrl:'):
+            missing_analysis['xbrl_base_concepts'].append(concept)
+        else:
+            missing_analysis['unknown_concepts'].append(concept)
+    
+    return missing_analysis
+
 class EBATaxonomyDependencyManager:
     def __init__(self, base_dir=None):
         if base_dir is None:
@@ -458,55 +552,21 @@ class EBATaxonomyDependencyManager:
     
     def analyze_missing_concepts(self, validation_output):
         """
-        Analyze validation output to identify missing taxonomy dependencies
+        Analyze validation output to identify missing taxonomy dependencies.
+        validation_output is one string or an iterable of strings (e.g. stdout and stderr),
+        which saves joining large outputs first.
         """
+        if isinstance(validation_output, str):
+            output_parts = (validation_output,)
+        else:
+            output_parts = tuple(part for part in validation_output if part)
+        
+        # Copy the lists so callers cannot alter the cached analysis
         missing_analysis = {
-            'eurofiling_concepts': [],
-            'eba_framework_concepts': [],
-            'xbrl_base_concepts': [],
-            'mixed_version_concepts': [],
-            'unknown_concepts': []
+            category: list(concepts)
+            for category, concepts in _cached_missing_concepts(output_parts).items()
         }
         
-        # Extract missing concepts from validation output
-        missing_concepts = []
-        
-        # Enhanced pattern matching for missing concepts
-        patterns = [
-            r'Schema concept definition missing for\s+([^\n\r]+)',
-            r'Instance facts missing schema concept definition:\s*([^\n\r]+)',
-            r'facts missing schema concept definition:\s*([^\n\r]+)',
-            r'missing schema concept:\s*([^\n\r]+)',
-            r'concept definition not found:\s*([^\n\r]+)',
-            r'undefined concept:\s*([^\n\r]+)'
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, validation_output, re.IGNORECASE | re.MULTILINE)
-            for match in matches:
-                # Split by comma and clean concept names
-                concepts = [c.strip() for c in match.split(',') if c.strip()]
-                for concept in concepts:
-                    concept = concept.strip().strip('"\'')
-                    if concept and len(concept) > 2:
-                        missing_concepts.append(concept)
-        
-        # Remove duplicates
-        missing_concepts = list(set(missing_concepts))
-        
-        # Categorize missing concepts
-        for concept in missing_concepts:
-            if concept.startswith('find:') or 'fIndicators' in concept or 'filingIndicators' in concept:
-                missing_analysis['eurofiling_concepts'].append(concept)
-            elif concept.startswith('eba_met_3_4:') or concept.startswith('eba_met_3_5:'):
-                missing_analysis['mixed_version_concepts'].append(concept)
-            elif concept.startswith('eba_met:') or concept.startswith('eba_dim:') or concept.startswith('eba_'):
-                missing_analysis['eba_framework_concepts'].append(concept)
-            elif concept.startswith('xbrli:') or concept.startswith('link:') or concept.startswith('xbrl:'):
-                missing_analysis['xbrl_base_concepts'].append(concept)
-            else:
-                missing_analysis['unknown_concepts'].append(concept)
-        
         logger.info(f"📊 Missing concept analysis complete:")
         for category, concepts in missing_analysis.items():
             if concepts:
@@ -709,10 +769,37 @@ class EBATaxonomyDependencyManager:
         
         return "\n".join(instructions)
     
+    def package_dirs_stamp(self):
+        """Modification times of the package folders; adding, extracting or removing a package changes one"""
+        stamp = []
+        for dir_path in (self.eba_dir, self.eurofiling_dir, self.xbrl_org_dir):
+            for path in (dir_path, dir_path / "extracted"):
+                try:
+                    stamp.append(path.stat().st_mtime_ns)
+                except OSError:
+                    stamp.append(None)
+        return tuple(stamp)
+    
     def auto_resolve_dependencies(self):
         """
-        Automatically check and attempt to resolve missing dependencies
+        Automatically check and attempt to resolve missing dependencies.
+        The result is reused until one of the package folders changes.
         """
+        cache_key = str(self.base_dir)
+        stamp = self.package_dirs_stamp()
+        cached = _dependency_status_cache.get(cache_key)
+        if cached is not None and cached[0] == stamp:
+            dependency_status, available_packages = cached[1]
+            return dependency_status, list(available_packages)
+        
+        result = self._scan_dependencies()
+        # Extraction during the scan touches the folders, so stamp them afterwards
+        _dependency_status_cache[cache_key] = (self.package_dirs_stamp(), result)
+        dependency_status, available_packages = result
+        return dependency_status, list(available_packages)
+    
+    def _scan_dependencies(self):
+        """Check the common taxonomy packages on disk, extracting ZIPs where needed"""
         logger.info("🔍 Checking taxonomy dependency status...")
         
         # Check for common missing packages (prefer extracted directories)
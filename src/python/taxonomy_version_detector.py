@@ -11,6 +11,8 @@ import re
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
+from fact_parser import XMLNS_RE
+
 logger = logging.getLogger(__name__)
 
 class TaxonomyVersionDetector:
@@ -140,21 +142,18 @@ class TaxonomyVersionDetector:
         
         # Root namespaces
         for key, value in root.attrib.items():
-            if key.startswith('xmlns:'):
-                prefix = key.replace('xmlns:', '')
-                namespaces[prefix] = value
-            elif key == 'xmlns':
-                namespaces['default'] = value
+            match = XMLNS_RE.match(key)
+            if match:
+                namespaces[match.group(1) or 'default'] = value
         
         # Ook nested namespaces zoeken (eerste 50 elementen)
         for i, elem in enumerate(root.iter()):
             if i > 50:  # Limit voor performance
                 break
             for key, value in elem.attrib.items():
-                if key.startswith('xmlns:'):
-                    prefix = key.replace('xmlns:', '')
-                    if prefix not in namespaces:
-                        namespaces[prefix] = value
+                match = XMLNS_RE.match(key)
+                if match and match.group(1) and match.group(1) not in namespaces:
+                    namespaces[match.group(1)] = value
         
         return namespaces
     
@@ -5,7 +5,6 @@ import json
 import logging
 from werkzeug.utils import secure_filename
 from enhanced_validation_engine import EnhancedValidationEngine
-from config import FINREP_RULES
 
 logger = logging.getLogger(__name__)
 
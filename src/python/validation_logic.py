@@ -3,7 +3,7 @@ import json
 import time
 import logging
 from arelle_runner import ArelleRunner  # FIXED: Use enhanced ArelleRunner instead of arelle_core
-from config import FINREP_RULES
+from config import load_finrep_rules
 from dmp_concept_resolver import concept_resolver
 import os
 import re
@@ -12,9 +12,13 @@ logger = logging.getLogger(__name__)
 
 class ValidationProcessor:
     def __init__(self):
-        self.finrep_rules = FINREP_RULES
         self.arelle_runner = ArelleRunner()  # FIXED: Use enhanced ArelleRunner
 
+    @property
+    def finrep_rules(self):
+        """FINREP rules, loaded from disk the first time they are needed"""
+        return load_finrep_rules()
+
     def run_arelle_validation(self, instance_path, taxonomy_path):
         """Run standard Arelle validation with taxonomy - DEPRECATED, use EnhancedValidationEngine"""
         logger.warning("DEPRECATED: Use EnhancedValidationEngine.run_comprehensive_validation() instead")
@@ -0,0 +1,82 @@
+import os
+import sys
+import types
+import unittest
+from unittest import mock
+
+# Ensure src/python is on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'python'))
+
+# Provide a dummy pyodbc module if it's not installed
+if 'pyodbc' not in sys.modules:
+    sys.modules['pyodbc'] = types.ModuleType('pyodbc')
+
+from arelle_runner import ArelleRunner
+
+class ArelleOutputParsingTest(unittest.TestCase):
+    def setUp(self):
+        # Bypass __init__, which probes for an Arelle installation
+        self.runner = ArelleRunner.__new__(ArelleRunner)
+
+    def test_repeated_messages_are_counted_once(self):
+        lines = [
+            '[ERROR] 2024-01-01 10:00:00,123 - eba_v1234_c failed for fact eba_met:ei4',
+            '[ERROR] 2024-01-01 10:00:01,456 - eba_v1234_c failed for fact eba_met:ei4',
+            '[WARNING] unit EUR not declared',
+            '[INFO] loading instance',
+            '',
+        ]
+
+        result = self.runner._parse_arelle_output(lines)
+        self.runner._apply_return_code(result, 0)
+
+        self.assertEqual(len(result['errors']), 1)
+        self.assertEqual(result['errors'][0]['count'], 2)
+        self.assertEqual(result['errors'][0]['rule_code'], 'eba_v1234_c')
+        self.assertTrue(result['errors'][0]['is_business_rule'])
+        self.assertEqual(len(result['warnings']), 1)
+
+        summary = result['summary']
+        self.assertEqual(summary['total_errors'], 2)
+        self.assertEqual(summary['unique_errors'], 1)
+        self.assertEqual(summary['error_categories'], {'business_rule': 2})
+        self.assertFalse(summary['validation_passed'])
+        self.assertEqual(result['info_messages'], ['[INFO] loading instance'])
+
+    def test_error_markers_take_precedence(self):
+        result = self.runner._parse_arelle_output(['[WARNING] unexpected EXCEPTION in formula'])
+
+        self.assertEqual(len(result['errors']), 1)
+        self.assertEqual(result['warnings'], [])
+
+    def test_raw_output_keeps_repeated_diagnostics(self):
+        lines = [
+            '[ERROR] 2024-01-01 10:00:00,123 - Instance facts missing schema concept definition: eba_met:ei4',
+            '[ERROR] 2024-01-01 10:00:01,456 - Instance facts missing schema concept definition: eba_met:ei4',
+            '[ERROR] 2024-01-01 10:00:02,789 - assertion eba_v1234_c failed: value mismatch',
+            '[WARNING] unit EUR not declared',
+            '[WARNING] unit EUR not declared',
+        ]
+
+        result = self.runner._parse_arelle_output(lines)
+        reparsed = self.runner._parse_arelle_output(result['raw_output']['stderr'].split('\n'))
+
+        self.assertEqual(reparsed['summary']['total_errors'], 3)
+        self.assertEqual(reparsed['summary']['total_warnings'], 2)
+
+        # Consumers rebuild a process result from raw_output and parse it again
+        from validation_logic import ValidationProcessor
+        processor = ValidationProcessor.__new__(ValidationProcessor)
+        original = types.SimpleNamespace(returncode=1, stdout='', stderr='\n'.join(lines))
+        rebuilt = types.SimpleNamespace(returncode=1, stdout=result['raw_output']['stdout'],
+                                        stderr=result['raw_output']['stderr'])
+        with mock.patch('validation_logic.concept_resolver') as resolver:
+            resolver.resolve_concept_from_dmp.return_value = None
+            expected = processor.process_arelle_output(original)
+            actual = processor.process_arelle_output(rebuilt)
+
+        self.assertEqual(actual['validationStats'], expected['validationStats'])
+        self.assertEqual(actual['errors'], expected['errors'])
+
+if __name__ == '__main__':
+    unittest.main()
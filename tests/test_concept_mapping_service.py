@@ -0,0 +1,96 @@
+import os
+import re
+import sys
+import tempfile
+import types
+import unittest
+
+# Ensure src/python is on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'python'))
+
+# Provide a dummy pyodbc module if it's not installed
+if 'pyodbc' not in sys.modules:
+    sys.modules['pyodbc'] = types.ModuleType('pyodbc')
+
+from concept_mapping_service import ConceptMappingService
+
+SAMPLE_INSTANCE = '''<?xml version="1.0" encoding="UTF-8"?>
+<xbrli:xbrl xmlns:xbrli="http://www.xbrl.org/2003/instance"
+            xmlns:link="http://www.xbrl.org/2003/linkbase"
+            xmlns:xlink="http://www.w3.org/1999/xlink"
+            xmlns:xbrldi="http://xbrl.org/2006/xbrldi"
+            xmlns:iso4217="http://www.xbrl.org/2003/iso4217"
+            xmlns:find="http://www.eurofiling.info/xbrl/ext/filing-indicators"
+            xmlns:eba_met="http://www.eba.europa.eu/xbrl/crr/dict/met"
+            xmlns:eba_dim="http://www.eba.europa.eu/xbrl/crr/dict/dim"
+            xmlns:eba_BA="http://www.eba.europa.eu/xbrl/crr/dict/dom/BA">
+  <link:schemaRef xlink:type="simple" xlink:href="http://www.eba.europa.eu/eu/fr/xbrl/crr/fws/finrep/mod/finrep9.xsd"/>
+  <xbrli:context id="c1">
+    <xbrli:entity><xbrli:identifier scheme="http://standards.iso.org/iso/17442">LEI123</xbrli:identifier></xbrli:entity>
+    <xbrli:period><xbrli:instant>2024-12-31</xbrli:instant></xbrli:period>
+    <xbrli:scenario>
+      <xbrldi:explicitMember dimension="eba_dim:BAS">eba_BA:x6</xbrldi:explicitMember>
+    </xbrli:scenario>
+  </xbrli:context>
+  <xbrli:unit id="u1"><xbrli:measure>iso4217:EUR</xbrli:measure></xbrli:unit>
+  <find:fIndicators>
+    <find:filingIndicator contextRef="c1" find:filed="true">F_01.01</find:filingIndicator>
+  </find:fIndicators>
+  <eba_met:mi53 contextRef="c1" unitRef="u1" decimals="-3">1000</eba_met:mi53>
+  <eba_met:mi53 contextRef="c1" unitRef="u1" decimals="-3">2000</eba_met:mi53>
+  <eba_met:ii1 contextRef="c1" unitRef="u1" decimals="-3">3000</eba_met:ii1>
+</xbrli:xbrl>
+'''
+
+# The concept patterns used before extraction moved to a streaming parse
+_LEGACY_PATTERNS = [
+    r'\b(eba_met[^:\s]*:[A-Za-z][A-Za-z0-9_]*)\b',
+    r'\b(find:[A-Za-z][A-Za-z0-9_]*)\b',
+    r'<([^>\s]+:[A-Za-z][A-Za-z0-9_]+)[>\s]'
+]
+
+def _legacy_extract(content, closing_tags=True):
+    concepts = set()
+    for pattern in _LEGACY_PATTERNS:
+        for match in re.findall(pattern, content, re.IGNORECASE):
+            if ':' in match and len(match) > 5:
+                concepts.add(match)
+    if not closing_tags:
+        # The tag pattern also picked up closing tags such as '/xbrli:xbrl'
+        concepts = {concept for concept in concepts if not concept.startswith('/')}
+    return concepts
+
+class ExtractConceptsTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.xbrl')
+        with os.fdopen(handle, 'w', encoding='utf-8') as f:
+            f.write(SAMPLE_INSTANCE)
+        self.service = ConceptMappingService()
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_streaming_finds_everything_the_legacy_regex_found(self):
+        concepts = set(self.service._extract_concepts_from_xbrl(self.path))
+
+        self.assertLessEqual(_legacy_extract(SAMPLE_INSTANCE, closing_tags=False), concepts)
+
+    def test_streaming_finds_attribute_qnames(self):
+        concepts = set(self.service._extract_concepts_from_xbrl(self.path))
+
+        self.assertIn('eba_dim:BAS', concepts)
+        self.assertIn('find:filed', concepts)
+        # Not QNames: ids, numbers and URLs
+        self.assertFalse(any(concept.startswith('http') for concept in concepts))
+
+    def test_malformed_instance_uses_regex_scan(self):
+        truncated = SAMPLE_INSTANCE.replace('</xbrli:xbrl>', '')
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(truncated)
+
+        concepts = set(self.service._extract_concepts_from_xbrl(self.path))
+
+        self.assertEqual(concepts, _legacy_extract(truncated))
+
+if __name__ == '__main__':
+    unittest.main()
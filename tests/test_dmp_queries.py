@@ -0,0 +1,102 @@
+import os
+import re
+import sqlite3
+import sys
+import types
+import unittest
+from contextlib import contextmanager
+
+# Ensure src/python is on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'python'))
+
+# Provide a dummy pyodbc module if it's not installed
+if 'pyodbc' not in sys.modules:
+    sys.modules['pyodbc'] = types.ModuleType('pyodbc')
+
+from dmp_queries import DMPQueries
+
+_TOP_RE = re.compile(r'SELECT\s+TOP\s+(\d+)\s+(.*)', re.IGNORECASE | re.DOTALL)
+
+class FakeCursor:
+    """pyodbc-style cursor over SQLite; TOP n becomes LIMIT n"""
+    def __init__(self, db, executed):
+        self._cursor = db.cursor()
+        self._executed = executed
+
+    def execute(self, sql, *params):
+        match = _TOP_RE.search(sql)
+        if match:
+            sql = f"SELECT {match.group(2).strip()} LIMIT {match.group(1)}"
+        self._executed.append(sql)
+        self._cursor.execute(sql, params)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+class FakeConnectionManager:
+    def __init__(self, db):
+        self.db = db
+        self.executed = []
+
+    @contextmanager
+    def pooled_connection(self):
+        yield types.SimpleNamespace(cursor=lambda: FakeCursor(self.db, self.executed))
+
+class SearchMemberConceptsTest(unittest.TestCase):
+    def setUp(self):
+        db = sqlite3.connect(':memory:')
+        # Access compares text case-insensitively
+        db.execute(
+            "CREATE TABLE tMember (MemberCode TEXT COLLATE NOCASE, MemberXbrlCode TEXT COLLATE NOCASE, "
+            "MemberLabel TEXT, DimensionCode TEXT)"
+        )
+        db.executemany("INSERT INTO tMember VALUES (?, ?, ?, ?)", [
+            ('x1', 'qcef', 'XBRL code exact', 'AB'),
+            ('qCEF', 'eba_met:qCEF', 'Member code exact', 'MET'),
+            ('qCEFa', 'eba_XX:a1', 'Member code partial', 'XX'),
+            ('qCEFb', 'eba_XX:b1', 'Member code partial', 'XX'),
+            ('qCEFc', 'eba_XX:qCEFc', 'Member and XBRL code partial', 'XX'),
+            ('z1', 'eba_YY:qCEF_1', 'XBRL code partial', 'YY'),
+            ('z2', 'eba_YY:qCEF_2', 'XBRL code partial', 'YY'),
+            ('other', 'eba_ZZ:none', 'Unrelated', 'ZZ'),
+        ])
+        self.connection_manager = FakeConnectionManager(db)
+        discovery = types.SimpleNamespace(discover_tables=lambda: ['tMember'])
+        self.queries = DMPQueries(self.connection_manager, discovery)
+
+    def _codes(self, search_term, limit):
+        return [row['memberCode'] for row in self.queries.search_member_concepts(search_term, limit=limit)]
+
+    def test_tiers_in_rank_order_without_duplicates(self):
+        codes = self._codes('qCEF', 10)
+
+        # Exact MemberCode before exact MemberXbrlCode, then MemberCode LIKE, then MemberXbrlCode LIKE
+        self.assertEqual(codes[:2], ['qCEF', 'x1'])
+        self.assertEqual(set(codes[2:5]), {'qCEFa', 'qCEFb', 'qCEFc'})
+        self.assertEqual(set(codes[5:]), {'z1', 'z2'})
+        self.assertEqual(len(codes), len(set(codes)))
+
+    def test_limit_caps_results_and_skips_later_tiers(self):
+        codes = self._codes('qCEF', 3)
+
+        # The exact rows also match MemberCode LIKE; the over-fetch leaves room to skip them
+        self.assertEqual(codes[:2], ['qCEF', 'x1'])
+        self.assertEqual(len(codes), 3)
+        self.assertIn(codes[2], {'qCEFa', 'qCEFb', 'qCEFc'})
+        self.assertFalse(any('NOT MemberCode LIKE' in sql for sql in self.connection_manager.executed))
+
+    def test_limit_reached_by_exact_matches(self):
+        self.assertEqual(self._codes('QCEF', 1), ['qCEF'])
+        self.assertEqual(len(self.connection_manager.executed), 1)
+
+    def test_xbrl_code_partial_matches(self):
+        codes = self._codes('YY:q', 10)
+
+        self.assertEqual(codes, ['z1', 'z2'])
+
+if __name__ == '__main__':
+    unittest.main()